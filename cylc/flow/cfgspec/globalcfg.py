@@ -100,6 +100,12 @@ with Conf('global.cylc', desc='''
             submission, event handlers, and job poll and kill commands - see
             :ref:`Managing External Command Execution`.
         ''')
+        Conf('job file writer threads', VDR.V_INTEGER, 4, desc='''
+            Number of threads used to write task job files, so that job
+            files for large numbers of tasks submitted at once are written
+            (and syntax checked) concurrently. Set to 1 to write job files
+            in the main scheduler thread.
+        ''')
         Conf('process pool timeout', VDR.V_INTERVAL, DurationFloat(600),
              desc='''
             Interval after which long-running commands in the process pool
@@ -121,6 +127,39 @@ with Conf('global.cylc', desc='''
             beginning the process. This is to prevent large numbers of
             suites from restarting simultaneously.
         ''')
+        with Conf('database', desc='''
+            Configure how the scheduler writes to the suite run databases.
+        '''):
+            Conf('incremental task pool', VDR.V_BOOLEAN, True, desc='''
+                Write only the rows of the ``task_pool``,
+                ``task_prerequisites``, ``task_timeout_timers`` and
+                ``task_action_timers`` tables which have changed since the
+                last write, instead of wiping and rewriting these tables
+                whenever any task changes.
+
+                This greatly reduces the number of database writes for
+                suites with many tasks in the pool. The content of the
+                database (and so the result of a restart) is the same either
+                way.
+            ''')
+            Conf('public database writer', VDR.V_BOOLEAN, False, desc='''
+                Write to the public database (``log/db``) in a background
+                thread, so that slow writes to it (e.g. on a busy shared file
+                system, or when locked by readers) do not hold up the
+                scheduler.
+
+                The public database may lag slightly behind the private
+                database. If the writer falls too far behind, or cannot
+                write, the public database is recovered from the private
+                database.
+            ''')
+            Conf('public database queue size', VDR.V_INTEGER, 1000, desc='''
+                The maximum number of batches of writes waiting for the
+                public database writer, see
+                :cylc:conf:`global.cylc[scheduler][database]public database
+                writer`. If exceeded, the public database is recovered from
+                the private database.
+            ''')
         with Conf('run hosts', desc='''
             Configure allowed suite hosts and ports for starting up (running or
             restarting) suites. Additionally configure host selection settings
@@ -248,6 +287,16 @@ with Conf('global.cylc', desc='''
                 Configure the default main loop plugins to use when
                 starting up new suites.
             ''')
+            Conf('event driven', VDR.V_BOOLEAN, False, desc='''
+                Wake the main loop as soon as there is work to do (task
+                messages, commands, external triggers, subprocess exits)
+                instead of sleeping for a fixed interval between iterations.
+
+                Time-based checks (retry delays, clock triggers, timeouts)
+                are still made at the normal main loop interval. Per-stage
+                wake counts and latencies are logged at shutdown in either
+                mode, for comparison.
+            ''')
 
             with Conf('<plugin name>', desc='''
                 Configure a main loop plugin.
@@ -594,6 +643,19 @@ with Conf('global.cylc', desc='''
                 submission subprocess beyond the standard locations''' +
                  ', '.join(SYSPATH) + '''. You are unlikely to need this.
             ''')
+            Conf('job submission concurrency limit', VDR.V_INTEGER, 0,
+                 desc='''
+                The maximum number of job submission commands to run at the
+                same time for this platform. Each command submits a batch of
+                jobs. Zero means no limit other than
+                :cylc:conf:`global.cylc[scheduler]process pool size`.
+            ''')
+            Conf('job submission rate limit', VDR.V_FLOAT, 0.0, desc='''
+                The maximum number of jobs to submit per second to this
+                platform, e.g. to avoid overloading a job runner at cycle
+                boundaries. Jobs above the limit wait in the scheduler.
+                Zero means no limit.
+            ''')
         with Conf('localhost', meta=Platform):
             Conf('hosts', VDR.V_STRING_LIST, ['localhost'])
 
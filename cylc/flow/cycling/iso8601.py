@@ -26,7 +26,7 @@ from metomi.isodatetime.timezone import (
 from metomi.isodatetime.exceptions import IsodatetimeError
 from cylc.flow.time_parser import CylcTimeParser
 from cylc.flow.cycling import (
-    PointBase, IntervalBase, SequenceBase, ExclusionBase, cmp_to_rich, cmp
+    PointBase, IntervalBase, SequenceBase, ExclusionBase, cmp
 )
 from cylc.flow.exceptions import (
     CylcConfigError,
@@ -63,12 +63,22 @@ class SuiteSpecifics:
 
 class ISO8601Point(PointBase):
 
-    """A single point in an ISO8601 date time sequence."""
+    """A single point in an ISO8601 date time sequence.
+
+    Points are ordered by an integer key (see _point_key), computed once per
+    point string, so comparisons (e.g. sorting the task pool) do not need to
+    parse the point strings.
+
+    """
 
     TYPE = CYCLER_TYPE_ISO8601
     TYPE_SORT_KEY = CYCLER_TYPE_SORT_KEY_ISO8601
 
-    __slots__ = ('value')
+    __slots__ = ('value', '_key')
+
+    def __init__(self, value):
+        super().__init__(value)
+        self._key = None
 
     @classmethod
     def from_nonstandard_string(cls, point_string):
@@ -79,6 +89,12 @@ class ISO8601Point(PointBase):
         """Add an Interval to self."""
         return ISO8601Point(self._iso_point_add(self.value, other.value))
 
+    def get_key(self):
+        """Return the integer key which orders this point."""
+        if self._key is None:
+            self._key = _point_key(self.value)
+        return self._key
+
     def __cmp__(self, other):
         # Compare other (point) to self.
         if other is None:
@@ -87,12 +103,46 @@ class ISO8601Point(PointBase):
             return cmp(self.TYPE_SORT_KEY, other.TYPE_SORT_KEY)
         if self.value == other.value:
             return 0
-        return self._iso_point_cmp(self.value, other.value)
+        key, other_key = self.get_key(), other.get_key()
+        return (key > other_key) - (key < other_key)
+
+    # Rich comparisons, with a fast path for other ISO8601Points.
+
+    def __lt__(self, other):
+        if isinstance(other, ISO8601Point):
+            return self.get_key() < other.get_key()
+        return self.__cmp__(other) == -1
+
+    def __le__(self, other):
+        if isinstance(other, ISO8601Point):
+            return self.get_key() <= other.get_key()
+        return self.__cmp__(other) <= 0
+
+    def __gt__(self, other):
+        if isinstance(other, ISO8601Point):
+            return self.get_key() > other.get_key()
+        return self.__cmp__(other) == 1
+
+    def __ge__(self, other):
+        if isinstance(other, ISO8601Point):
+            return self.get_key() >= other.get_key()
+        return self.__cmp__(other) >= 0
+
+    def __eq__(self, other):
+        if isinstance(other, ISO8601Point):
+            return (
+                self.value == other.value
+                or self.get_key() == other.get_key())
+        return self.__cmp__(other) == 0
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def standardise(self):
         """Reformat self.value into a standard representation."""
         try:
-            self.value = str(point_parse(self.value))
+            self.value = str(_point_parse(self.value))
+            self._key = None
         except IsodatetimeError as exc:
             if self.value.startswith("+") or self.value.startswith("-"):
                 message = WARNING_PARSE_EXPANDED_YEAR_DIGITS % (
@@ -113,27 +163,22 @@ class ISO8601Point(PointBase):
     def __hash__(self):
         return hash(self.value)
 
+    # Note: TimePoint arithmetic returns new objects, so the cached parsed
+    # points need not be copied.
+
     @staticmethod
     @lru_cache(10000)
     def _iso_point_add(point_string, interval_string):
         """Add the parsed point_string to the parsed interval_string."""
-        point = point_parse(point_string)
+        point = _point_parse(point_string)
         interval = interval_parse(interval_string)
         return str(point + interval)
 
-    @staticmethod
-    @lru_cache(10000)
-    def _iso_point_cmp(point_string, other_point_string):
-        """Compare the parsed point_string to the other one."""
-        point = point_parse(point_string)
-        other_point = point_parse(other_point_string)
-        return cmp(point, other_point)
-
     @staticmethod
     @lru_cache(10000)
     def _iso_point_sub_interval(point_string, interval_string):
         """Return the parsed point_string minus the parsed interval_string."""
-        point = point_parse(point_string)
+        point = _point_parse(point_string)
         interval = interval_parse(interval_string)
         return str(point - interval)
 
@@ -141,15 +186,11 @@ class ISO8601Point(PointBase):
     @lru_cache(10000)
     def _iso_point_sub_point(point_string, other_point_string):
         """Return the difference between the two parsed point strings."""
-        point = point_parse(point_string)
-        other_point = point_parse(other_point_string)
+        point = _point_parse(point_string)
+        other_point = _point_parse(other_point_string)
         return str(point - other_point)
 
 
-# TODO: replace __cmp__ infrastructure
-cmp_to_rich(ISO8601Point)
-
-
 class ISO8601Interval(IntervalBase):
 
     """The interval between points in an ISO8601 date time sequence."""
@@ -868,6 +909,8 @@ def init(num_expanded_year_digits=0, custom_dump_format=None, time_zone=None,
     SuiteSpecifics.abbrev_util = CylcTimeParser(
         None, None, SuiteSpecifics.iso8601_parsers
     )
+    # Keys depend on the calendar and assumed time zone.
+    _point_key.cache_clear()
 
 
 def get_dump_format():
@@ -922,6 +965,21 @@ def point_parse(point_string):
     return _point_parse(point_string).copy()
 
 
+@lru_cache(100000)
+def _point_key(point_string):
+    """Return an integer key which orders point strings.
+
+    The key is (year * 400 + day of year) * 86400 + second of day, in UTC.
+    This orders points like TimePoint comparison, for any calendar (as there
+    are fewer than 400 days in a year).
+
+    """
+    point = point_parse(point_string)
+    point.set_time_zone_to_utc()
+    year, day_of_year = point.get_ordinal_date()
+    return (year * 400 + day_of_year) * 86400 + point.get_second_of_day()
+
+
 @lru_cache(10000)
 def _point_parse(point_string):
     """Parse a point_string into a proper TimePoint object."""
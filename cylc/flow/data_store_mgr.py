@@ -53,6 +53,10 @@ changes in task state (itask.state.is_updated).
 
 Data elements include a "stamp" field, which is a timestamped ID for use
 in assessing changes in the data store, for comparisons of a store sync.
+Deltas carry a checksum of the stamps (or IDs for edges) of all elements of
+their type, which is order independent so that it can be kept up to date as
+deltas are applied; subscribers can verify their store against it with
+`verify_checksum`.
 
 Packaging methods are included for dissemination of protobuf messages.
 
@@ -134,6 +138,13 @@ DELTA_FIELDS = {DELTA_ADDED, DELTA_UPDATED, DELTA_PRUNED}
 # desirable in many cases, but there are exceptions.
 # The following is used to flag which fields require clearing before
 # merging from respective deltas messages.
+# Serialised field tags (field number, length-delimited wire type) of the
+# deltas of each type in an AllDeltas message.
+ALL_DELTAS_FIELD_TAGS = {
+    field.name: bytes([field.number << 3 | 2])
+    for field in AllDeltas.DESCRIPTOR.fields
+}
+
 CLEAR_FIELD_MAP = {
     EDGES: set(),
     FAMILIES: set(),
@@ -145,10 +156,73 @@ CLEAR_FIELD_MAP = {
 }
 
 
+def encode_varint(value):
+    """Return the protobuf (base 128 varint) encoding of an unsigned int."""
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append(value & 0x7f | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
 def generate_checksum(in_strings):
-    """Generate cross platform & python checksum from strings."""
+    """Generate cross platform & python checksum from strings.
+
+    The checksum is independent of the order of the strings (it is the sum
+    of their CRC-32s, modulo 2**32), so it can be updated as strings are
+    added and removed.
+
+    """
     # can't use hash(), it's not the same across 32-64bit or python invocations
-    return zlib.adler32(''.join(sorted(in_strings)).encode()) & 0xffffffff
+    return sum(zlib.crc32(string.encode()) for string in in_strings) & (
+        0xffffffff)
+
+
+def get_checksum_string(key, element):
+    """Return the string of a data-store element which is checksummed."""
+    if key == EDGES:
+        return element.id
+    return element.stamp
+
+
+def generate_elements_checksum(key, elements):
+    """Return the checksum of data-store elements of a type.
+
+    Args:
+        key (str):
+            Element type, e.g. TASK_PROXIES.
+        elements (iterable):
+            Data-store elements of that type.
+
+    """
+    return generate_checksum(
+        get_checksum_string(key, element) for element in elements)
+
+
+def verify_checksum(key, delta, data):
+    """Return True if data matches the checksum of delta (once applied).
+
+    For subscribers to check their copy of the data-store against the
+    publisher's. Deltas without a checksum (e.g. workflow deltas, empty
+    deltas) always match.
+
+    Args:
+        key (str):
+            Element type, e.g. TASK_PROXIES.
+        delta (object):
+            Delta of that type, e.g. TPDeltas.
+        data (dict):
+            Data-store of a workflow, as {key: {id: element}}.
+
+    """
+    if (
+        'checksum' not in delta.DESCRIPTOR.fields_by_name
+        or not delta.HasField('checksum')
+    ):
+        return True
+    return delta.checksum == generate_elements_checksum(
+        key, data[key].values())
 
 
 def task_mean_elapsed_time(tdef):
@@ -347,6 +421,14 @@ class DataStoreMgr:
         self.prune_trigger_nodes = {}
         self.prune_flagged_nodes = set()
         self.prune_pending = False
+        # {key: checksum of the data-store elements of type key}
+        self.checksums = {
+            key: 0
+            for key, delta_type in DELTAS_MAP.items()
+            if 'checksum' in delta_type.DESCRIPTOR.fields_by_name
+        }
+        # {topic: {statistic: value}}
+        self.publish_stats = {}
 
     def initiate_data_model(self, reloaded=False):
         """Initiate or Update data model on start/restart/reload.
@@ -358,7 +440,9 @@ class DataStoreMgr:
         """
         # Reset attributes/data-store on reload:
         if reloaded:
+            publish_stats = self.publish_stats
             self.__init__(self.schd)
+            self.publish_stats = publish_stats
 
         # Static elements
         self.generate_definition_elements()
@@ -982,7 +1066,6 @@ class DataStoreMgr:
         """
         if not updated_tasks:
             return
-        tasks = self.data[self.workflow_id][TASKS]
         task_proxies = self.data[self.workflow_id][TASK_PROXIES]
         update_time = time()
         task_defs = {}
@@ -1062,7 +1145,6 @@ class DataStoreMgr:
                 self.updated[TASKS].setdefault(
                     t_id,
                     PbTask(id=t_id)).MergeFrom(t_delta)
-                tasks[t_id].MergeFrom(t_delta)
 
     def update_family_proxies(self):
         """Update state & summary of flagged families and ancestors.
@@ -1232,13 +1314,11 @@ class DataStoreMgr:
             str, get_suite_status(self.schd))
 
         if self.schd.pool.pool:
-            pool_points = set(self.schd.pool.pool)
-            workflow.oldest_cycle_point = str(min(pool_points))
-            workflow.newest_cycle_point = str(max(pool_points))
+            workflow.oldest_cycle_point = str(self.schd.pool.get_min_point())
+            workflow.newest_cycle_point = str(self.schd.pool.get_max_point())
         if self.schd.pool.runahead_pool:
             workflow.newest_runahead_cycle_point = str(
-                max(set(self.schd.pool.runahead_pool))
-            )
+                self.schd.pool.get_max_point_runahead())
 
     # TODO: Make the other deltas/updates event driven like this one.
     def delta_broadcast(self):
@@ -1273,33 +1353,41 @@ class DataStoreMgr:
                     continue
                 self.deltas[key].updated.extend(elements.values())
 
-        # Apply deltas to local data-store
+        # Apply deltas to local data-store, and update the checksums
         data = self.data[self.workflow_id]
-        for key, delta in self.deltas.items():
-            if delta.ListFields():
-                delta.reloaded = reloaded
-                apply_delta(key, delta, data)
-
-        # Construct checksum on deltas for export
         update_time = time()
         for key, delta in self.deltas.items():
             if delta.ListFields():
+                delta.reloaded = reloaded
+                if key in self.checksums:
+                    self._apply_delta_checksummed(key, delta, data)
+                    delta.checksum = self.checksums[key]
+                else:
+                    apply_delta(key, delta, data)
                 delta.time = update_time
-                if hasattr(delta, 'checksum'):
-                    if key == EDGES:
-                        s_att = 'id'
-                    else:
-                        s_att = 'stamp'
-                    delta.checksum = generate_checksum(
-                        [getattr(e, s_att)
-                         for e in data[key].values()]
-                    )
 
         # Clear job pool changes after their application
         self.schd.job_pool.deltas.Clear()
         self.schd.job_pool.added.clear()
         self.schd.job_pool.updated.clear()
 
+    def _apply_delta_checksummed(self, key, delta, data):
+        """Apply a delta, updating the checksum of its element type.
+
+        Only the elements touched by the delta are (re)hashed.
+        """
+        elements = data[key]
+        ids = {element.id for element in delta.added}
+        ids.update(element.id for element in delta.updated)
+        ids.update(delta.pruned)
+        before = generate_elements_checksum(
+            key, (elements[id_] for id_ in ids if id_ in elements))
+        apply_delta(key, delta, data)
+        after = generate_elements_checksum(
+            key, (elements[id_] for id_ in ids if id_ in elements))
+        self.checksums[key] = (self.checksums[key] - before + after) & (
+            0xffffffff)
+
     def clear_deltas(self):
         """Clear current deltas."""
         for key in self.deltas:
@@ -1334,18 +1422,60 @@ class DataStoreMgr:
         return workflow_msg
 
     def get_publish_deltas(self):
-        """Return deltas for publishing."""
-        all_deltas = DELTAS_MAP[ALL_DELTAS]()
+        """Return serialised deltas for publishing.
+
+        Each delta is serialised once, the all-deltas message is assembled
+        from the same bytes (a serialised message is the concatenation of
+        its serialised fields), so nothing needs copying before the deltas
+        are cleared.
+
+        Returns:
+            list: [(topic, serialised delta, None), ...]
+
+        """
         result = []
+        all_parts = []
         for key, delta in self.deltas.items():
             if delta.ListFields():
-                result.append(
-                    (key.encode('utf-8'), delta, 'SerializeToString'))
-                getattr(all_deltas, key).CopyFrom(delta)
-        result.append(
-            (ALL_DELTAS.encode('utf-8'), all_deltas, 'SerializeToString')
-        )
-        return deepcopy(result)
+                start = time()
+                data = delta.SerializeToString()
+                self._record_publish(key, data, time() - start)
+                result.append((key.encode('utf-8'), data, None))
+                all_parts.append(ALL_DELTAS_FIELD_TAGS[key])
+                all_parts.append(encode_varint(len(data)))
+                all_parts.append(data)
+        start = time()
+        data = b''.join(all_parts)
+        self._record_publish(ALL_DELTAS, data, time() - start)
+        result.append((ALL_DELTAS.encode('utf-8'), data, None))
+        return result
+
+    def _record_publish(self, topic, data, serialise_time):
+        """Record the size and serialisation time of a published delta."""
+        try:
+            stats = self.publish_stats[topic]
+        except KeyError:
+            stats = self.publish_stats[topic] = {
+                'deltas': 0,
+                'bytes': 0,
+                'max bytes': 0,
+                'serialise time': 0.0,
+            }
+        stats['deltas'] += 1
+        stats['bytes'] += len(data)
+        stats['max bytes'] = max(stats['max bytes'], len(data))
+        stats['serialise time'] += serialise_time
+
+    def log_publish_stats(self, log=LOG):
+        """Log the size and serialisation time of published deltas."""
+        if not self.publish_stats:
+            return
+        log.info('Published deltas:\n* ' + '\n* '.join(
+            f"{topic}: {stats['deltas']} deltas, {stats['bytes']} bytes"
+            f" (max {stats['max bytes']}),"
+            f" serialised in {stats['serialise time']:.3f}s"
+            for topic, stats in sorted(self.publish_stats.items())
+        ))
 
     def get_data_elements(self, element_type):
         """Get elements of a given type in the form of a delta.
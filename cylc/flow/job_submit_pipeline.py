@@ -0,0 +1,344 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Write job files and dispatch job submission commands.
+
+This module provides logic to:
+* Write task job files in a pool of worker threads (job file writing is
+  dominated by file I/O and the ``bash -n`` syntax check subprocess, neither
+  of which holds the GIL).
+* Queue jobs for submission per platform, and dispatch them to the process
+  pool as ``cylc jobs-submit`` commands subject to per-platform concurrency
+  and rate limits.
+* Size each batch of jobs according to the observed per-job submission time
+  on the platform, so that slow job runners get more, smaller commands
+  (which report back sooner) and fast ones fewer, larger commands.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+from cylc.flow import LOG
+from cylc.flow.subprocctx import SubProcContext
+from cylc.flow.subprocpool import SubProcPool
+
+
+class PlatformSubmitQueue:
+    """Jobs waiting for submission to a platform, and its statistics.
+
+    Args:
+        name (str):
+            Platform name.
+        concurrency (int):
+            Max number of concurrent job submission commands (0 for no
+            limit other than the process pool size).
+        rate (float):
+            Max number of jobs submitted per second (0 for no limit).
+        batch_size (int):
+            Initial number of jobs per job submission command.
+
+    """
+
+    __slots__ = (
+        'name', 'concurrency', 'rate', 'groups', 'n_queued', 'n_running',
+        'next_time', 'batch_size', 'job_time', 'stats')
+
+    def __init__(self, name, concurrency, rate, batch_size):
+        self.name = name
+        self.concurrency = concurrency
+        self.rate = rate
+        # [(cmd, callback, callback_args, deque(job, ...)), ...]
+        self.groups = deque()
+        self.n_queued = 0
+        self.n_running = 0
+        # time after which the rate limit allows the next command
+        self.next_time = 0.0
+        self.batch_size = batch_size
+        # moving average of submission time per job (seconds)
+        self.job_time = None
+        self.stats = {
+            'jobs': 0,
+            'commands': 0,
+            'failed commands': 0,
+            'max queued': 0,
+            'total command time': 0.0,
+            'max command time': 0.0,
+        }
+
+    def is_ready(self, now):
+        """Return True if a command can be dispatched now."""
+        return bool(
+            self.groups
+            and (not self.concurrency or self.n_running < self.concurrency)
+            and now >= self.next_time
+        )
+
+
+class JobSubmitPipeline:
+    """Write job files and dispatch job submission commands.
+
+    Args:
+        proc_pool (cylc.flow.subprocpool.SubProcPool):
+            Process pool to run job submission commands.
+        job_file_writer (cylc.flow.job_file.JobFileWriter):
+            Job file writer.
+        n_writers (int):
+            Number of job file writer threads (job files are written in the
+            calling thread if <= 1).
+
+    """
+
+    # Max jobs per "cylc jobs-submit" command, to prevent overloading of the
+    # command's STDOUT and STDERR pipes.
+    MAX_BATCH_SIZE = 100
+    MIN_BATCH_SIZE = 10
+    # Target duration (seconds) of a job submission command, batch sizes are
+    # adapted to the observed per-job submission time to meet it.
+    TARGET_COMMAND_TIME = 10.0
+    # Weight of the latest observation in the per-job time moving average.
+    JOB_TIME_WEIGHT = 0.3
+
+    def __init__(self, proc_pool, job_file_writer, n_writers=4):
+        self.proc_pool = proc_pool
+        self.job_file_writer = job_file_writer
+        self.n_writers = n_writers
+        self.executor = None
+        # {platform name: PlatformSubmitQueue}
+        self.queues = {}
+        # commands may exit (and call back) as soon as they are dispatched
+        self._dispatching = False
+        self.write_stats = {
+            'job files': 0,
+            'failed job files': 0,
+            'write time': 0.0,
+        }
+
+    def write_job_files(self, job_files, check_syntax=True):
+        """Write job files, return a list of exceptions (None on success).
+
+        Args:
+            job_files (list):
+                [(local_job_file_path, job_conf), ...]
+            check_syntax (bool):
+                Check the syntax of each job file.
+
+        """
+        start = time()
+
+        def _write(job_file):
+            try:
+                self.job_file_writer.write(
+                    *job_file, check_syntax=check_syntax)
+            except Exception as exc:
+                # Could be a bad command template, IOError, etc
+                return exc
+            return None
+
+        if self.n_writers > 1 and len(job_files) > 1:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.n_writers,
+                    thread_name_prefix='job-file-writer')
+            results = list(self.executor.map(_write, job_files))
+        else:
+            results = [_write(job_file) for job_file in job_files]
+        self.write_stats['job files'] += len(job_files)
+        self.write_stats['failed job files'] += sum(
+            1 for exc in results if exc is not None)
+        self.write_stats['write time'] += time() - start
+        return results
+
+    def put(self, platform, cmd, jobs, callback, callback_args):
+        """Queue jobs for submission to a platform.
+
+        Args:
+            platform (dict):
+                Platform to submit to.
+            cmd (list):
+                The job submission command, job log directories are appended.
+            jobs (list):
+                [(job_log_dir, stdin_file, item), ...]
+                where stdin_file may be None, and item is passed back to
+                the callback.
+            callback (callable):
+                Called when a job submission command exits, as
+                ``callback(ctx, *callback_args, items)``.
+            callback_args (list):
+                Arguments to the callback.
+
+        """
+        if not jobs:
+            return
+        concurrency = platform['job submission concurrency limit']
+        rate = platform['job submission rate limit']
+        try:
+            queue = self.queues[platform['name']]
+        except KeyError:
+            queue = self.queues[platform['name']] = PlatformSubmitQueue(
+                platform['name'], concurrency, rate, self.MAX_BATCH_SIZE)
+        else:
+            # the limits may have changed on reload
+            queue.concurrency = concurrency
+            queue.rate = rate
+        queue.groups.append((cmd, callback, callback_args, deque(jobs)))
+        queue.n_queued += len(jobs)
+        queue.stats['max queued'] = max(
+            queue.stats['max queued'], queue.n_queued)
+        self._dispatch(queue)
+
+    def process(self):
+        """Dispatch queued jobs which are no longer throttled."""
+        for queue in self.queues.values():
+            self._dispatch(queue)
+
+    def is_not_done(self):
+        """Return True if any jobs are waiting to be dispatched."""
+        return any(queue.n_queued for queue in self.queues.values())
+
+    def _dispatch(self, queue):
+        """Dispatch queued jobs of a platform as far as the limits allow.
+
+        When the process pool is stopping, everything is dispatched (the
+        process pool then reports the submissions as failed).
+        """
+        if self._dispatching:
+            return
+        self._dispatching = True
+        try:
+            self._dispatch_impl(queue)
+        finally:
+            self._dispatching = False
+
+    def _dispatch_impl(self, queue):
+        """Helper for self._dispatch."""
+        stopping = self.proc_pool.closed or self.proc_pool._is_stopping()
+        now = time()
+        while queue.groups and (stopping or queue.is_ready(now)):
+            cmd, callback, callback_args, jobs = queue.groups[0]
+            batch = [
+                jobs.popleft()
+                for _ in range(min(queue.batch_size, len(jobs)))]
+            if not jobs:
+                queue.groups.popleft()
+            queue.n_queued -= len(batch)
+            queue.n_running += 1
+            if queue.rate:
+                queue.next_time = (
+                    max(now, queue.next_time) + len(batch) / queue.rate)
+            job_log_dirs = [job_log_dir for job_log_dir, _, _ in batch]
+            stdin_files = [
+                stdin_file
+                for _, stdin_file, _ in batch
+                if stdin_file is not None]
+            LOG.debug(
+                '%s ... # will invoke batch of %d (%d queued)',
+                cmd, len(batch), queue.n_queued)
+            self.proc_pool.put_command(
+                SubProcContext(
+                    SubProcPool.JOBS_SUBMIT,
+                    cmd + job_log_dirs,
+                    stdin_files=stdin_files,
+                    job_log_dirs=job_log_dirs,
+                ),
+                self._submit_callback,
+                [
+                    queue, len(batch), callback, callback_args,
+                    [item for _, _, item in batch]
+                ])
+
+    def _submit_callback(
+        self, ctx, queue, n_jobs, callback, callback_args, items
+    ):
+        """Record statistics, adapt the batch size, call the callback."""
+        queue.n_running -= 1
+        stats = queue.stats
+        stats['jobs'] += n_jobs
+        stats['commands'] += 1
+        if ctx.ret_code:
+            stats['failed commands'] += 1
+        time_start = getattr(ctx, 'time_start', None)
+        if time_start is not None:
+            # the command ran (else it was not run as the suite is stopping)
+            cmd_time = time() - time_start
+            stats['total command time'] += cmd_time
+            stats['max command time'] = max(
+                stats['max command time'], cmd_time)
+            if not ctx.ret_code:
+                self._adapt_batch_size(queue, cmd_time / n_jobs)
+        try:
+            callback(ctx, *callback_args, items)
+        finally:
+            self._dispatch(queue)
+
+    def _adapt_batch_size(self, queue, job_time):
+        """Update the per-job time average and batch size of a platform."""
+        if queue.job_time is None:
+            queue.job_time = job_time
+        else:
+            queue.job_time += self.JOB_TIME_WEIGHT * (
+                job_time - queue.job_time)
+        if queue.job_time > 0:
+            batch_size = int(self.TARGET_COMMAND_TIME / queue.job_time)
+        else:
+            batch_size = self.MAX_BATCH_SIZE
+        queue.batch_size = min(
+            max(batch_size, self.MIN_BATCH_SIZE), self.MAX_BATCH_SIZE)
+
+    def get_stats(self):
+        """Return job file writing and per-platform submission statistics."""
+        return {
+            'job files': dict(self.write_stats),
+            'platforms': {
+                name: {
+                    **queue.stats,
+                    'queued': queue.n_queued,
+                    'running': queue.n_running,
+                    'batch size': queue.batch_size,
+                    'job time': queue.job_time,
+                }
+                for name, queue in self.queues.items()
+            },
+        }
+
+    def log_stats(self, log=LOG):
+        """Log job file writing and per-platform submission statistics."""
+        stats = self.get_stats()
+        write_stats = stats['job files']
+        if not write_stats['job files'] and not stats['platforms']:
+            return
+        lines = [
+            f"job files: {write_stats['job files']} written"
+            f" ({write_stats['failed job files']} failed)"
+            f" in {write_stats['write time']:.3f}s"]
+        for name, pstats in sorted(stats['platforms'].items()):
+            mean = (
+                pstats['total command time'] / pstats['commands']
+                if pstats['commands'] else 0.0)
+            lines.append(
+                f"platform {name}: {pstats['jobs']} jobs"
+                f" in {pstats['commands']} commands"
+                f" ({pstats['failed commands']} failed);"
+                f" command time mean {mean:.3f}s"
+                f" max {pstats['max command time']:.3f}s;"
+                f" batch size {pstats['batch size']};"
+                f" max queued {pstats['max queued']}")
+        log.info('Job submission:\n* ' + '\n* '.join(lines))
+
+    def close(self):
+        """Shut down the job file writer threads."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,177 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Wake the scheduler main loop when there is work to do.
+
+In the default (polling) mode the main loop sleeps for a fixed interval
+between iterations. In the event-driven mode the main loop waits on an
+asyncio event which is set as soon as work arrives (a task message, a
+command, an external trigger, a subprocess exit), falling back to a timer
+tick for time-based checks (retry delays, clock triggers, timeouts, etc).
+
+Wake counts and wake-to-process latencies are recorded per stage in both
+modes so the two can be compared.
+"""
+
+import asyncio
+from collections import deque
+from queue import Queue
+from threading import Lock
+from time import time
+
+
+class MainLoopEvents:
+    """Record pending work for main loop stages and wake the main loop.
+
+    The ``wake`` method is thread safe, it is called by the network server
+    thread(s) when commands and messages are queued.
+
+    Args:
+        event_driven (bool):
+            If True the main loop waits for work rather than sleeping.
+        interval (float):
+            Timer tick, the interval in seconds between time-based checks.
+
+    """
+
+    COMMANDS = 'commands'
+    EXT_TRIGGERS = 'external triggers'
+    MESSAGES = 'messages'
+    PROC_POOL = 'process pool'
+    TIMERS = 'timers'
+    STAGES = (COMMANDS, EXT_TRIGGERS, MESSAGES, PROC_POOL, TIMERS)
+
+    # Max number of latencies to keep per stage.
+    MAX_LATENCIES = 1000
+    # Interval in seconds between checks for exited subprocesses.
+    INTERVAL_PROC_POLL = 0.1
+
+    def __init__(self, event_driven=False, interval=1.0):
+        self.event_driven = event_driven
+        self.interval = interval
+        self.lock = Lock()
+        # {stage: time of the first wake not yet processed}
+        self.pending = {}
+        self.wake_counts = dict.fromkeys(self.STAGES, 0)
+        self.latencies = {
+            stage: deque(maxlen=self.MAX_LATENCIES) for stage in self.STAGES}
+        self.next_tick = 0
+        self._loop = None
+        self._event = None
+
+    def start(self):
+        """Bind to the running event loop."""
+        self._loop = asyncio.get_event_loop()
+        self._event = asyncio.Event()
+
+    def wake(self, stage):
+        """Register pending work for stage and wake the main loop."""
+        with self.lock:
+            self.pending.setdefault(stage, time())
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    def take(self):
+        """Return the set of stages with pending work.
+
+        Pending work is cleared and its wake-to-process latency recorded.
+        """
+        now = time()
+        with self.lock:
+            if now >= self.next_tick:
+                self.pending.setdefault(self.TIMERS, self.next_tick or now)
+                self.next_tick = now + self.interval
+            pending, self.pending = self.pending, {}
+        for stage, then in pending.items():
+            self.wake_counts[stage] += 1
+            self.latencies[stage].append(now - then)
+        return set(pending)
+
+    async def wait(self, proc_pool):
+        """Wait until there is work to do, or until the next timer tick.
+
+        Args:
+            proc_pool (cylc.flow.subprocpool.SubProcPool):
+                Subprocesses in this pool are checked for exits whilst
+                waiting.
+
+        """
+        if self._event is None:
+            self.start()
+        while True:
+            if self._event.is_set() or time() >= self.next_tick:
+                break
+            if proc_pool.is_ready():
+                self.wake(self.PROC_POOL)
+                break
+            timeout = self.next_tick - time()
+            if proc_pool.runnings:
+                timeout = min(timeout, self.INTERVAL_PROC_POLL)
+            try:
+                await asyncio.wait_for(
+                    self._event.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+        self._event.clear()
+
+    def get_stats(self):
+        """Return wake counts and latencies (seconds) for each stage."""
+        stats = {}
+        for stage in self.STAGES:
+            latencies = sorted(self.latencies[stage])
+            stats[stage] = {
+                'wakes': self.wake_counts[stage],
+                'latency_mean': (
+                    sum(latencies) / len(latencies) if latencies else None),
+                'latency_max': latencies[-1] if latencies else None,
+            }
+        return stats
+
+    def log_stats(self, log):
+        """Write a summary of the stage stats to log."""
+        lines = []
+        for stage, stat in self.get_stats().items():
+            if stat['latency_mean'] is None:
+                continue
+            lines.append(
+                f"* {stage}: wakes={stat['wakes']}"
+                f" latency mean={stat['latency_mean']:.3f}s"
+                f" max={stat['latency_max']:.3f}s")
+        if lines:
+            log.info(
+                'Main loop ('
+                + ('event driven' if self.event_driven else 'polling')
+                + ') stages:\n' + '\n'.join(lines))
+
+
+class WakeQueue(Queue):
+    """A queue which wakes the main loop when an item is put into it.
+
+    Args:
+        events (MainLoopEvents):
+            Main loop events to wake.
+        stage (str):
+            The stage which processes this queue.
+
+    """
+
+    def __init__(self, events, stage):
+        super().__init__()
+        self.events = events
+        self.stage = stage
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self.events.wake(self.stage)
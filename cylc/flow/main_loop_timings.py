@@ -0,0 +1,166 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Time each stage of the scheduler main loop.
+
+The time spent in each stage is accumulated over a main loop iteration and
+recorded, at the end of the iteration, in a rolling window of the most recent
+iterations. Recording costs a couple of clock reads and list appends per
+stage, so this is always on; summaries (percentiles, histograms) are only
+computed when asked for, e.g. by ``cylc profile``.
+"""
+
+from bisect import bisect_left
+from collections import deque
+from time import time
+
+
+class RollingHistogram:
+    """A histogram of the most recent durations.
+
+    Args:
+        size (int):
+            The number of durations to keep.
+
+    """
+
+    # Upper bounds (seconds) of the histogram buckets, the last is unbounded.
+    BOUNDS = (
+        0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0)
+
+    __slots__ = ('values', 'counts', 'n_total', 'sum_total', 'max_total')
+
+    def __init__(self, size=1000):
+        self.values = deque(maxlen=size)
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        # over all time (not just the window)
+        self.n_total = 0
+        self.sum_total = 0.0
+        self.max_total = 0.0
+
+    def add(self, value):
+        """Record a duration (seconds)."""
+        values = self.values
+        if len(values) == values.maxlen:
+            self.counts[bisect_left(self.BOUNDS, values[0])] -= 1
+        values.append(value)
+        self.counts[bisect_left(self.BOUNDS, value)] += 1
+        self.n_total += 1
+        self.sum_total += value
+        if value > self.max_total:
+            self.max_total = value
+
+    def percentile(self, pct, values=None):
+        """Return the pct percentile of the window, or None if empty."""
+        if values is None:
+            values = sorted(self.values)
+        if not values:
+            return None
+        return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+    def get_summary(self):
+        """Return a dict summarising the window (and all time totals)."""
+        values = sorted(self.values)
+        return {
+            'count': self.n_total,
+            'total': self.sum_total,
+            'max': self.max_total,
+            'window': len(values),
+            'mean': sum(values) / len(values) if values else None,
+            'p50': self.percentile(50, values),
+            'p99': self.percentile(99, values),
+            'histogram': [
+                [bound, count]
+                for bound, count in zip(self.BOUNDS + (None,), self.counts)
+                if count
+            ],
+        }
+
+
+class MainLoopTimings:
+    """Time the stages of the scheduler main loop.
+
+    Usage, for each main loop iteration::
+
+        tick = timings.start()
+        do_something()
+        tick = timings.record(timings.SOMETHING, tick)
+        ...
+        timings.end(tick)
+
+    Args:
+        size (int):
+            The number of iterations to keep for each stage.
+
+    """
+
+    RELOAD = 'reload'
+    COMMANDS = 'commands'
+    RELEASE_TASKS = 'release tasks'
+    PROC_POOL = 'process pool'
+    TASK_POOL = 'task pool'
+    MESSAGES = 'task messages'
+    TASK_EVENTS = 'task events'
+    DATA_STORE = 'data store'
+    DATABASE = 'database'
+    CHECKS = 'checks'
+    PLUGINS = 'plugins'
+    SLEEP = 'sleep'
+    # The whole iteration, excluding sleep.
+    BUSY = 'busy'
+    STAGES = (
+        RELOAD, COMMANDS, RELEASE_TASKS, PROC_POOL, TASK_POOL, MESSAGES,
+        TASK_EVENTS, DATA_STORE, DATABASE, CHECKS, PLUGINS, SLEEP, BUSY)
+
+    def __init__(self, size=1000):
+        self.histograms = {
+            stage: RollingHistogram(size) for stage in self.STAGES}
+        self.n_loops = 0
+        # {stage: time spent in this iteration}
+        self._current = {}
+        self._tinit = None
+
+    def start(self):
+        """Start timing an iteration, return the time."""
+        self._current.clear()
+        self._tinit = time()
+        return self._tinit
+
+    def record(self, stage, tick):
+        """Add the time since tick to stage, return the time."""
+        now = time()
+        self._current[stage] = self._current.get(stage, 0.0) + now - tick
+        return now
+
+    def end(self, tick):
+        """Finish timing an iteration.
+
+        The time since tick is counted as sleep.
+        """
+        now = time()
+        current = self._current
+        current[self.SLEEP] = current.get(self.SLEEP, 0.0) + now - tick
+        current[self.BUSY] = now - self._tinit - current[self.SLEEP]
+        for stage, duration in current.items():
+            self.histograms[stage].add(duration)
+        self.n_loops += 1
+
+    def get_stats(self):
+        """Return {stage: summary} for stages which have been timed."""
+        return {
+            stage: histogram.get_summary()
+            for stage, histogram in self.histograms.items()
+            if histogram.n_total
+        }
@@ -85,8 +85,9 @@ class WorkflowPublisher(ZMQSocketBase):
             # don't attempt to send anything if we are in the process of
             # shutting down
             self.topics.add(topic)
+            # (large messages are sent from the data without copying it)
             self.socket.send_multipart(
-                [topic, serialize_data(data, serializer)]
+                [topic, serialize_data(data, serializer)], copy=False
             )
 
     async def publish(self, items):
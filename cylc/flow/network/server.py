@@ -15,10 +15,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Server for suite runtime API."""
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import getpass  # noqa: F401
 from queue import Queue
+import re
 from textwrap import dedent
-from time import sleep
+from threading import Lock
+from time import time
 
 from graphql.execution.executors.asyncio import AsyncioExecutor
 import zmq
@@ -33,6 +37,7 @@ from cylc.flow.network.resolvers import Resolvers
 from cylc.flow.network.schema import schema
 from cylc.flow.data_store_mgr import DELTAS_MAP
 from cylc.flow.data_messages_pb2 import PbEntireWorkflow
+from cylc.flow.main_loop_timings import RollingHistogram
 
 # maps server methods to the protobuf message (for client/UIS import)
 PB_METHOD_MAP = {
@@ -41,6 +46,17 @@ PB_METHOD_MAP = {
 }
 
 
+# GraphQL mutations which are cheap to serve and which should not be held up
+# behind expensive requests (task job messages and pings), these only match
+# the workflow ID and put items on the scheduler's queues so are safe to serve
+# while the main loop is running
+PRIORITY_MUTATIONS = {'message', 'ping'}
+
+# matches the first field of a GraphQL mutation
+MUTATION_FIELD_REGEX = re.compile(
+    r'\A\s*mutation\b[^{]*\{\s*(?:\w+\s*:\s*)?(\w+)')
+
+
 def expose(func=None):
     """Expose a method on the sever."""
     func.exposed = True
@@ -66,6 +82,88 @@ def filter_none(dictionary):
     }
 
 
+def get_request_label(message):
+    """Return the label of a request for metrics and lane selection.
+
+    This is the command (endpoint) name, qualified by the mutation name
+    for GraphQL mutations.
+
+    Examples:
+        >>> get_request_label({'command': 'pb_entire_workflow'})
+        'pb_entire_workflow'
+        >>> get_request_label({
+        ...     'command': 'graphql',
+        ...     'args': {'request_string': 'mutation ($x: [ID]!) {ping(...'}
+        ... })
+        'graphql:ping'
+        >>> get_request_label({
+        ...     'command': 'graphql',
+        ...     'args': {'request_string': 'query { workflows { id } }'}
+        ... })
+        'graphql'
+
+    """
+    command = message.get('command')
+    if command == 'graphql':
+        try:
+            match = MUTATION_FIELD_REGEX.match(
+                message['args']['request_string'])
+        except (KeyError, TypeError):
+            match = None
+        if match:
+            return f'{command}:{match.group(1)}'
+    return str(command)
+
+
+class RequestLane:
+    """A queue of requests served by a pool of worker threads.
+
+    Args:
+        name (str):
+            Lane name.
+        n_workers (int):
+            Number of worker threads.
+        locked (bool):
+            If True requests are served holding the scheduler's
+            ``state_lock`` so they do not run while the main loop is
+            changing the task pool, data-store etc.
+
+    """
+
+    __slots__ = ('name', 'n_workers', 'locked', 'executor', 'queued',
+                 'max_queued', 'wait')
+
+    def __init__(self, name, n_workers, locked=True):
+        self.name = name
+        self.n_workers = n_workers
+        self.locked = locked
+        self.executor = None
+        # requests waiting for a worker
+        self.queued = 0
+        self.max_queued = 0
+        # time requests spend waiting for a worker
+        self.wait = RollingHistogram()
+
+    def start(self):
+        """Start the worker threads."""
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.n_workers,
+            thread_name_prefix=f'server-{self.name}',
+            initializer=_init_worker
+        )
+
+    def stop(self):
+        """Stop the worker threads once they have finished."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def _init_worker():
+    """Give server worker threads an event loop for GraphQL execution."""
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+
 class SuiteRuntimeServer(ZMQSocketBase):
     """Suite runtime service API facade exposed via zmq.
 
@@ -115,7 +213,7 @@ class SuiteRuntimeServer(ZMQSocketBase):
 
     RECV_TIMEOUT = 1
     """Max time the SuiteRuntimeServer will wait for an incoming
-    message in seconds.
+    message (or reply) in seconds.
 
     We use a timeout here so as to give the _listener a chance to respond to
     requests (i.e. stop) from its spawner (the scheduler).
@@ -125,15 +223,48 @@ class SuiteRuntimeServer(ZMQSocketBase):
 
     """
 
+    N_WORKERS = 4
+    """Number of threads serving requests.
+
+    Requests are decoded and encoded concurrently but are resolved one at a
+    time holding the scheduler's ``state_lock`` (so that resolvers and
+    mutations are serialised with the main loop).
+
+    """
+
+    N_PRIORITY_WORKERS = 1
+    """Number of additional threads reserved for cheap requests.
+
+    Task job messages and pings (see PRIORITY_MUTATIONS) are served by these
+    threads so they are not held up behind expensive requests, e.g. large
+    GraphQL queries. These requests only put items on the scheduler's
+    (thread safe) queues so are served without the ``state_lock``.
+
+    """
+
     def __init__(self, schd, context=None, barrier=None,
                  threaded=True, daemon=False):
-        super().__init__(zmq.REP, bind=True, context=context,
+        super().__init__(zmq.ROUTER, bind=True, context=context,
                          barrier=barrier, threaded=threaded, daemon=daemon)
         self.schd = schd
         self.suite = schd.suite
         self.public_priv = None  # update in get_public_priv()
         self.endpoints = None
         self.queue = None
+        self.lanes = {
+            'main': RequestLane('main', self.N_WORKERS),
+            'priority': RequestLane(
+                'priority', self.N_PRIORITY_WORKERS, locked=False),
+        }
+        # {request label: RollingHistogram of the time to serve requests}
+        self.request_times = {}
+        # guards the lane and request statistics
+        self.stats_lock = Lock()
+        # worker threads pass replies to the listener via an inproc socket
+        # (as ZMQ sockets aren't thread safe)
+        self.reply_sender = None
+        self.reply_receiver = None
+        self.reply_lock = Lock()
         self.resolvers = Resolvers(
             self.schd.data_store_mgr,
             schd=self.schd
@@ -142,15 +273,6 @@ class SuiteRuntimeServer(ZMQSocketBase):
             IgnoreFieldMiddleware,
         ]
 
-    def _socket_options(self):
-        """Set socket options.
-
-        Overwrites Base method.
-
-        """
-        # create socket
-        self.socket.RCVTIMEO = int(self.RECV_TIMEOUT) * 1000
-
     def _bespoke_start(self):
         """Setup start items, and run listener.
 
@@ -160,7 +282,21 @@ class SuiteRuntimeServer(ZMQSocketBase):
         # start accepting requests
         self.queue = Queue()
         self.register_endpoints()
-        self._listener()
+        address = f'inproc://server-replies-{id(self)}'
+        self.reply_receiver = self.context.socket(zmq.PULL)
+        self.reply_receiver.bind(address)
+        self.reply_sender = self.context.socket(zmq.PUSH)
+        self.reply_sender.connect(address)
+        for lane in self.lanes.values():
+            lane.start()
+        try:
+            self._listener()
+        finally:
+            for lane in self.lanes.values():
+                lane.stop()
+            with self.reply_lock:
+                self.reply_sender.close(linger=0)
+            self.reply_receiver.close(linger=0)
 
     def _bespoke_stop(self):
         """Stop the listener and Authenticator.
@@ -174,7 +310,14 @@ class SuiteRuntimeServer(ZMQSocketBase):
             self.queue.put('STOP')
 
     def _listener(self):
-        """The server main loop, listen for and serve requests."""
+        """The server main loop, listen for requests and send replies.
+
+        Requests are served by worker threads, see ``_serve``.
+
+        """
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        poller.register(self.reply_receiver, zmq.POLLIN)
         while True:
             # process any commands passed to the listener by its parent process
             if self.queue.qsize():
@@ -184,40 +327,145 @@ class SuiteRuntimeServer(ZMQSocketBase):
                 raise ValueError('Unknown command "%s"' % command)
 
             try:
-                # wait RECV_TIMEOUT for a message
-                msg = self.socket.recv_string()
-            except zmq.error.Again:
-                # timeout, continue with the loop, this allows the listener
+                # wait RECV_TIMEOUT for a message, this allows the listener
                 # thread to stop
-                continue
+                events = dict(poller.poll(int(self.RECV_TIMEOUT * 1000)))
+                if self.reply_receiver in events:
+                    self._send_replies()
+                if self.socket in events:
+                    self._receive_requests()
             except zmq.error.ZMQError as exc:
                 LOG.exception('unexpected error: %s', exc)
-                continue
 
-            # attempt to decode the message, authenticating the user in the
-            # process
+            # Note: we are using CurveZMQ to secure the messages (see
+            # self.curve_auth, self.socket.curve_...key etc.). We have set up
+            # public-key cryptography on the ZMQ messaging and sockets, so
+            # there is no need to encrypt messages ourselves before sending.
+
+    def _send_replies(self):
+        """Send the replies the worker threads have passed back."""
+        while True:
+            try:
+                frames = self.reply_receiver.recv_multipart(zmq.NOBLOCK)
+            except zmq.error.Again:
+                return
+            self.socket.send_multipart(frames, copy=False)
+
+    def _receive_requests(self):
+        """Pass received requests to the worker threads."""
+        while True:
             try:
-                message = decode_(msg)
+                frames = self.socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.error.Again:
+                return
+            received = time()
+            try:
+                # [client identity, empty delimiter, message]
+                identity, _, msg = frames
+                # attempt to decode the message, authenticating the user in
+                # the process
+                message = decode_(msg.decode())
             except Exception as exc:  # purposefully catch generic exception
                 # failed to decode message, possibly resulting from failed
                 # authentication
                 LOG.exception('failed to decode message: "%s"', exc)
+                continue
+            label = get_request_label(message)
+            if label.split(':', 1)[-1] in PRIORITY_MUTATIONS:
+                lane = self.lanes['priority']
+            else:
+                lane = self.lanes['main']
+            with self.stats_lock:
+                lane.queued += 1
+                lane.max_queued = max(lane.max_queued, lane.queued)
+            lane.executor.submit(
+                self._serve, lane, label, identity, message, received)
+
+    def _serve(self, lane, label, identity, message, received):
+        """Serve a request and pass the reply back to the listener.
+
+        Called in a worker thread.
+
+        """
+        started = time()
+        with self.stats_lock:
+            lane.queued -= 1
+            lane.wait.add(started - received)
+        try:
+            if lane.locked:
+                with self.schd.state_lock:
+                    res = self._receiver(message)
             else:
-                # success case - serve the request
                 res = self._receiver(message)
-                if message['command'] in PB_METHOD_MAP:
-                    response = res['data']
-                else:
-                    response = encode_(res).encode()
+            if message['command'] in PB_METHOD_MAP and 'data' in res:
+                response = res['data']
+            else:
+                response = encode_(res).encode()
+        except Exception as exc:  # purposefully catch generic exception
+            # e.g. the response cannot be serialised
+            LOG.exception(exc)
+            response = encode_({'error': {'message': str(exc)}}).encode()
+        with self.stats_lock:
+            try:
+                self.request_times[label].add(time() - received)
+            except KeyError:
+                self.request_times[label] = RollingHistogram()
+                self.request_times[label].add(time() - received)
+        with self.reply_lock:
+            if not self.reply_sender.closed:
                 # send back the string to bytes response
-                self.socket.send(response)
+                self.reply_sender.send_multipart(
+                    [identity, b'', response], copy=False)
 
-            # Note: we are using CurveZMQ to secure the messages (see
-            # self.curve_auth, self.socket.curve_...key etc.). We have set up
-            # public-key cryptography on the ZMQ messaging and sockets, so
-            # there is no need to encrypt messages ourselves before sending.
+    def get_stats(self):
+        """Return request handling statistics.
+
+        Returns:
+            dict: {
+                'lanes': {lane: {'queued', 'max queued', 'workers', 'wait'}},
+                'requests': {request label: summary}
+            }
 
-            sleep(0)  # yield control to other threads
+            Where the wait times and summaries are as returned by
+            ``RollingHistogram.get_summary``.
+
+        """
+        with self.stats_lock:
+            return {
+                'lanes': {
+                    name: {
+                        'queued': lane.queued,
+                        'max queued': lane.max_queued,
+                        'workers': lane.n_workers,
+                        'wait': lane.wait.get_summary(),
+                    }
+                    for name, lane in self.lanes.items()
+                },
+                'requests': {
+                    label: histogram.get_summary()
+                    for label, histogram in sorted(
+                        self.request_times.items())
+                },
+            }
+
+    def log_stats(self, log=LOG):
+        """Log request handling statistics."""
+        stats = self.get_stats()
+        if not stats['requests']:
+            return
+        lines = []
+        for name, lane in stats['lanes'].items():
+            wait = lane['wait']
+            lines.append(
+                f"{name} lane: {lane['workers']} workers;"
+                f" max queued {lane['max queued']};"
+                f" wait max {wait['max']:.3f}s")
+        for label, summary in stats['requests'].items():
+            lines.append(
+                f"{label}: {summary['count']} requests;"
+                f" mean {summary['total'] / summary['count']:.3f}s"
+                f" max {summary['max']:.3f}s")
+        log.info('Requests:\n* ' + '\n* '.join(lines))
 
     def _receiver(self, message):
         """Wrap incoming messages and dispatch them to exposed methods.
@@ -399,6 +647,70 @@ class SuiteRuntimeServer(ZMQSocketBase):
             group_all=group_all,
             ungroup_all=ungroup_all)
 
+    @authorise()
+    @expose
+    def get_main_loop_profile(self):
+        """Return timings of the stages of the scheduler main loop.
+
+        Timings are kept for a rolling window of recent main loop
+        iterations.
+
+        Returns:
+            dict: {stage: summary}
+
+            stage (str):
+                Main loop stage, e.g. "task pool", or "busy" for the whole
+                iteration excluding sleep.
+            summary (dict):
+                count (int):
+                    Number of iterations timed (all time).
+                total (float):
+                    Total time in seconds (all time).
+                max (float):
+                    Maximum time in seconds (all time).
+                window (int):
+                    Number of iterations in the window.
+                mean, p50, p99 (float):
+                    Mean and percentiles (seconds) over the window.
+                histogram (list):
+                    [[upper bound (seconds, None if unbounded), count], ...]
+                    over the window, for non-empty buckets.
+
+        """
+        return self.schd.main_loop_timings.get_stats()
+
+    @authorise()
+    @expose
+    def get_request_profile(self):
+        """Return timings of the requests served by this server.
+
+        Returns:
+            dict: {'lanes': {lane: stats}, 'requests': {request: summary}}
+
+            lane (str):
+                Requests are queued in lanes, each with its own worker
+                threads: "priority" for task job messages and pings,
+                "main" for everything else.
+            stats (dict):
+                queued (int):
+                    Number of requests waiting for a worker thread.
+                max queued (int):
+                    Maximum number of requests waiting (all time).
+                workers (int):
+                    Number of worker threads.
+                wait (dict):
+                    Summary of the time requests wait for a worker thread.
+            request (str):
+                Endpoint name, e.g. "pb_entire_workflow", qualified by the
+                mutation name for GraphQL mutations, e.g. "graphql:message".
+            summary (dict):
+                Summary of the time taken to serve the requests, from
+                receipt to reply, in the same format as the stage summaries
+                of ``get_main_loop_profile``.
+
+        """
+        return self.get_stats()
+
     # UIServer Data Commands
     @authorise()
     @expose
@@ -90,6 +90,27 @@ class WorkflowSubscriber(ZMQSocketBase):
         for topic in set(self.topics):
             self.socket.setsockopt(zmq.SUBSCRIBE, topic)
 
+    def get_pending(self):
+        """Return the messages received since last called, without waiting.
+
+        For synchronous clients which poll for messages (e.g. Tui).
+
+        Returns:
+            list - [[topic, msg], ...]
+
+        """
+        return self.loop.run_until_complete(self._get_pending())
+
+    async def _get_pending(self):
+        """Helper for self.get_pending."""
+        messages = []
+        while True:
+            try:
+                messages.append(
+                    await self.socket.recv_multipart(flags=zmq.NOBLOCK))
+            except zmq.ZMQError:
+                return messages
+
     async def subscribe(self, msg_handler, *args, **kwargs):
         """Subscribe to updates from the provided socket."""
         while True:
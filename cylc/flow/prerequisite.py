@@ -16,6 +16,7 @@
 
 """Functionality for expressing and evaluating logical triggers."""
 
+from functools import lru_cache
 import math
 
 from cylc.flow import ID_DELIM
@@ -25,6 +26,128 @@ from cylc.flow.exceptions import TriggerExpressionError
 from cylc.flow.data_messages_pb2 import PbPrerequisite, PbCondition
 
 
+class ConditionalExpression:
+    """A compiled conditional trigger expression.
+
+    The expression is held in terms of message positions rather than the
+    messages themselves, e.g. ``foo.1 succeeded | bar.1 succeeded`` is held
+    as ``0|1``. This means the same compiled expression can be shared by all
+    prerequisites with the same shape (e.g. all instances of a task in a
+    sequence). Use `ConditionalExpression.get` to obtain instances.
+
+    The expression is evaluated against a bitset of satisfied messages, in
+    which bit ``i`` is set if message ``i`` is satisfied.
+
+    Args:
+        tokens (tuple):
+            The expression as a sequence of message positions (int) and
+            operators ("&", "|", "(", ")").
+
+    """
+
+    __slots__ = ['tokens', '_func', '_pos']
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self._pos = 0
+        func = self._parse_or()
+        if self._pos != len(tokens):
+            raise ValueError('unexpected %r' % (tokens[self._pos],))
+        self._func = self._as_func(func)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get(tokens):
+        """Return the (shared) compiled expression for tokens."""
+        return ConditionalExpression(tokens)
+
+    def __call__(self, bits):
+        """Return True if the expression is satisfied by bits."""
+        return self._func(bits)
+
+    def get_raw(self, messages):
+        """Return the expression as a string in terms of messages.
+
+        Args:
+            messages (list): The messages in position order.
+
+        """
+        return ''.join(
+            Prerequisite.MESSAGE_TEMPLATE % messages[token]
+            if isinstance(token, int) else token
+            for token in self.tokens
+        )
+
+    def _next(self):
+        try:
+            return self.tokens[self._pos]
+        except IndexError:
+            raise ValueError('unexpected EOF') from None
+
+    def _parse_or(self):
+        """Parse "term | term ...", return a node."""
+        nodes = [self._parse_and()]
+        while self._pos < len(self.tokens) and self.tokens[self._pos] == '|':
+            self._pos += 1
+            nodes.append(self._parse_and())
+        return self._join('|', nodes)
+
+    def _parse_and(self):
+        """Parse "factor & factor ...", return a node."""
+        nodes = [self._parse_factor()]
+        while self._pos < len(self.tokens) and self.tokens[self._pos] == '&':
+            self._pos += 1
+            nodes.append(self._parse_factor())
+        return self._join('&', nodes)
+
+    def _parse_factor(self):
+        """Parse a message position or a bracketed expression."""
+        token = self._next()
+        self._pos += 1
+        if isinstance(token, int):
+            # A message is represented by its mask.
+            return 1 << token
+        if token == '(':
+            node = self._parse_or()
+            if self._next() != ')':
+                raise ValueError('unexpected %r' % (self.tokens[self._pos],))
+            self._pos += 1
+            return node
+        raise ValueError('unexpected %r' % (token,))
+
+    @classmethod
+    def _join(cls, oper, nodes):
+        """Combine nodes with oper, folding messages into a single mask.
+
+        Returns the mask (int) if all nodes are messages, else a function.
+        """
+        if len(nodes) == 1:
+            return nodes[0]
+        mask = 0
+        funcs = []
+        for node in nodes:
+            if isinstance(node, int):
+                mask |= node
+            else:
+                funcs.append(node)
+        if oper == '&':
+            def _and(bits):
+                return (bits & mask) == mask and all(
+                    func(bits) for func in funcs)
+            return _and
+        else:
+            def _or(bits):
+                return bool(bits & mask) or any(func(bits) for func in funcs)
+            return _or
+
+    @staticmethod
+    def _as_func(node):
+        """Return node as a function of bits."""
+        if isinstance(node, int):
+            return lambda bits: (bits & node) == node
+        return node
+
+
 class Prerequisite:
     """The concrete result of an abstract logical trigger expression.
 
@@ -42,8 +165,6 @@ class Prerequisite:
                  "target_point_strings", "start_point",
                  "pre_initial_messages", "conditional_expression", "point"]
 
-    # Extracts T from "foo.T succeeded" etc.
-    SATISFIED_TEMPLATE = 'bool(self.satisfied[("%s", "%s", "%s")])'
     MESSAGE_TEMPLATE = '%s.%s %s'
 
     DEP_STATE_SATISFIED = 'satisfied naturally'
@@ -71,7 +192,8 @@ class Prerequisite:
         self.pre_initial_messages = []
 
         # Expression present only when conditions are used.
-        # 'foo.1 failed & bar.1 succeeded'
+        # ConditionalExpression, in terms of the positions of the messages
+        # in self.satisfied.
         self.conditional_expression = None
 
         # The cached state of this prerequisite:
@@ -108,19 +230,18 @@ class Prerequisite:
         Returns None if this prerequisite is not a conditional one.
 
         """
-        expr = self.conditional_expression
-        if not expr:
+        if not self.conditional_expression:
             return None
-        for message in self.satisfied:
-            expr = expr.replace(self.SATISFIED_TEMPLATE % message,
-                                self.MESSAGE_TEMPLATE % message)
-        return expr
+        return self.conditional_expression.get_raw(list(self.satisfied))
 
     def set_condition(self, expr):
         """Set the conditional expression for this prerequisite.
 
         Resets the cached state (self._all_satisfied).
 
+        Conditional expressions are compiled, the compiled expression is
+        shared between all prerequisites of the same shape.
+
         """
 
         drop_these = []
@@ -144,16 +265,48 @@ class Prerequisite:
             if message in self.satisfied:
                 self.satisfied.pop(message)
 
-        if '|' in expr:
+        self.conditional_expression = None
+        if '|' in expr and self.satisfied:
             if drop_these:
                 simpler = ConditionalSimplifier(
                     expr, [self.MESSAGE_TEMPLATE % m for m in drop_these])
                 expr = simpler.get_cleaned()
-            # Make a Python expression so we can eval() the logic.
-            for message in self.satisfied:
-                expr = expr.replace(self.MESSAGE_TEMPLATE % message,
-                                    self.SATISFIED_TEMPLATE % message)
-            self.conditional_expression = expr
+            self.conditional_expression = self._compile(expr)
+
+    def _compile(self, expr):
+        """Return the compiled form of a conditional expression string."""
+        positions = {
+            self.MESSAGE_TEMPLATE % message: ind
+            for ind, message in enumerate(self.satisfied)
+        }
+        tokens = []
+        for item in ConditionalSimplifier.REC_CONDITIONALS.split(expr):
+            item = item.strip()
+            if not item:
+                continue
+            if item in '&|()':
+                tokens.append(item)
+            elif item in positions:
+                tokens.append(positions[item])
+            else:
+                raise TriggerExpressionError(
+                    '"%s":\nunknown trigger "%s"' % (expr, item))
+        try:
+            return ConditionalExpression.get(tuple(tokens))
+        except ValueError as exc:
+            err_msg = str(exc)
+            if err_msg == "unexpected EOF":
+                err_msg += (
+                    " (could be unmatched parentheses in the graph string?)")
+            raise TriggerExpressionError('"%s":\n%s' % (expr, err_msg))
+
+    def _get_satisfied_bits(self):
+        """Return the satisfied messages as a bitset (by position)."""
+        bits = 0
+        for ind, value in enumerate(self.satisfied.values()):
+            if value:
+                bits |= 1 << ind
+        return bits
 
     def is_satisfied(self):
         """Return True if prerequisite is satisfied.
@@ -169,7 +322,7 @@ class Prerequisite:
                 # No prerequisites left after pre-initial simplification.
                 return True
             if self.conditional_expression:
-                # Trigger expression with at least one '|': use eval.
+                # Trigger expression with at least one '|'.
                 self._all_satisfied = self._conditional_is_satisfied()
             else:
                 self._all_satisfied = all(self.satisfied.values())
@@ -181,16 +334,7 @@ class Prerequisite:
         Does not cache the result.
 
         """
-        try:
-            res = eval(self.conditional_expression)
-        except (SyntaxError, ValueError) as exc:
-            err_msg = str(exc)
-            if str(exc).find("unexpected EOF") != -1:
-                err_msg += (
-                    " (could be unmatched parentheses in the graph string?)")
-            raise TriggerExpressionError(
-                '"%s":\n%s' % (self.get_raw_conditional_expression(), err_msg))
-        return res
+        return self.conditional_expression(self._get_satisfied_bits())
 
     def satisfy_me(self, all_task_outputs):
         """Evaluate pre-requisite against known outputs.
@@ -201,6 +345,7 @@ class Prerequisite:
         relevant_messages = all_task_outputs & set(self.satisfied)
         for message in relevant_messages:
             self.satisfied[message] = self.DEP_STATE_SATISFIED
+        if relevant_messages:
             if self.conditional_expression is None:
                 self._all_satisfied = all(self.satisfied.values())
             else:
@@ -164,6 +164,7 @@ class CylcSuiteDAOTable:
 class CylcSuiteDAO:
     """Data access object for the suite runtime database."""
 
+    BACKUP_PAGES = 256
     CONN_TIMEOUT = 0.2
     DB_FILE_BASE_NAME = "db"
     MAX_TRIES = 100
@@ -348,6 +349,24 @@ class CylcSuiteDAO:
         """
         self.tables[table_name].add_update_item(set_args, where_args)
 
+    def backup(self, file_name, pages=BACKUP_PAGES):
+        """Copy the database to file_name using the SQLite online backup API.
+
+        The copy is made a few pages at a time, so other connections are not
+        locked out of the database for long, and is consistent even if the
+        database is written to during the copy.
+
+        """
+        src = sqlite3.connect(self.db_file_name, self.CONN_TIMEOUT)
+        try:
+            dest = sqlite3.connect(file_name)
+            try:
+                src.backup(dest, pages=pages)
+            finally:
+                dest.close()
+        finally:
+            src.close()
+
     def close(self):
         """Explicitly close the connection."""
         if self.conn is not None:
@@ -380,21 +399,7 @@ class CylcSuiteDAO:
     def execute_queued_items(self):
         """Execute queued items for each table."""
         try:
-            for table in self.tables.values():
-                # DELETE statements may have varying number of WHERE args so we
-                # can only executemany for each identical template statement.
-                for stmt, stmt_args_list in table.delete_queues.items():
-                    self._execute_stmt(stmt, stmt_args_list)
-                # INSERT statements are uniform for each table, so all INSERT
-                # statements can be executed using a single "executemany" call.
-                if table.insert_queue:
-                    self._execute_stmt(
-                        table.get_insert_stmt(), table.insert_queue)
-                # UPDATE statements can have varying number of SET and WHERE
-                # args so we can only executemany for each identical template
-                # statement.
-                for stmt, stmt_args_list in table.update_queues.items():
-                    self._execute_stmt(stmt, stmt_args_list)
+            self.execute_queued_stmts()
             # Connection should only be opened if we have executed something.
             if self.conn is None:
                 return
@@ -413,11 +418,7 @@ class CylcSuiteDAO:
                     pass
             return
         else:
-            # Clear the queues
-            for table in self.tables.values():
-                table.delete_queues.clear()
-                table.insert_queue.clear()
-                table.update_queues.clear()
+            self.clear_queued_items()
             # Report public database retry recovery if necessary
             if self.n_tries:
                 LOG.warning(
@@ -430,6 +431,35 @@ class CylcSuiteDAO:
             # database will ensure that the suite dies.
             self.close()
 
+    def execute_queued_stmts(self):
+        """Execute queued items for each table, without committing.
+
+        Does not clear the queues.
+
+        """
+        for table in self.tables.values():
+            # DELETE statements may have varying number of WHERE args so we
+            # can only executemany for each identical template statement.
+            for stmt, stmt_args_list in table.delete_queues.items():
+                self._execute_stmt(stmt, stmt_args_list)
+            # INSERT statements are uniform for each table, so all INSERT
+            # statements can be executed using a single "executemany" call.
+            if table.insert_queue:
+                self._execute_stmt(
+                    table.get_insert_stmt(), table.insert_queue)
+            # UPDATE statements can have varying number of SET and WHERE
+            # args so we can only executemany for each identical template
+            # statement.
+            for stmt, stmt_args_list in table.update_queues.items():
+                self._execute_stmt(stmt, stmt_args_list)
+
+    def clear_queued_items(self):
+        """Clear the queued items for each table."""
+        for table in self.tables.values():
+            table.delete_queues.clear()
+            table.insert_queue.clear()
+            table.update_queues.clear()
+
     def _execute_stmt(self, stmt, stmt_args_list):
         """Helper for "self.execute_queued_items".
 
@@ -26,7 +26,7 @@ from shlex import quote
 from shutil import copytree, rmtree
 from subprocess import Popen, PIPE, DEVNULL
 import sys
-from threading import Barrier
+from threading import Barrier, Lock
 from time import sleep, time
 import traceback
 from uuid import uuid4
@@ -56,6 +56,8 @@ from cylc.flow.loggingutil import (
     TimestampRotatingFileHandler,
     ReferenceLogFileHandler
 )
+from cylc.flow.main_loop_events import MainLoopEvents, WakeQueue
+from cylc.flow.main_loop_timings import MainLoopTimings
 from cylc.flow.network import API
 from cylc.flow.network.authentication import key_housekeeping
 from cylc.flow.network.server import SuiteRuntimeServer
@@ -205,6 +207,8 @@ class Scheduler:
     # main loop
     main_loop_intervals: deque = deque(maxlen=10)
     main_loop_plugins: dict = None
+    main_loop_events: MainLoopEvents = None
+    main_loop_timings: MainLoopTimings = None
     auto_restart_mode: AutoRestartMode = None
     auto_restart_time: float = None
 
@@ -215,6 +219,7 @@ class Scheduler:
     server: SuiteRuntimeServer = None
     publisher: WorkflowPublisher = None
     barrier: Barrier = None
+    state_lock: Lock = None
     curve_auth: ThreadAuthenticator = None
     client_pub_key_dir: str = None
 
@@ -281,6 +286,10 @@ class Scheduler:
         # create thread sync barrier for setup
         self.barrier = Barrier(3, timeout=10)
 
+        # held by the main loop while it changes the task pool, data-store
+        # etc. and by the server while it serves requests
+        self.state_lock = Lock()
+
     async def install(self):
         """Get the filesystem in the right state to run the flow.
 
@@ -330,7 +339,13 @@ class Scheduler:
         """
         self.suite_db_mgr = SuiteDatabaseManager(
             suite_files.get_suite_srv_dir(self.suite),  # pri_d
-            os.path.join(self.suite_run_dir, 'log'))  # pub_d
+            os.path.join(self.suite_run_dir, 'log'),  # pub_d
+            incremental=glbl_cfg().get(
+                ['scheduler', 'database', 'incremental task pool']),
+            pub_writer=glbl_cfg().get(
+                ['scheduler', 'database', 'public database writer']),
+            pub_queue_size=glbl_cfg().get(
+                ['scheduler', 'database', 'public database queue size']))
         self.data_store_mgr = DataStoreMgr(self)
         self.broadcast_mgr = BroadcastMgr(
             self.suite_db_mgr, self.data_store_mgr)
@@ -367,9 +382,17 @@ class Scheduler:
             self.suite, context=self.zmq_context, barrier=self.barrier)
 
         self.proc_pool = SubProcPool()
-        self.command_queue = Queue()
-        self.message_queue = Queue()
-        self.ext_trigger_queue = Queue()
+        self.main_loop_events = MainLoopEvents(
+            event_driven=glbl_cfg().get(
+                ['scheduler', 'main loop', 'event driven']),
+            interval=self.INTERVAL_MAIN_LOOP)
+        self.main_loop_timings = MainLoopTimings()
+        self.command_queue = WakeQueue(
+            self.main_loop_events, MainLoopEvents.COMMANDS)
+        self.message_queue = WakeQueue(
+            self.main_loop_events, MainLoopEvents.MESSAGES)
+        self.ext_trigger_queue = WakeQueue(
+            self.main_loop_events, MainLoopEvents.EXT_TRIGGERS)
         self.suite_event_handler = SuiteEventHandler(self.proc_pool)
         self.job_pool = JobPool(self)
 
@@ -593,6 +616,7 @@ class Scheduler:
             )
             await self.publisher.publish(self.data_store_mgr.publish_deltas)
             self.profiler.start()
+            self.main_loop_events.start()
             await self.main_loop()
 
         except SchedulerStop as exc:
@@ -765,6 +789,8 @@ class Scheduler:
 
     def process_queued_task_messages(self):
         """Handle incoming task messages for each task proxy."""
+        if self.message_queue.empty():
+            return
         messages = {}
         while self.message_queue.qsize():
             try:
@@ -783,9 +809,9 @@ class Scheduler:
         # reverse change to task state, it is desirable to confirm this by
         # polling.
         to_poll_tasks = []
-        for itask in self.pool.get_tasks():
-            message_items = messages.get(itask.identity)
-            if message_items is None:
+        for task_id, message_items in messages.items():
+            itask = self.pool.get_pool_task_by_id(task_id)
+            if itask is None:
                 continue
             should_poll = False
             for submit_num, event_time, severity, message in message_items:
@@ -1293,6 +1319,9 @@ class Scheduler:
         # Is the suite ready to shut down now?
         if self.pool.can_stop(self.stop_mode):
             await self.update_data_structure()
+            # Flush jobs held back by job submission limits (the process
+            # pool reports them as not submitted as the suite is stopping)
+            self.task_job_mgr.submit_pipeline.process()
             self.proc_pool.close()
             if self.stop_mode != StopMode.REQUEST_NOW_NOW:
                 # Wait for process pool to complete,
@@ -1408,60 +1437,93 @@ class Scheduler:
 
     async def main_loop(self):
         """The scheduler main loop."""
+        event_driven = self.main_loop_events.event_driven
+        timings = self.main_loop_timings
         while True:  # MAIN LOOP
-            tinit = time()
-
-            if self.pool.do_reload:
-                # Re-initialise data model on reload
-                self.data_store_mgr.initiate_data_model(reloaded=True)
-                self.pool.reload_taskdefs()
-                self.is_updated = True
-                await self.publisher.publish(
-                    self.data_store_mgr.publish_deltas)
-
-            self.process_command_queue()
-            self.release_tasks()
-            self.proc_pool.process()
-
-            if self.should_process_tasks():
-                self.process_task_pool()
-            self.late_tasks_check()
-
-            self.process_queued_task_messages()
-            self.process_command_queue()
-            self.task_events_mgr.process_events(self)
-
-            # Update state summary, database, and uifeed
-            self.suite_db_mgr.put_task_event_timers(self.task_events_mgr)
-            has_updated = await self.update_data_structure()
+            tinit = tick = timings.start()
+            # Hold the state lock while the stages run, request handlers in
+            # the server threads take it so they see consistent state.
+            with self.state_lock:
+                # Stages with pending work (and record their wake latency).
+                due = self.main_loop_events.take()
+                # Time-based checks run on every iteration in polling mode,
+                # but only on timer ticks in event-driven mode.
+                timers_due = not event_driven or MainLoopEvents.TIMERS in due
+
+                if self.pool.do_reload:
+                    # Re-initialise data model on reload
+                    self.data_store_mgr.initiate_data_model(reloaded=True)
+                    self.pool.reload_taskdefs()
+                    self.is_updated = True
+                    await self.unlocked(self.publisher.publish(
+                        self.data_store_mgr.publish_deltas))
+                    tick = timings.record(timings.RELOAD, tick)
+
+                self.process_command_queue()
+                tick = timings.record(timings.COMMANDS, tick)
+                self.release_tasks()
+                tick = timings.record(timings.RELEASE_TASKS, tick)
+                self.task_job_mgr.submit_pipeline.process()
+                self.proc_pool.process()
+                tick = timings.record(timings.PROC_POOL, tick)
+
+                if self.should_process_tasks():
+                    self.process_task_pool()
+                if timers_due:
+                    self.late_tasks_check()
+                tick = timings.record(timings.TASK_POOL, tick)
+
+                self.process_queued_task_messages()
+                tick = timings.record(timings.MESSAGES, tick)
+                self.process_command_queue()
+                tick = timings.record(timings.COMMANDS, tick)
+                self.task_events_mgr.process_events(self)
+                tick = timings.record(timings.TASK_EVENTS, tick)
+
+                # Update state summary, database, and uifeed
+                self.suite_db_mgr.put_task_event_timers(self.task_events_mgr)
+                has_updated = await self.update_data_structure()
+                tick = timings.record(timings.DATA_STORE, tick)
 
-            self.process_suite_db_queue()
+                self.process_suite_db_queue()
 
-            # If public database is stuck, blast it away by copying the content
-            # of the private database into it.
-            self.database_health_check()
+                # If public database is stuck, blast it away by copying the
+                # content of the private database into it.
+                self.database_health_check()
+                tick = timings.record(timings.DATABASE, tick)
 
-            # Shutdown suite if timeouts have occurred
-            self.timeout_check()
+                # Shutdown suite if timeouts have occurred
+                if timers_due:
+                    self.timeout_check()
 
-            # Does the suite need to shutdown on task failure?
-            await self.suite_shutdown()
+                # Does the suite need to shutdown on task failure?
+                await self.suite_shutdown()
 
-            if self.options.profile_mode:
-                self.update_profiler_logs(tinit)
+                if self.options.profile_mode:
+                    self.update_profiler_logs(tinit)
+                tick = timings.record(timings.CHECKS, tick)
 
-            # Run plugin functions
-            await asyncio.gather(
-                *main_loop.get_runners(
-                    self.main_loop_plugins,
-                    main_loop.CoroTypes.Periodic,
-                    self
-                )
-            )
-
-            if not has_updated and not self.stop_mode:
-                # Has the suite stalled?
-                self.check_suite_stalled()
+                # Run plugin functions
+                await self.unlocked(asyncio.gather(
+                    *main_loop.get_runners(
+                        self.main_loop_plugins,
+                        main_loop.CoroTypes.Periodic,
+                        self
+                    )
+                ))
+                tick = timings.record(timings.PLUGINS, tick)
+
+                if not has_updated and not self.stop_mode:
+                    # Has the suite stalled?
+                    self.check_suite_stalled()
+                tick = timings.record(timings.CHECKS, tick)
+
+            if event_driven:
+                # Wait for work, or for the next timer tick.
+                await self.main_loop_events.wait(self.proc_pool)
+                timings.end(tick)
+                self.main_loop_intervals.append(time() - tinit)
+                continue
 
             # Sleep a bit for things to catch up.
             # Quick sleep if there are items pending in process pool.
@@ -1478,10 +1540,25 @@ class Scheduler:
             else:
                 duration = self.INTERVAL_MAIN_LOOP - elapsed
             await asyncio.sleep(duration)
+            timings.end(tick)
             # Record latest main loop interval
             self.main_loop_intervals.append(time() - tinit)
             # END MAIN LOOP
 
+    async def unlocked(self, awaitable):
+        """Await something from the main loop without the state lock.
+
+        The main loop holds the state lock while it runs, but must not hold
+        it while it is waiting for other coroutines (which may be waiting on
+        the server).
+
+        """
+        self.state_lock.release()
+        try:
+            return await awaitable
+        finally:
+            self.state_lock.acquire()
+
     async def update_data_structure(self):
         """Update DB, UIS, Summary data elements"""
         updated_tasks = [
@@ -1498,7 +1575,8 @@ class Scheduler:
             # WServer incremental data store update
             self.data_store_mgr.update_data_structure(updated_nodes)
             # Publish updates:
-            await self.publisher.publish(self.data_store_mgr.publish_deltas)
+            await self.unlocked(
+                self.publisher.publish(self.data_store_mgr.publish_deltas))
         if has_updated:
             # Database update
             self.suite_db_mgr.put_task_pool(self.pool)
@@ -1649,7 +1727,18 @@ class Scheduler:
             except Exception as exc:
                 LOG.exception(exc)
 
+        if self.main_loop_events:
+            self.main_loop_events.log_stats(LOG)
+
+        if self.data_store_mgr:
+            self.data_store_mgr.log_publish_stats(LOG)
+
+        if self.task_job_mgr:
+            self.task_job_mgr.submit_pipeline.log_stats(LOG)
+            self.task_job_mgr.submit_pipeline.close()
+
         if self.server:
+            self.server.log_stats(LOG)
             self.server.stop()
         if self.publisher:
             await self.publisher.publish(
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""cylc profile [OPTIONS] ARGS
+
+Print the time spent in each stage of the main loop of a running suite.
+
+Times are in milliseconds, per main loop iteration, over a window of recent
+iterations (except "count" and "max" which are over the life of the
+scheduler). The "busy" stage is the whole iteration, excluding sleep.
+
+With --requests, print the time taken to serve each kind of request made to
+the suite instead (from receipt to reply, including the time spent waiting
+for a worker thread).
+
+Examples:
+  # print a table of stage timings
+  $ cylc profile SUITE
+
+  # print stage timings and histograms as JSON
+  $ cylc profile --json SUITE
+
+  # print a table of request timings
+  $ cylc profile --requests SUITE
+"""
+
+import json
+import sys
+
+from cylc.flow.option_parsers import CylcOptionParser as COP
+from cylc.flow.network.client import SuiteRuntimeClient
+from cylc.flow.terminal import cli_function
+
+
+def get_option_parser():
+    parser = COP(__doc__, comms=True)
+
+    parser.add_option(
+        "--json", help="Print the full timings (with histograms) as JSON.",
+        action="store_true", default=False, dest="json")
+
+    parser.add_option(
+        "--requests", help="Print request timings.",
+        action="store_true", default=False, dest="requests")
+
+    return parser
+
+
+def format_stats(stats, heading='stage'):
+    """Return stage (or request) timings as a table."""
+    width = max([16] + [len(stage) for stage in stats])
+    lines = ['%-*s %8s %10s %10s %10s %10s' % (
+        width, heading, 'count', 'mean', 'p50', 'p99', 'max')]
+    for stage, summary in stats.items():
+        lines.append('%-*s %8d %s' % (
+            width,
+            stage,
+            summary['count'],
+            ' '.join(
+                '%10.3f' % (summary[key] * 1000)
+                if summary[key] is not None else '%10s' % '-'
+                for key in ('mean', 'p50', 'p99', 'max')
+            )
+        ))
+    return '\n'.join(lines)
+
+
+@cli_function(get_option_parser)
+def main(parser, options, suite):
+    pclient = SuiteRuntimeClient(suite, timeout=options.comms_timeout)
+    if options.requests:
+        stats = pclient('get_request_profile')
+    else:
+        stats = pclient('get_main_loop_profile')
+    if options.json:
+        sys.stdout.write(json.dumps(stats, indent=4) + '\n')
+    elif options.requests:
+        print(format_stats(stats['requests'], heading='request'))
+        print()
+        print(format_stats(
+            {
+                f'{name} lane wait': lane['wait']
+                for name, lane in stats['lanes'].items()
+            },
+            heading='lane'
+        ))
+    else:
+        print(format_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
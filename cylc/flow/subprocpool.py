@@ -148,6 +148,29 @@ class SubProcPool:
         """Return True if queuings or runnings not empty."""
         return self.queuings or self.runnings
 
+    def is_ready(self):
+        """Return True if there is work for self.process to do.
+
+        I.e. a command has exited, timed out or has output to be read, or a
+        command is queued and there is room in the pool to run it.
+        """
+        if self.queuings and len(self.runnings) < self.size:
+            return True
+        now = time()
+        handles = []
+        for proc, ctx, _, _ in self.runnings:
+            if proc.poll() is not None or now > ctx.timeout:
+                return True
+            handles.extend(
+                handle for handle in (proc.stdout, proc.stderr)
+                if not handle.closed)
+        if handles:
+            try:
+                return bool(select.select(handles, [], [], 0.0)[0])
+            except (OSError, ValueError):
+                return True
+        return False
+
     def _is_stopping(self):
         """Return whether .stopping is True or not.
 
@@ -211,7 +234,8 @@ class SubProcPool:
             else:
                 proc = self._run_command_init(ctx, callback, callback_args)
                 if proc is not None:
-                    ctx.timeout = time() + self.proc_pool_timeout
+                    ctx.time_start = time()
+                    ctx.timeout = ctx.time_start + self.proc_pool_timeout
                     self.runnings.append([proc, ctx, callback, callback_args])
 
     def put_command(self, ctx, callback=None, callback_args=None):
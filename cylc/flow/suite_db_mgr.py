@@ -26,8 +26,12 @@ This module provides the logic to:
 import json
 import os
 import packaging.version
-from shutil import copy, rmtree
+from queue import Empty, Full, Queue
+from shutil import rmtree
+import sqlite3
 from tempfile import mkstemp
+from threading import Thread
+from time import time
 
 
 from cylc.flow import LOG
@@ -38,6 +42,253 @@ from cylc.flow.wallclock import get_current_time_string, get_utc_mode
 from cylc.flow.exceptions import SuiteServiceFileError
 
 
+def backup_db(src_dao, dest_file_name):
+    """Replace dest_file_name with a copy of the database of src_dao.
+
+    Use a temporary file to ensure that we do not end up with a partial file.
+
+    """
+    temp_file_name = None
+    try:
+        open(dest_file_name, "a").close()  # touch
+        st_mode = os.stat(dest_file_name).st_mode
+        temp_file_name = mkstemp(
+            prefix=CylcSuiteDAO.DB_FILE_BASE_NAME,
+            dir=os.path.dirname(dest_file_name))[1]
+        src_dao.backup(temp_file_name)
+        os.rename(temp_file_name, dest_file_name)
+        os.chmod(dest_file_name, st_mode)
+    except (IOError, OSError, sqlite3.Error):
+        if temp_file_name and os.path.exists(temp_file_name):
+            os.unlink(temp_file_name)
+        raise
+
+
+class PublicDatabaseWriter:
+    """Write to the public database in a background thread.
+
+    The public database does not need to be fully in sync with the private
+    database, and writes to it may be slow (e.g. on a shared file system) or
+    blocked by readers. Batches of operations already executed on the private
+    database are put on a bounded queue and written by a thread, so the main
+    loop never waits on the public database.
+
+    Pending batches are written in order in a single transaction. If the
+    queue overflows, or writes keep failing, pending batches are discarded
+    and the public database is recovered from the private database. This is
+    safe as the private database is always written before a batch is queued,
+    and replaying a batch on a recovered database has no effect (all
+    operations are deletes, insert-or-replaces or updates of literal values).
+
+    Args:
+        pri_dao (CylcSuiteDAO):
+            The private database, for recovery.
+        pub_path (str):
+            The public database file.
+        queue_size (int):
+            The maximum number of batches waiting to be written.
+
+    """
+
+    # Seconds to wait before retrying a failed write.
+    RETRY_DELAY = 1.0
+
+    def __init__(self, pri_dao, pub_path, queue_size=1000):
+        self.pri_dao = pri_dao
+        self.dao = CylcSuiteDAO(pub_path, is_public=True)
+        self.queue_size = queue_size
+        self.queue = Queue(queue_size)
+        # batches taken off the queue, not yet written: [(time, ops), ...]
+        self.pending = []
+        # set (by any thread) to discard pending batches and recover
+        self.recover_requested = False
+        self.stopping = False
+        self.thread = None
+        self.stats = {
+            'batches': 0,
+            'statements': 0,
+            'commits': 0,
+            'max batches per commit': 0,
+            'max queue depth': 0,
+            'max latency': 0.0,
+            'total latency': 0.0,
+            'write time': 0.0,
+            'failures': 0,
+            'recoveries': 0,
+            'dropped batches': 0,
+        }
+
+    def start(self):
+        """Start the writer thread."""
+        self.thread = Thread(
+            target=self._run, name='public-db-writer', daemon=True)
+        self.thread.start()
+
+    def put(self, ops):
+        """Queue a batch of operations for the public database.
+
+        Never blocks. If the queue is full the batch is dropped and the
+        public database will be recovered from the private database.
+
+        Args:
+            ops (list):
+                [(dao_method_name, args), ...] to apply in order.
+
+        """
+        try:
+            self.queue.put_nowait((time(), ops))
+        except Full:
+            self.stats['dropped batches'] += 1
+            self.recover_requested = True
+        else:
+            self.stats['max queue depth'] = max(
+                self.stats['max queue depth'], self.queue.qsize())
+
+    def stop(self, timeout=None):
+        """Write pending batches, then stop the writer thread."""
+        if self.thread is None:
+            return
+        self.stopping = True
+        self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+        self.dao.close()
+
+    def _run(self):
+        """Main loop of the writer thread."""
+        while True:
+            if self._take(None if not self.pending else self.RETRY_DELAY):
+                if self.recover_requested:
+                    self._recover()
+                elif self.pending:
+                    self._write()
+            if self.stopping and self.queue.empty():
+                if self.recover_requested:
+                    self._recover()
+                elif self.pending:
+                    self._write()
+                return
+
+    def _take(self, timeout):
+        """Move batches from the queue to pending, return True if any.
+
+        Block for up to timeout seconds (forever if None) for the first.
+
+        """
+        try:
+            item = self.queue.get(timeout=timeout)
+        except Empty:
+            return bool(self.pending)
+        items = [item]
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except Empty:
+                break
+        self.pending.extend(item for item in items if item is not None)
+        if len(self.pending) > self.queue_size:
+            self.stats['dropped batches'] += len(self.pending)
+            self.recover_requested = True
+        return True
+
+    def _write(self):
+        """Write pending batches in a single transaction."""
+        start = time()
+        dao = self.dao
+        n_statements = 0
+        try:
+            for _, ops in self.pending:
+                for method, args in ops:
+                    getattr(dao, method)(*args)
+                    n_statements += 1
+                dao.execute_queued_stmts()
+                dao.clear_queued_items()
+            if dao.conn is not None:
+                dao.conn.commit()
+        except sqlite3.Error:
+            dao.clear_queued_items()
+            if dao.conn is not None:
+                try:
+                    dao.conn.rollback()
+                except sqlite3.Error:
+                    pass
+            self.stats['failures'] += 1
+            dao.n_tries += 1
+            LOG.warning(
+                f"{dao.db_file_name}: write attempt ({dao.n_tries})"
+                " did not complete")
+            if dao.n_tries >= dao.MAX_TRIES:
+                self.recover_requested = True
+            return
+        finally:
+            dao.close()
+        now = time()
+        if dao.n_tries:
+            LOG.warning(
+                f"{dao.db_file_name}: recovered after ({dao.n_tries})"
+                " attempt(s)")
+            dao.n_tries = 0
+        stats = self.stats
+        stats['batches'] += len(self.pending)
+        stats['statements'] += n_statements
+        stats['commits'] += 1
+        stats['max batches per commit'] = max(
+            stats['max batches per commit'], len(self.pending))
+        latency = now - self.pending[0][0]
+        stats['max latency'] = max(stats['max latency'], latency)
+        stats['total latency'] += sum(now - put for put, _ in self.pending)
+        stats['write time'] += now - start
+        self.pending.clear()
+
+    def _recover(self):
+        """Recover the public database from the private database.
+
+        Pending batches are discarded, they are already in the private
+        database.
+
+        """
+        self.recover_requested = False
+        self.pending.clear()
+        self.dao.close()
+        try:
+            backup_db(self.pri_dao, self.dao.db_file_name)
+        except (IOError, OSError, sqlite3.Error) as exc:
+            LOG.warning(f"{self.dao.db_file_name}: recovery failed: {exc}")
+            self.recover_requested = True
+            return
+        self.stats['recoveries'] += 1
+        self.dao.n_tries = 0
+        LOG.warning(
+            f"{self.dao.db_file_name}: recovered from "
+            f"{self.pri_dao.db_file_name}")
+
+    def get_stats(self):
+        """Return a dict of writer statistics."""
+        stats = dict(self.stats)
+        stats['queue depth'] = self.queue.qsize()
+        stats['mean latency'] = (
+            stats['total latency'] / stats['batches']
+            if stats['batches'] else 0.0)
+        return stats
+
+    def log_stats(self, log=LOG):
+        """Log writer statistics."""
+        stats = self.get_stats()
+        log.info(
+            'public database writer: '
+            f"{stats['batches']} batches"
+            f" ({stats['statements']} statements)"
+            f" in {stats['commits']} commits"
+            f" (max {stats['max batches per commit']} batches per commit);"
+            f" write time {stats['write time']:.3f}s;"
+            f" latency mean {stats['mean latency']:.3f}s"
+            f" max {stats['max latency']:.3f}s;"
+            f" max queue depth {stats['max queue depth']};"
+            f" {stats['failures']} failures,"
+            f" {stats['recoveries']} recoveries,"
+            f" {stats['dropped batches']} dropped batches")
+
+
 class SuiteDatabaseManager:
     """Manage the suite runtime private and public databases."""
 
@@ -76,7 +327,20 @@ class SuiteDatabaseManager:
     TABLE_XTRIGGERS = CylcSuiteDAO.TABLE_XTRIGGERS
     TABLE_ABS_OUTPUTS = CylcSuiteDAO.TABLE_ABS_OUTPUTS
 
-    def __init__(self, pri_d=None, pub_d=None):
+    # Task pool tables which can be written incrementally, with the names of
+    # the columns which identify a row.
+    TASK_POOL_KEYS = {
+        TABLE_TASK_POOL: ('cycle', 'name', 'flow_label'),
+        TABLE_TASK_PREREQUISITES: (
+            'cycle', 'name', 'prereq_name', 'prereq_cycle', 'prereq_output'),
+        TABLE_TASK_TIMEOUT_TIMERS: ('cycle', 'name'),
+        TABLE_TASK_ACTION_TIMERS: ('cycle', 'name', 'ctx_key'),
+    }
+
+    def __init__(
+        self, pri_d=None, pub_d=None, incremental=False,
+        pub_writer=False, pub_queue_size=1000
+    ):
         self.pri_path = None
         if pri_d:
             self.pri_path = os.path.join(pri_d, CylcSuiteDAO.DB_FILE_BASE_NAME)
@@ -110,28 +374,28 @@ class SuiteDatabaseManager:
             self.TABLE_ABS_OUTPUTS: []}
         self.db_updates_map = {}
 
+        # Write only changed task pool rows (else wipe and rewrite)?
+        self.incremental = incremental
+        # Task pool rows as of the last put_task_pool call:
+        # {table_name: {key: args, ...}, ...}
+        # None means the tables must be wiped and rewritten in full.
+        self.task_pool_rows = None
+
+        # Write to the public database in a background thread?
+        self.pub_writer_enabled = pub_writer
+        self.pub_queue_size = pub_queue_size
+        self.pub_writer = None
+
     def copy_pri_to_pub(self):
         """Copy content of primary database file to public database file.
 
-        Use temporary file to ensure that we do not end up with a partial file.
+        Use the SQLite online backup API, so the copy is consistent, and a
+        temporary file to ensure that we do not end up with a partial file.
 
         """
-        temp_pub_db_file_name = None
         self.pub_dao.close()
-        try:
-            self.pub_dao.conn = None  # reset connection
-            open(self.pub_dao.db_file_name, "a").close()  # touch
-            st_mode = os.stat(self.pub_dao.db_file_name).st_mode
-            temp_pub_db_file_name = mkstemp(
-                prefix=self.pub_dao.DB_FILE_BASE_NAME,
-                dir=os.path.dirname(self.pub_dao.db_file_name))[1]
-            copy(self.pri_dao.db_file_name, temp_pub_db_file_name)
-            os.rename(temp_pub_db_file_name, self.pub_dao.db_file_name)
-            os.chmod(self.pub_dao.db_file_name, st_mode)
-        except (IOError, OSError):
-            if temp_pub_db_file_name:
-                os.unlink(temp_pub_db_file_name)
-            raise
+        self.pub_dao.conn = None  # reset connection
+        backup_db(self.pri_dao, self.pub_dao.db_file_name)
 
     def delete_suite_params(self, *keys):
         """Schedule deletion of rows from suite_params table by keys."""
@@ -190,9 +454,17 @@ class SuiteDatabaseManager:
         os.chmod(self.pri_path, 0o600)
         self.pub_dao = CylcSuiteDAO(self.pub_path, is_public=True)
         self.copy_pri_to_pub()
+        if self.pub_writer_enabled:
+            self.pub_writer = PublicDatabaseWriter(
+                self.pri_dao, self.pub_path, self.pub_queue_size)
+            self.pub_writer.start()
 
     def on_suite_shutdown(self):
         """Close data access objects."""
+        if self.pub_writer:
+            self.pub_writer.stop()
+            self.pub_writer.log_stats()
+            self.pub_writer = None
         if self.pri_dao:
             self.pri_dao.close()
             self.pri_dao = None
@@ -204,6 +476,8 @@ class SuiteDatabaseManager:
         """Handle queued db operations for each task proxy."""
         if self.pri_dao is None:
             return
+        # [(dao_method_name, args), ...]
+        ops = []
         # Record suite parameters and tasks in pool
         # Record any broadcast settings to be dumped out
         if any(self.db_deletes_map.values()):
@@ -211,35 +485,35 @@ class SuiteDatabaseManager:
                     self.db_deletes_map.items()):
                 while db_deletes:
                     where_args = db_deletes.pop(0)
-                    self.pri_dao.add_delete_item(table_name, where_args)
-                    self.pub_dao.add_delete_item(table_name, where_args)
+                    ops.append(('add_delete_item', (table_name, where_args)))
         if any(self.db_inserts_map.values()):
             for table_name, db_inserts in sorted(
                     self.db_inserts_map.items()):
                 while db_inserts:
                     db_insert = db_inserts.pop(0)
-                    self.pri_dao.add_insert_item(table_name, db_insert)
-                    self.pub_dao.add_insert_item(table_name, db_insert)
+                    ops.append(('add_insert_item', (table_name, db_insert)))
         if (hasattr(self, 'db_updates_map') and
                 any(self.db_updates_map.values())):
             for table_name, db_updates in sorted(
                     self.db_updates_map.items()):
                 while db_updates:
                     set_args, where_args = db_updates.pop(0)
-                    self.pri_dao.add_update_item(
-                        table_name, set_args, where_args)
-                    self.pub_dao.add_update_item(
-                        table_name, set_args, where_args)
-
-        # Previously, we used a separate thread for database writes. This has
-        # now been removed. For the private database, there is no real
-        # advantage in using a separate thread as it needs to be always in sync
-        # with what is current. For the public database, which does not need to
-        # be fully in sync, there is some advantage of using a separate
-        # thread/process, if writing to it becomes a bottleneck. At the moment,
-        # there is no evidence that this is a bottleneck, so it is better to
-        # keep the logic simple.
+                    ops.append((
+                        'add_update_item', (table_name, set_args, where_args)))
+
+        # The private database needs to be always in sync with what is
+        # current, so is written here. The public database does not need to
+        # be fully in sync, so can optionally be written by a background
+        # thread, if writing to it becomes a bottleneck.
+        for method, args in ops:
+            getattr(self.pri_dao, method)(*args)
         self.pri_dao.execute_queued_items()
+        if self.pub_writer:
+            if ops:
+                self.pub_writer.put(ops)
+            return
+        for method, args in ops:
+            getattr(self.pub_dao, method)(*args)
         self.pub_dao.execute_queued_items()
 
     def put_broadcast(self, modified_settings, is_cancel=False):
@@ -359,6 +633,10 @@ class SuiteDatabaseManager:
         """Put statements to update the task_action_timers table."""
         if task_events_mgr.event_timers_updated:
             self.db_deletes_map[self.TABLE_TASK_ACTION_TIMERS].append({})
+            if self.task_pool_rows is not None:
+                # Task poll and retry timers are wiped too, so they must be
+                # re-inserted on the next put_task_pool.
+                self.task_pool_rows[self.TABLE_TASK_ACTION_TIMERS] = {}
             for key, timer in task_events_mgr._event_timers.items():
                 key1, point, name, submit_num = key
                 self.db_inserts_map[self.TABLE_TASK_ACTION_TIMERS].append({
@@ -405,58 +683,15 @@ class SuiteDatabaseManager:
     def put_task_pool(self, pool):
         """Update various task tables for current pool, in runtime database.
 
-        Queue delete (everything) statements to wipe the tables, and queue the
+        In incremental mode, queue keyed delete statements for rows which have
+        gone since the last call, and insert (or replace) statements only for
+        rows which are new or have changed. Otherwise (and on the first call)
+        queue delete (everything) statements to wipe the tables, and queue the
         relevant insert statements for the current tasks in the pool.
         """
-        self.db_deletes_map[self.TABLE_TASK_POOL].append({})
-        self.db_deletes_map[self.TABLE_TASK_PREREQUISITES].append({})
-        # No need to do:
-        # self.db_deletes_map[self.TABLE_TASK_ACTION_TIMERS].append({})
-        # Should already be done by self.put_task_event_timers above.
-        self.db_deletes_map[self.TABLE_TASK_TIMEOUT_TIMERS].append({})
+        rows = {table_name: {} for table_name in self.TASK_POOL_KEYS}
         for itask in pool.get_all_tasks():
-            # Update the task_prerequisites table:
-            for prereq in itask.state.prerequisites:
-                for (p_name, p_cycle, p_output), satisfied_state in (
-                        prereq.satisfied.items()):
-                    self.put_insert_task_prerequisites(itask, {
-                        "prereq_name": p_name,
-                        "prereq_cycle": p_cycle,
-                        "prereq_output": p_output,
-                        "satisfied": satisfied_state})
-            self.db_inserts_map[self.TABLE_TASK_POOL].append({
-                "name": itask.tdef.name,
-                "cycle": str(itask.point),
-                "flow_label": itask.flow_label,
-                "status": itask.state.status,
-                "is_held": itask.state.is_held})
-            if itask.timeout is not None:
-                self.db_inserts_map[self.TABLE_TASK_TIMEOUT_TIMERS].append({
-                    "name": itask.tdef.name,
-                    "cycle": str(itask.point),
-                    "timeout": itask.timeout})
-            if itask.poll_timer is not None:
-                self.db_inserts_map[self.TABLE_TASK_ACTION_TIMERS].append({
-                    "name": itask.tdef.name,
-                    "cycle": str(itask.point),
-                    "ctx_key": json.dumps("poll_timer"),
-                    "ctx": self._namedtuple2json(itask.poll_timer.ctx),
-                    "delays": json.dumps(itask.poll_timer.delays),
-                    "num": itask.poll_timer.num,
-                    "delay": itask.poll_timer.delay,
-                    "timeout": itask.poll_timer.timeout})
-            for ctx_key_1, timer in itask.try_timers.items():
-                if timer is None:
-                    continue
-                self.db_inserts_map[self.TABLE_TASK_ACTION_TIMERS].append({
-                    "name": itask.tdef.name,
-                    "cycle": str(itask.point),
-                    "ctx_key": json.dumps(("try_timers", ctx_key_1)),
-                    "ctx": self._namedtuple2json(timer.ctx),
-                    "delays": json.dumps(timer.delays),
-                    "num": timer.num,
-                    "delay": timer.delay,
-                    "timeout": timer.timeout})
+            self._get_task_pool_rows(itask, rows)
             if itask.state.time_updated:
                 set_args = {
                     "time_updated": itask.state.time_updated,
@@ -474,6 +709,95 @@ class SuiteDatabaseManager:
                     (set_args, where_args))
                 itask.state.time_updated = None
 
+        if not self.incremental or self.task_pool_rows is None:
+            self.db_deletes_map[self.TABLE_TASK_POOL].append({})
+            self.db_deletes_map[self.TABLE_TASK_PREREQUISITES].append({})
+            # No need to do:
+            # self.db_deletes_map[self.TABLE_TASK_ACTION_TIMERS].append({})
+            # Should already be done by self.put_task_event_timers above.
+            self.db_deletes_map[self.TABLE_TASK_TIMEOUT_TIMERS].append({})
+            for table_name, table_rows in rows.items():
+                self.db_inserts_map[table_name].extend(table_rows.values())
+        else:
+            for table_name, table_rows in rows.items():
+                prev_rows = self.task_pool_rows[table_name]
+                for key, args in table_rows.items():
+                    if prev_rows.get(key) != args:
+                        self.db_inserts_map[table_name].append(args)
+                if table_name == self.TABLE_TASK_ACTION_TIMERS:
+                    # Only wiped by self.put_task_event_timers, as above.
+                    continue
+                gone = set(prev_rows).difference(table_rows)
+                if gone:
+                    self._put_delete_task_pool_rows(table_name, gone)
+        self.task_pool_rows = rows
+
+    def _get_task_pool_rows(self, itask, rows):
+        """Add the task pool table rows of itask to rows by table and key."""
+        name = itask.tdef.name
+        cycle = str(itask.point)
+        # Update the task_prerequisites table:
+        for prereq in itask.state.prerequisites:
+            for (p_name, p_cycle, p_output), satisfied_state in (
+                    prereq.satisfied.items()):
+                rows[self.TABLE_TASK_PREREQUISITES][
+                    (cycle, name, p_name, p_cycle, p_output)
+                ] = {
+                    "name": name,
+                    "cycle": cycle,
+                    "prereq_name": p_name,
+                    "prereq_cycle": p_cycle,
+                    "prereq_output": p_output,
+                    "satisfied": satisfied_state}
+        rows[self.TABLE_TASK_POOL][(cycle, name, itask.flow_label)] = {
+            "name": name,
+            "cycle": cycle,
+            "flow_label": itask.flow_label,
+            "status": itask.state.status,
+            "is_held": itask.state.is_held}
+        if itask.timeout is not None:
+            rows[self.TABLE_TASK_TIMEOUT_TIMERS][(cycle, name)] = {
+                "name": name,
+                "cycle": cycle,
+                "timeout": itask.timeout}
+        if itask.poll_timer is not None:
+            ctx_key = json.dumps("poll_timer")
+            rows[self.TABLE_TASK_ACTION_TIMERS][(cycle, name, ctx_key)] = {
+                "name": name,
+                "cycle": cycle,
+                "ctx_key": ctx_key,
+                "ctx": self._namedtuple2json(itask.poll_timer.ctx),
+                "delays": json.dumps(itask.poll_timer.delays),
+                "num": itask.poll_timer.num,
+                "delay": itask.poll_timer.delay,
+                "timeout": itask.poll_timer.timeout}
+        for ctx_key_1, timer in itask.try_timers.items():
+            if timer is None:
+                continue
+            ctx_key = json.dumps(("try_timers", ctx_key_1))
+            rows[self.TABLE_TASK_ACTION_TIMERS][(cycle, name, ctx_key)] = {
+                "name": name,
+                "cycle": cycle,
+                "ctx_key": ctx_key,
+                "ctx": self._namedtuple2json(timer.ctx),
+                "delays": json.dumps(timer.delays),
+                "num": timer.num,
+                "delay": timer.delay,
+                "timeout": timer.timeout}
+
+    def _put_delete_task_pool_rows(self, table_name, keys):
+        """Queue keyed DELETE statements for rows of a task pool table.
+
+        Delete statements are executed before insert statements, so drop any
+        queued inserts of the same rows, or they would survive the delete.
+        """
+        key_names = self.TASK_POOL_KEYS[table_name]
+        self.db_inserts_map[table_name] = [
+            args for args in self.db_inserts_map[table_name]
+            if tuple(args[key_name] for key_name in key_names) not in keys]
+        for key in keys:
+            self.db_deletes_map[table_name].append(dict(zip(key_names, key)))
+
     def put_insert_task_events(self, itask, args):
         """Put INSERT statement for task_events table."""
         self._put_insert_task_x(CylcSuiteDAO.TABLE_TASK_EVENTS, itask, args)
@@ -548,6 +872,9 @@ class SuiteDatabaseManager:
 
     def recover_pub_from_pri(self):
         """Recover public database from private database."""
+        if self.pub_writer:
+            # the writer thread recovers the public database itself
+            return
         if self.pub_dao.n_tries >= self.pub_dao.MAX_TRIES:
             self.copy_pri_to_pub()
             LOG.warning(
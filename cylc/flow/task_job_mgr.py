@@ -37,7 +37,9 @@ from shutil import rmtree
 from time import time
 
 from cylc.flow import LOG
+from cylc.flow.cfgspec.glbl_cfg import glbl_cfg
 from cylc.flow.job_runner_mgr import JobPollContext
+from cylc.flow.job_submit_pipeline import JobSubmitPipeline
 from cylc.flow.exceptions import (
     PlatformLookupError,
     SuiteConfigError,
@@ -144,6 +146,9 @@ class TaskJobManager:
         self.job_file_writer = JobFileWriter()
         self.job_runner_mgr = self.job_file_writer.job_runner_mgr
         self.task_remote_mgr = TaskRemoteMgr(suite, proc_pool)
+        self.submit_pipeline = JobSubmitPipeline(
+            proc_pool, self.job_file_writer,
+            glbl_cfg().get(['scheduler', 'job file writer threads']))
 
     def check_task_jobs(self, suite, task_pool):
         """Check submission and execution timeout and polling timers.
@@ -201,17 +206,37 @@ class TaskJobManager:
         select command to complete. Bad host select command or error writing to
         a job file will cause a bad task - leading to submission failure.
 
+        Job files are written concurrently, see JobSubmitPipeline.
+
         Return [list, list]: list of good tasks, list of bad tasks
         """
         prepared_tasks = []
         bad_tasks = []
+        # {itask: (local_job_file_path, job_conf)} - job files to write
+        job_files = {}
         for itask in itasks:
-            prep_task = self._prep_submit_task_job(suite, itask,
-                                                   check_syntax=check_syntax)
-            if prep_task:
-                prepared_tasks.append(itask)
-            elif prep_task is False:
+            if itask.local_job_file_path:
+                continue
+            job_file = self._prep_submit_task_job(suite, itask)
+            if job_file:
+                job_files[itask] = job_file
+            elif job_file is False:
                 bad_tasks.append(itask)
+        write_errors = dict(zip(
+            job_files,
+            self.submit_pipeline.write_job_files(
+                list(job_files.values()), check_syntax=check_syntax)))
+        for itask in itasks:
+            if itask in write_errors:
+                exc = write_errors[itask]
+                if exc is not None:
+                    self._prep_submit_task_job_error(
+                        suite, itask, '(prepare job file)', exc)
+                    bad_tasks.append(itask)
+                    continue
+                itask.local_job_file_path = job_files[itask][0]
+            if itask.local_job_file_path:
+                prepared_tasks.append(itask)
         return [prepared_tasks, bad_tasks]
 
     def submit_task_jobs(self, suite, itasks, curve_auth,
@@ -358,54 +383,37 @@ class TaskJobManager:
                     platform, suite
                 )
             )
-            # Chop itasks into a series of shorter lists if it's very big
-            # to prevent overloading of stdout and stderr pipes.
-            itasks = sorted(itasks, key=lambda itask: itask.identity)
-            chunk_size = len(itasks) // ((len(itasks) // 100) + 1) + 1
-            itasks_batches = [
-                itasks[i:i + chunk_size] for i in range(0,
-                                                        len(itasks),
-                                                        chunk_size)]
-            LOG.debug(
-                '%s ... # will invoke in batches, sizes=%s',
-                cmd, [len(b) for b in itasks_batches])
-
             if remote_mode:
                 cmd = construct_ssh_cmd(cmd, platform)
             else:
                 cmd = ['cylc'] + cmd
 
-            for i, itasks_batch in enumerate(itasks_batches):
-                stdin_files = []
-                job_log_dirs = []
-                for itask in itasks_batch:
-                    if remote_mode:
-                        stdin_files.append(
-                            os.path.expandvars(
-                                get_task_job_job_log(
-                                    suite, itask.point, itask.tdef.name,
-                                    itask.submit_num
-                                )
-                            )
+            # Queue the jobs, the submit pipeline invokes the command in
+            # batches, subject to the platform's job submission limits.
+            jobs = []
+            for itask in sorted(itasks, key=lambda itask: itask.identity):
+                stdin_file = None
+                if remote_mode:
+                    stdin_file = os.path.expandvars(
+                        get_task_job_job_log(
+                            suite, itask.point, itask.tdef.name,
+                            itask.submit_num
                         )
-                    job_log_dirs.append(get_task_job_id(
-                        itask.point, itask.tdef.name, itask.submit_num))
-                    # The job file is now (about to be) used: reset the file
-                    # write flag so that subsequent manual retrigger will
-                    # generate a new job file.
-                    itask.local_job_file_path = None
-                    itask.state.reset(TASK_STATUS_PREPARING)
-                    if itask.state.outputs.has_custom_triggers():
-                        self.suite_db_mgr.put_update_task_outputs(itask)
-
-                self.proc_pool.put_command(
-                    SubProcContext(
-                        self.JOBS_SUBMIT,
-                        cmd + job_log_dirs,
-                        stdin_files=stdin_files,
-                        job_log_dirs=job_log_dirs,
-                    ),
-                    self._submit_task_jobs_callback, [suite, itasks_batch])
+                    )
+                jobs.append((
+                    get_task_job_id(
+                        itask.point, itask.tdef.name, itask.submit_num),
+                    stdin_file,
+                    itask))
+                # The job file is now (about to be) used: reset the file
+                # write flag so that subsequent manual retrigger will
+                # generate a new job file.
+                itask.local_job_file_path = None
+                itask.state.reset(TASK_STATUS_PREPARING)
+                if itask.state.outputs.has_custom_triggers():
+                    self.suite_db_mgr.put_update_task_outputs(itask)
+            self.submit_pipeline.put(
+                platform, cmd, jobs, self._submit_task_jobs_callback, [suite])
         return done_tasks
 
     @staticmethod
@@ -844,15 +852,14 @@ class TaskJobManager:
                 itask, CRITICAL, self.task_events_mgr.EVENT_SUBMIT_FAILED,
                 ctx.timestamp)
 
-    def _prep_submit_task_job(self, suite, itask, check_syntax=True):
+    def _prep_submit_task_job(self, suite, itask):
         """Prepare a task job submission.
 
-        Return itask on a good preparation.
+        Return (local_job_file_path, job_conf) of the job file to write on a
+        good preparation, False on a bad preparation, or None if waiting for
+        host/platform selection.
 
         """
-        if itask.local_job_file_path:
-            return itask
-
         # Handle broadcasts
         overrides = self.task_events_mgr.broadcast_mgr.get_broadcast(
             itask.identity)
@@ -956,16 +963,13 @@ class TaskJobManager:
 
             local_job_file_path = get_task_job_job_log(
                 suite, itask.point, itask.tdef.name, itask.submit_num)
-            self.job_file_writer.write(local_job_file_path, job_conf,
-                                       check_syntax=check_syntax)
         except Exception as exc:
             # Could be a bad command template, IOError, etc
             self._prep_submit_task_job_error(
                 suite, itask, '(prepare job file)', exc)
             return False
-        itask.local_job_file_path = local_job_file_path
 
-        return itask
+        return local_job_file_path, job_conf
 
     def _prep_submit_task_job_error(self, suite, itask, action, exc):
         """Helper for self._prep_submit_task_job. On error."""
@@ -18,7 +18,10 @@
 
 """
 
+from bisect import bisect_left, bisect_right, insort
 from fnmatch import fnmatchcase
+from heapq import merge
+from itertools import islice
 from string import ascii_letters
 import json
 from time import time
@@ -38,6 +41,7 @@ from cylc.flow.task_events_mgr import (
 from cylc.flow.task_id import TaskID
 from cylc.flow.task_job_logs import get_task_job_id
 from cylc.flow.task_proxy import TaskProxy
+from cylc.flow.task_queues import TaskQueueManager
 from cylc.flow.task_state import (
     TASK_STATUSES_ACTIVE,
     TASK_STATUSES_FAILURE,
@@ -57,6 +61,75 @@ from cylc.flow.wallclock import get_current_time_string
 from cylc.flow.platforms import get_platform
 
 
+# Tasks in these states do not hold back the runahead limit.
+TASK_STATUSES_RUNAHEAD_DONE = {
+    TASK_STATUS_FAILED,
+    TASK_STATUS_SUCCEEDED,
+    TASK_STATUS_EXPIRED,
+}
+
+
+class PointCounter:
+    """Count items by cycle point, keeping the points in order.
+
+    Adding or removing an item costs O(log n) point comparisons, plus a list
+    insertion or deletion when a point is added or emptied. The min and max
+    points cost O(1).
+
+    """
+
+    __slots__ = ('counts', 'points')
+
+    def __init__(self):
+        # {point: count}
+        self.counts = {}
+        # sorted points
+        self.points = []
+
+    def __bool__(self):
+        return bool(self.points)
+
+    def __contains__(self, point):
+        return point in self.counts
+
+    def add(self, point):
+        """Add an item at point."""
+        try:
+            self.counts[point] += 1
+        except KeyError:
+            self.counts[point] = 1
+            insort(self.points, point)
+
+    def remove(self, point):
+        """Remove an item at point."""
+        count = self.counts[point] - 1
+        if count:
+            self.counts[point] = count
+        else:
+            del self.counts[point]
+            del self.points[bisect_left(self.points, point)]
+
+    def get_min(self):
+        """Return the minimum point, or None if empty."""
+        if self.points:
+            return self.points[0]
+        return None
+
+    def get_max(self):
+        """Return the maximum point, or None if empty."""
+        if self.points:
+            return self.points[-1]
+        return None
+
+    def iter_from(self, point):
+        """Iterate over the points >= point, in order."""
+        return islice(self.points, bisect_left(self.points, point), None)
+
+    def get_points_to(self, point):
+        """Return a list of the points <= point, in order."""
+        return self.points[:bisect_right(self.points, point)]
+
+
 class FlowLabelMgr:
     """
     Manage flow labels consisting of a string of one or more letters [a-zA-Z].
@@ -168,9 +241,27 @@ class TaskPool:
 
         self.pool = {}
         self.runahead_pool = {}
-        self.myq = {}
-        self.queues = {}
-        self.assign_queues()
+        # Runahead state, kept up to date as tasks are added, released,
+        # removed and change state:
+        # points of tasks in the main and runahead pools
+        self._pool_points = PointCounter()
+        self._rhpool_points = PointCounter()
+        # points of tasks in either pool which hold back the runahead limit
+        self._unfinished_points = PointCounter()
+        # {id: itask} - finished tasks in the runahead pool
+        self._rhpool_finished = {}
+        # has anything which affects runahead release changed?
+        self._runahead_changed = True
+        # Indexes of tasks in the main and runahead pools:
+        # {id: itask} (i.e. by name and point)
+        self.tasks_by_id = {}
+        # {name: {id: itask}}
+        self.tasks_by_name = {}
+        # {(name, point_str, output): {id: itask}}
+        # (by the outputs that task prerequisites depend on)
+        self.tasks_by_prereq = {}
+        self.task_queue_mgr = TaskQueueManager(
+            self.config.cfg['scheduling']['queues'], self.config.Q_DEFAULT)
 
         self.pool_list = []
         self.rhpool_list = []
@@ -213,12 +304,6 @@ class TaskPool:
         else:
             return False
 
-    def assign_queues(self):
-        """self.myq[taskname] = qfoo"""
-        self.myq.clear()
-        for queue, qconfig in self.config.cfg['scheduling']['queues'].items():
-            self.myq.update((name, queue) for name in qconfig['members'])
-
     def add_to_runahead_pool(self, itask, is_new=True):
         """Add a new task to the runahead pool if possible.
 
@@ -231,6 +316,14 @@ class TaskPool:
         self.runahead_pool.setdefault(itask.point, OrderedDict())
         self.runahead_pool[itask.point][itask.identity] = itask
         self.rhpool_changed = True
+        self._add_to_indexes(itask)
+        self._rhpool_points.add(itask.point)
+        if itask.state.status in TASK_STATUSES_RUNAHEAD_DONE:
+            self._rhpool_finished[itask.identity] = itask
+        else:
+            self._unfinished_points.add(itask.point)
+        itask.state.on_change = self._on_task_state_change
+        self._runahead_changed = True
 
         # add row to "task_states" table
         if is_new:
@@ -245,6 +338,68 @@ class TaskPool:
                 self.suite_db_mgr.put_insert_task_outputs(itask)
         return itask
 
+    def _add_to_indexes(self, itask):
+        """Add a task to the pool indexes."""
+        self.tasks_by_id[itask.identity] = itask
+        self.tasks_by_name.setdefault(
+            itask.tdef.name, {})[itask.identity] = itask
+        for message in self._get_prereq_messages(itask):
+            self.tasks_by_prereq.setdefault(
+                message, {})[itask.identity] = itask
+
+    def _remove_from_indexes(self, itask):
+        """Remove a task from the pool indexes."""
+        if self.tasks_by_id.get(itask.identity) is not itask:
+            return
+        del self.tasks_by_id[itask.identity]
+        itasks = self.tasks_by_name[itask.tdef.name]
+        del itasks[itask.identity]
+        if not itasks:
+            del self.tasks_by_name[itask.tdef.name]
+        for message in self._get_prereq_messages(itask):
+            itasks = self.tasks_by_prereq.get(message)
+            if itasks is None:
+                continue
+            itasks.pop(itask.identity, None)
+            if not itasks:
+                del self.tasks_by_prereq[message]
+
+    def _on_task_state_change(self, task_state, prev_status, prev_is_held):
+        """Update runahead state (and queues) on a task state change."""
+        itask = self.tasks_by_id.get(task_state.identity)
+        if itask is None or itask.state is not task_state:
+            return
+        was_done = prev_status in TASK_STATUSES_RUNAHEAD_DONE
+        is_done = task_state.status in TASK_STATUSES_RUNAHEAD_DONE
+        if was_done != is_done:
+            if is_done:
+                self._unfinished_points.remove(itask.point)
+            else:
+                self._unfinished_points.add(itask.point)
+            self._runahead_changed = True
+        if itask.identity in self.runahead_pool.get(itask.point, ()):
+            if is_done:
+                self._rhpool_finished[itask.identity] = itask
+            else:
+                self._rhpool_finished.pop(itask.identity, None)
+            # (status or prerequisites changed)
+            self._runahead_changed = True
+        else:
+            self.task_queue_mgr.on_change(
+                task_state, prev_status, prev_is_held)
+
+    @staticmethod
+    def _get_prereq_messages(itask):
+        """Return the (name, point_str, output) messages itask depends on."""
+        return {
+            message
+            for prereqs in (
+                itask.state.prerequisites,
+                itask.state.suicide_prerequisites)
+            for prereq in prereqs
+            for message in prereq.satisfied
+        }
+
     def release_runahead_tasks(self):
         """Release tasks from the runahead pool to the main pool.
 
@@ -257,44 +412,21 @@ class TaskPool:
         Return True if any tasks released, else False.
 
         """
+        if not self.runahead_pool or not self._runahead_changed:
+            return False
+        self._runahead_changed = False
         released = False
-        if not self.runahead_pool:
-            return released
 
         # Any finished tasks can be released immediately (this can happen at
         # restart when all tasks are initially loaded into the runahead pool).
-        for itask_id_maps in self.runahead_pool.copy().values():
-            for itask in itask_id_maps.copy().values():
-                if itask.state(
-                    TASK_STATUS_FAILED,
-                    TASK_STATUS_SUCCEEDED,
-                    TASK_STATUS_EXPIRED
-                ):
-                    self.release_runahead_task(itask)
-                    released = True
-
-        points = []
-        for point, itasks in sorted(
-                self.get_tasks_by_point(incl_runahead=True).items()):
-            has_unfinished_itasks = False
-            for itask in itasks:
-                if not itask.state(
-                    TASK_STATUS_FAILED,
-                    TASK_STATUS_SUCCEEDED,
-                    TASK_STATUS_EXPIRED
-                ):
-                    has_unfinished_itasks = True
-                    break
-            if not points and not has_unfinished_itasks:
-                # We need to begin with an unfinished cycle point.
-                continue
-            points.append(point)
-
-        if not points:
-            return False
+        for itask in list(self._rhpool_finished.values()):
+            self.release_runahead_task(itask)
+            released = True
 
         # Get the earliest point with unfinished tasks.
-        runahead_base_point = min(points)
+        runahead_base_point = self._unfinished_points.get_min()
+        if runahead_base_point is None:
+            return released
 
         if isinstance(self.custom_runahead_limit, IntegerInterval):
             number_limit = int(self.custom_runahead_limit)
@@ -303,37 +435,40 @@ class TaskPool:
             number_limit = None
             runahead_time_limit = self.custom_runahead_limit
 
-        # Get all cycling points possible after the runahead base point.
-        if (self._prev_runahead_base_point is not None and
-                runahead_base_point == self._prev_runahead_base_point):
-            # Cache for speed.
-            sequence_points = self._prev_runahead_sequence_points
-        else:
-            sequence_points = []
-            for sequence in self.config.sequences:
-                seq_point = sequence.get_next_point(runahead_base_point)
-                count = 1
-                while seq_point is not None:
-                    if number_limit is None:
-                        if (seq_point > runahead_base_point +
-                                runahead_time_limit):
-                            break
-                    else:
-                        if count > number_limit:
-                            break
+        if number_limit is not None:
+            # Get all cycling points possible after the runahead base point.
+            if (self._prev_runahead_base_point is not None and
+                    runahead_base_point == self._prev_runahead_base_point):
+                # Cache for speed.
+                sequence_points = self._prev_runahead_sequence_points
+            else:
+                sequence_points = set()
+                for sequence in self.config.sequences:
+                    seq_point = sequence.get_next_point(runahead_base_point)
+                    count = 1
+                    while seq_point is not None and count <= number_limit:
                         count += 1
-                    sequence_points.append(seq_point)
-                    seq_point = sequence.get_next_point(seq_point)
-            sequence_points = set(sequence_points)
-            self._prev_runahead_sequence_points = sequence_points
-            self._prev_runahead_base_point = runahead_base_point
-
-        points = set(points).union(sequence_points)
+                        sequence_points.add(seq_point)
+                        seq_point = sequence.get_next_point(seq_point)
+                sequence_points = sorted(sequence_points)
+                self._prev_runahead_sequence_points = sequence_points
+                self._prev_runahead_base_point = runahead_base_point
 
-        if number_limit is not None:
             # Calculate which tasks to release based on a maximum number of
-            # active cycle points (active meaning non-finished tasks).
-            latest_allowed_point = sorted(points)[:number_limit][-1]
+            # active cycle points (active meaning non-finished tasks): the
+            # first N of the points in the pool from the base point on, and
+            # the sequence points.
+            points = []
+            for point in merge(
+                self._pool_points.iter_from(runahead_base_point),
+                self._rhpool_points.iter_from(runahead_base_point),
+                sequence_points
+            ):
+                if not points or point != points[-1]:
+                    points.append(point)
+                    if len(points) >= number_limit:
+                        break
+            latest_allowed_point = points[-1]
             if self.max_future_offset is not None:
                 # For the first N points, release their future trigger tasks.
                 latest_allowed_point += self.max_future_offset
@@ -344,7 +479,8 @@ class TaskPool:
 
             if (self._prev_runahead_base_point is None or
                     self._prev_runahead_base_point != runahead_base_point):
-                if runahead_time_limit < self.max_future_offset:
+                if (self.max_future_offset is not None and
+                        runahead_time_limit < self.max_future_offset):
                     LOG.warning(
                         f'runahead limit "{runahead_time_limit}" '
                         'is less than future triggering offset '
@@ -353,14 +489,13 @@ class TaskPool:
         if self.stop_point and latest_allowed_point > self.stop_point:
             latest_allowed_point = self.stop_point
 
-        for point, itask_id_map in self.runahead_pool.copy().items():
-            if point <= latest_allowed_point:
-                for itask in itask_id_map.copy().values():
-                    if itask.is_task_prereqs_not_done():
-                        # Only release if all prerequisites are satisfied.
-                        continue
-                    self.release_runahead_task(itask)
-                    released = True
+        for point in self._rhpool_points.get_points_to(latest_allowed_point):
+            for itask in list(self.runahead_pool[point].values()):
+                if itask.is_task_prereqs_not_done():
+                    # Only release if all prerequisites are satisfied.
+                    continue
+                self.release_runahead_task(itask)
+                released = True
         return released
 
     def load_abs_outputs_for_restart(self, row_idx, row):
@@ -527,14 +662,12 @@ class TaskPool:
         - no parents to do it
         - has absolute triggers (these are satisfied already by definition)
         """
-        try:
-            queue = self.myq[itask.tdef.name]
-        except KeyError:
-            queue = self.config.Q_DEFAULT
-        self.queues.setdefault(queue, OrderedDict())
-        self.queues[queue][itask.identity] = itask
+        self.task_queue_mgr.add(itask)
+        # (forwards state changes to the queue manager)
+        itask.state.on_change = self._on_task_state_change
         self.pool.setdefault(itask.point, {})
         self.pool[itask.point][itask.identity] = itask
+        self._pool_points.add(itask.point)
         self.pool_changed = True
         self.pool_changes.append(itask)
         LOG.debug("[%s] -released to the task pool", itask)
@@ -550,6 +683,8 @@ class TaskPool:
         del self.runahead_pool[itask.point][itask.identity]
         if not self.runahead_pool[itask.point]:
             del self.runahead_pool[itask.point]
+        self._rhpool_points.remove(itask.point)
+        self._rhpool_finished.pop(itask.identity, None)
         self.rhpool_changed = True
         if itask.tdef.max_future_prereq_offset is not None:
             self.set_max_future_offset()
@@ -595,17 +730,25 @@ class TaskPool:
                 # In main pool: remove from pool and queues.
                 if not self.pool[itask.point]:
                     del self.pool[itask.point]
+                self._pool_points.remove(itask.point)
                 self.pool_changed = True
-                if itask.tdef.name in self.myq:  # A reload can remove a task
-                    del self.queues[self.myq[itask.tdef.name]][itask.identity]
+                self.task_queue_mgr.remove(itask)
                 if itask.tdef.max_future_prereq_offset is not None:
                     self.set_max_future_offset()
         else:
             # In runahead pool.
             if not self.runahead_pool[itask.point]:
                 del self.runahead_pool[itask.point]
+            self._rhpool_points.remove(itask.point)
+            self._rhpool_finished.pop(itask.identity, None)
+            itask.state.on_change = None
             self.rhpool_changed = True
 
+        if itask.state.status not in TASK_STATUSES_RUNAHEAD_DONE:
+            self._unfinished_points.remove(itask.point)
+        self._runahead_changed = True
+        self._remove_from_indexes(itask)
+
         # Notify the data-store manager of their removal
         # (the manager uses window boundary tracking for pruning).
         self.data_store_mgr.remove_pool_node(itask.tdef.name, itask.point)
@@ -623,9 +766,7 @@ class TaskPool:
         """Return a list of task proxies in the main task pool."""
         if self.pool_changed:
             self.pool_changed = False
-            self.pool_list = []
-            for itask_id_maps in self.queues.values():
-                self.pool_list.extend(list(itask_id_maps.values()))
+            self.pool_list = self.task_queue_mgr.get_tasks()
         return self.pool_list
 
     def get_rh_tasks(self):
@@ -662,13 +803,22 @@ class TaskPool:
 
         Return None if task does not exist.
         """
-        for itask_ids in (
-                list(self.queues.values())
-                + list(self.runahead_pool.values())):
-            try:
-                return itask_ids[id_]
-            except KeyError:
-                pass
+        return self.tasks_by_id.get(id_)
+
+    def get_pool_task_by_id(self, id_):
+        """Return task by ID if in the main pool.
+
+        Return None if task does not exist or is in the runahead pool.
+        """
+        itask = self.tasks_by_id.get(id_)
+        if itask is not None and id_ in self.pool.get(itask.point, ()):
+            return itask
+        return None
+
+    def get_tasks_by_prereq(self, name, point, output):
+        """Return tasks with a prerequisite on the output of name.point."""
+        return list(self.tasks_by_prereq.get((name, str(point), output), {})
+                    .values())
 
     def get_ready_tasks(self):
         """
@@ -691,81 +841,19 @@ class TaskPool:
         Return the tasks that are dequeued.
 
         """
-        ready_tasks = []
-        qconfig = self.config.cfg['scheduling']['queues']
-
-        for queue in self.queues:
-            # 1) queue unqueued tasks that are ready to run or manually forced
-            for itask in list(self.queues[queue].values()):
-                if not itask.state(TASK_STATUS_QUEUED):
-                    # only need to check that unqueued tasks are ready
-                    if itask.is_ready():
-                        # queue the task
-                        itask.state.reset(TASK_STATUS_QUEUED)
-                        itask.reset_manual_trigger()
-                        # move the task to the back of the queue
-                        self.queues[queue][itask.identity] = \
-                            self.queues[queue].pop(itask.identity)
-
-            # 2) submit queued tasks if manually forced or not queue-limited
-            n_active = 0
-            n_release = 0
-            n_limit = qconfig[queue]['limit']
-            tasks = list(self.queues[queue].values())
-
-            # 2.1) count active tasks and compare to queue limit
-            if n_limit:
-                for itask in tasks:
-                    if itask.state(
-                            TASK_STATUS_PREPARING,
-                            TASK_STATUS_SUBMITTED,
-                            TASK_STATUS_RUNNING,
-                            is_held=False
-                    ):
-                        n_active += 1
-                n_release = n_limit - n_active
-
-            # 2.2) release queued tasks if not limited or if manually forced
-            for itask in tasks:
-                if not itask.state(TASK_STATUS_QUEUED):
-                    # (Excludes tasks remaining TASK_STATUS_PREPARING because
-                    # job submission has been stopped with 'cylc shutdown').
-                    continue
-                if itask.manual_trigger or not n_limit or n_release > 0:
-                    # manual release, or no limit, or not currently limited
-                    n_release -= 1
-                    ready_tasks.append(itask)
-                    itask.reset_manual_trigger()
-                    # (Set to 'ready' is done just before job submission).
-                # else leaved queued
-
-        LOG.debug('%d task(s) de-queued' % len(ready_tasks))
-
-        return ready_tasks
+        return self.task_queue_mgr.release_tasks()
 
     def get_min_point(self):
         """Return the minimum cycle point currently in the pool."""
-        cycles = list(self.pool)
-        minc = None
-        if cycles:
-            minc = min(cycles)
-        return minc
+        return self._pool_points.get_min()
 
     def get_max_point(self):
         """Return the maximum cycle point currently in the pool."""
-        cycles = list(self.pool)
-        maxc = None
-        if cycles:
-            maxc = max(cycles)
-        return maxc
+        return self._pool_points.get_max()
 
     def get_max_point_runahead(self):
         """Return the maximum cycle point currently in the runahead pool."""
-        cycles = list(self.runahead_pool)
-        maxc = None
-        if cycles:
-            maxc = max(cycles)
-        return maxc
+        return self._rhpool_points.get_max()
 
     def set_max_future_offset(self):
         """Calculate the latest required future trigger offset."""
@@ -775,6 +863,8 @@ class TaskPool:
                     (max_offset is None or
                      itask.tdef.max_future_prereq_offset > max_offset)):
                 max_offset = itask.tdef.max_future_prereq_offset
+        if max_offset != self.max_future_offset:
+            self._runahead_changed = True
         self.max_future_offset = max_offset
 
     def set_do_reload(self, config):
@@ -789,6 +879,8 @@ class TaskPool:
         self.custom_runahead_limit = self.config.get_custom_runahead_limit()
         self.max_num_active_cycle_points = (
             self.config.get_max_num_active_cycle_points())
+        self._prev_runahead_base_point = None
+        self._runahead_changed = True
 
         # find any old tasks that have been removed from the suite
         old_task_name_list = self.task_name_list
@@ -803,17 +895,7 @@ class TaskPool:
         self.config.adopt_orphans(self.orphans)
 
         # reassign live tasks from the old queues to the new.
-        # self.queues[queue][id_] = task
-        self.assign_queues()
-        new_queues = {}
-        for queue in self.queues:
-            for id_, itask in self.queues[queue].items():
-                if itask.tdef.name not in self.myq:
-                    continue
-                key = self.myq[itask.tdef.name]
-                new_queues.setdefault(key, OrderedDict())
-                new_queues[key][id_] = itask
-        self.queues = new_queues
+        self.task_queue_mgr.configure(self.config.cfg['scheduling']['queues'])
 
     def reload_taskdefs(self):
         """Reload the definitions of task proxies in the pool.
@@ -862,7 +944,10 @@ class TaskPool:
                         itask.point,
                         itask.flow_label, itask.state.status,
                         submit_num=itask.submit_num))
+                # (the successor inherits the old prerequisites)
+                self._remove_from_indexes(new_task)
                 itask.copy_to_reload_successor(new_task)
+                self._add_to_indexes(new_task)
                 LOG.info('[%s] -reloaded task definition', itask)
                 if itask.state(*TASK_STATUSES_ACTIVE):
                     LOG.warning(
@@ -878,6 +963,7 @@ class TaskPool:
             return
         LOG.info("Setting stop cycle point: %s", stop_point)
         self.stop_point = stop_point
+        self._runahead_changed = True
         for itask in self.get_tasks():
             # check cycle stop or hold conditions
             if (
@@ -1100,7 +1186,12 @@ class TaskPool:
             if c_task is not None:
                 # Update downstream prerequisites directly.
                 if is_abs:
-                    tasks, _ = self.filter_task_proxies([c_name])
+                    # Every instance of the child which depends on it.
+                    tasks = [
+                        t for t in self.get_tasks_by_prereq(
+                            itask.tdef.name, itask.point, output)
+                        if t.tdef.name == c_name
+                    ]
                 else:
                     tasks = [c_task]
                 for t in tasks:
@@ -1317,6 +1408,7 @@ class TaskPool:
             if itask is not None:
                 # (If None, spawner reports cycle bounds errors).
                 itask.manual_trigger = True
+                self.task_queue_mgr.set_manual_trigger(itask)
                 itask.state.reset(TASK_STATUS_WAITING)
                 LOG.critical('setting %s ready to run', itask)
                 itask.state.set_prerequisites_all_satisfied()
@@ -1418,7 +1510,12 @@ class TaskPool:
                         # point_str may be a glob
                         pass
                 tasks_found = False
-                for itask in self.get_all_tasks():
+                if name_str in self.task_name_list:
+                    # A task name (not a family or glob): use the index.
+                    candidates = self.tasks_by_name.get(name_str, {}).values()
+                else:
+                    candidates = self.get_all_tasks()
+                for itask in candidates:
                     nss = itask.tdef.namespace_hierarchy
                     if (fnmatchcase(str(itask.point), point_str) and
                             (not status or itask.state.status == status) and
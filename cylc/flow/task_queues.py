@@ -0,0 +1,243 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Internal queues, to limit the number of active tasks.
+
+Tasks in the main task pool are members of exactly one queue. Queue
+bookkeeping is incremental: the manager listens for task state changes (via
+`TaskState.on_change`, or `TaskQueueManager.on_change` if another listener
+forwards them) to maintain:
+
+* A count of active (preparing, submitted, running) members of each queue.
+* The queued members of each queue, in the order they were queued.
+* The set of unqueued tasks which need checking to see if they are ready to
+  run. Tasks enter this set when their status, held state or prerequisites
+  change. Tasks waiting only on time (clock triggers, xtriggers, external
+  triggers) stay in it until they are ready; tasks waiting on other tasks
+  leave it until their prerequisites change.
+
+So releasing tasks costs O(tasks released + tasks to check) rather than
+O(tasks in the pool).
+
+"""
+
+from cylc.flow.parsec.OrderedDict import OrderedDict
+
+from cylc.flow import LOG
+from cylc.flow.task_id import TaskID
+from cylc.flow.task_state import (
+    TASK_STATUS_PREPARING,
+    TASK_STATUS_QUEUED,
+    TASK_STATUS_RUNNING,
+    TASK_STATUS_SUBMITTED,
+    TASK_STATUS_WAITING,
+)
+
+
+TASK_STATUSES_QUEUE_ACTIVE = {
+    TASK_STATUS_PREPARING,
+    TASK_STATUS_SUBMITTED,
+    TASK_STATUS_RUNNING,
+}
+
+
+def is_queue_active(status, is_held):
+    """Return True if a task in this state counts against its queue limit."""
+    return status in TASK_STATUSES_QUEUE_ACTIVE and not is_held
+
+
+class TaskQueueManager:
+    """Manage the internal queues of the task pool.
+
+    Args:
+        qconfig (dict):
+            The [scheduling][queues] configuration.
+        default_queue (str):
+            The queue for tasks which are not members of any other queue.
+
+    """
+
+    def __init__(self, qconfig, default_queue):
+        self.default_queue = default_queue
+        self.limits = {}
+        self.myq = {}
+        # {queue: {id: itask}}
+        self.members = {}
+        # {queue: number of active members}
+        self.n_active = {}
+        # {queue: OrderedDict(id: itask)} - in the order queued
+        self.queued = {}
+        # {queue: {id: itask}} - manually triggered queued members
+        self.forced = {}
+        # {id: itask} - unqueued members to check for readiness
+        self.to_check = {}
+        self.configure(qconfig)
+
+    def configure(self, qconfig):
+        """(Re)configure queues, and re-assign any existing members."""
+        itasks = [
+            itask
+            for members in self.members.values()
+            for itask in members.values()
+        ]
+        self.limits = {
+            queue: config['limit'] for queue, config in qconfig.items()}
+        self.myq.clear()
+        for queue, config in qconfig.items():
+            self.myq.update((name, queue) for name in config['members'])
+        self.members = {queue: OrderedDict() for queue in self.limits}
+        self.n_active = dict.fromkeys(self.limits, 0)
+        self.queued = {queue: OrderedDict() for queue in self.limits}
+        self.forced = {queue: {} for queue in self.limits}
+        self.to_check.clear()
+        for itask in itasks:
+            self.add(itask)
+
+    def get_queue(self, name):
+        """Return the queue a task name belongs to."""
+        return self.myq.get(name, self.default_queue)
+
+    def get_tasks(self):
+        """Return a list of all members of all queues."""
+        return [
+            itask
+            for members in self.members.values()
+            for itask in members.values()
+        ]
+
+    def add(self, itask):
+        """Add a task to its queue."""
+        queue = self.get_queue(itask.tdef.name)
+        self.members.setdefault(queue, OrderedDict())
+        self.n_active.setdefault(queue, 0)
+        self.queued.setdefault(queue, OrderedDict())
+        self.forced.setdefault(queue, {})
+        self.limits.setdefault(queue, 0)
+        self.members[queue][itask.identity] = itask
+        if is_queue_active(itask.state.status, itask.state.is_held):
+            self.n_active[queue] += 1
+        itask.state.on_change = self.on_change
+        self._update(queue, itask)
+
+    def remove(self, itask):
+        """Remove a task from its queue."""
+        queue = self.get_queue(itask.tdef.name)
+        if self.members.get(queue, {}).pop(itask.identity, None) is None:
+            return
+        itask.state.on_change = None
+        if is_queue_active(itask.state.status, itask.state.is_held):
+            self.n_active[queue] -= 1
+        self.queued[queue].pop(itask.identity, None)
+        self.forced[queue].pop(itask.identity, None)
+        self.to_check.pop(itask.identity, None)
+
+    def on_change(self, task_state, prev_status, prev_is_held):
+        """Update bookkeeping on a change of state of a member."""
+        id_ = task_state.identity
+        queue = self.get_queue(TaskID.split(id_)[0])
+        itask = self.members.get(queue, {}).get(id_)
+        if itask is None:
+            return
+        was_active = is_queue_active(prev_status, prev_is_held)
+        is_active = is_queue_active(task_state.status, task_state.is_held)
+        if was_active != is_active:
+            self.n_active[queue] += 1 if is_active else -1
+        self._update(queue, itask)
+
+    def _update(self, queue, itask):
+        """Place a member in the queued or to-check sets as appropriate."""
+        id_ = itask.identity
+        if itask.state(TASK_STATUS_QUEUED):
+            self.to_check.pop(id_, None)
+            if id_ not in self.queued[queue]:
+                self.queued[queue][id_] = itask
+            if itask.manual_trigger:
+                self.forced[queue][id_] = itask
+        else:
+            self.queued[queue].pop(id_, None)
+            self.forced[queue].pop(id_, None)
+            self.to_check[id_] = itask
+
+    def set_manual_trigger(self, itask):
+        """Register a change to the manual trigger flag of a member."""
+        queue = self.get_queue(itask.tdef.name)
+        if itask.identity in self.members.get(queue, {}):
+            self._update(queue, itask)
+
+    def release_tasks(self):
+        """Queue tasks that are ready, return queued tasks to release.
+
+        1) Queue unqueued tasks that are ready to run (prerequisites
+        satisfied, clock-trigger time up) or if their manual trigger flag is
+        set.
+
+        2) Release queued tasks if their queue limit has not been reached or
+        their manual trigger flag is set.
+
+        Released tasks remain in the queued state (and in the queue) until
+        their status changes (e.g. to preparing on job submission).
+
+        """
+        # 1) queue unqueued tasks that are ready to run or manually forced
+        for id_, itask in list(self.to_check.items()):
+            if itask.is_ready():
+                # queue the task (moves it to the back of the queue)
+                itask.reset_manual_trigger()
+                itask.state.reset(TASK_STATUS_QUEUED)
+            elif not self._is_waiting_on_time(itask):
+                # re-checked on state or prerequisite change
+                del self.to_check[id_]
+
+        # 2) release queued tasks if manually forced or not queue-limited
+        ready_tasks = []
+        for queue, queued in self.queued.items():
+            if not queued:
+                continue
+            released = set()
+            for itask in list(self.forced[queue].values()):
+                released.add(itask.identity)
+                ready_tasks.append(itask)
+                itask.reset_manual_trigger()
+            self.forced[queue].clear()
+            n_limit = self.limits[queue]
+            if n_limit:
+                n_release = n_limit - self.n_active[queue] - len(released)
+            for id_, itask in queued.items():
+                if n_limit:
+                    if n_release <= 0:
+                        break
+                    n_release -= 1
+                if id_ not in released:
+                    ready_tasks.append(itask)
+
+        LOG.debug('%d task(s) de-queued' % len(ready_tasks))
+        return ready_tasks
+
+    @staticmethod
+    def _is_waiting_on_time(itask):
+        """Return True if itask may become ready with time alone.
+
+        I.e. it is waiting only on clock triggers, xtriggers or external
+        triggers (which are not notified), or on a retry delay.
+
+        """
+        if itask.state.is_held:
+            return False
+        if itask.state.status in itask.try_timers:
+            return True
+        return (
+            itask.state(TASK_STATUS_WAITING)
+            and itask.state.prerequisites_all_satisfied()
+        )
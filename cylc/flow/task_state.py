@@ -190,6 +190,9 @@ class TaskState:
             Has the status been updated since previous update?
         .kill_failed (boolean):
             Has a job kill attempt failed since previous status change?
+        .on_change (callable):
+            Called with (task_state, previous_status, previous_is_held) when
+            the status, held state or prerequisites change (or None).
         .outputs (cylc.flow.task_outputs.TaskOutputs):
             Known outputs of the task.
         .prerequisites (list<cylc.flow.prerequisite.Prerequisite>):
@@ -215,6 +218,7 @@ class TaskState:
         "identity",
         "is_updated",
         "kill_failed",
+        "on_change",
         "outputs",
         "prerequisites",
         "status",
@@ -231,6 +235,7 @@ class TaskState:
         self.is_held = is_held
         self.is_updated = False
         self.time_updated = None
+        self.on_change = None
 
         self._is_satisfied = None
         self._suicide_is_satisfied = None
@@ -294,11 +299,20 @@ class TaskState:
 
     def satisfy_me(self, all_task_outputs):
         """Attempt to get my prerequisites satisfied."""
+        changed = False
         for prereqs in [self.prerequisites, self.suicide_prerequisites]:
             for prereq in prereqs:
                 if prereq.satisfy_me(all_task_outputs):
                     self._is_satisfied = None
                     self._suicide_is_satisfied = None
+                    changed = True
+        if changed:
+            self._notify_change(self.status, self.is_held)
+
+    def _notify_change(self, prev_status, prev_is_held):
+        """Call self.on_change, if set."""
+        if self.on_change is not None:
+            self.on_change(self, prev_status, prev_is_held)
 
     def xtriggers_all_satisfied(self):
         """Return True if all xtriggers are satisfied."""
@@ -340,12 +354,14 @@ class TaskState:
         for prereq in self.prerequisites:
             prereq.set_satisfied()
         self._is_satisfied = None
+        self._notify_change(self.status, self.is_held)
 
     def set_prerequisites_not_satisfied(self):
         """Reset prerequisites."""
         for prereq in self.prerequisites:
             prereq.set_not_satisfied()
         self._is_satisfied = None
+        self._notify_change(self.status, self.is_held)
 
     def prerequisites_dump(self, list_prereqs=False):
         """Dump prerequisites."""
@@ -407,6 +423,7 @@ class TaskState:
         self.time_updated = get_current_time_string()
         self.is_updated = True
         LOG.debug("[%s] -%s => %s", self.identity, prev_message, str(self))
+        self._notify_change(*current_status)
 
         if is_held:
             # only reset task outputs if not setting task to held
@@ -22,7 +22,10 @@ import urwid
 from urwid import html_fragment
 from urwid.wimp import SelectableIcon
 
+from cylc.flow.data_messages_pb2 import AllDeltas
+from cylc.flow.data_store_mgr import ALL_DELTAS
 from cylc.flow.network.client import SuiteRuntimeClient
+from cylc.flow.network.subscriber import WorkflowSubscriber
 from cylc.flow.exceptions import (
     ClientError,
     ClientTimeout,
@@ -34,9 +37,6 @@ from cylc.flow.task_state import (
     TASK_STATUS_RUNNING,
     TASK_STATUS_FAILED,
 )
-from cylc.flow.tui.data import (
-    QUERY
-)
 import cylc.flow.tui.overlay as overlay
 from cylc.flow.tui import (
     BINDINGS,
@@ -45,12 +45,13 @@ from cylc.flow.tui import (
     JOB_COLOURS,
     SUITE_COLOURS,
 )
+from cylc.flow.tui.store import TuiStore
 from cylc.flow.tui.tree import (
+    TuiTree,
     find_closest_focus,
     translate_collapsing
 )
 from cylc.flow.tui.util import (
-    compute_tree,
     dummy_flow,
     get_task_status_summary,
     get_workflow_status_str,
@@ -164,30 +165,79 @@ class TuiNode(urwid.TreeNode):
 
 
 class TuiParentNode(urwid.ParentNode):
-    """Data storage object for interior/parent nodes."""
+    """Data storage object for interior/parent nodes.
+
+    Child nodes are keyed by their ids (rather than their indices) so that
+    the nodes (and widgets) urwid has cached remain valid as the tree is
+    patched.
+
+    Arguments:
+        registry (dict):
+            Nodes register themselves in this dict as
+            ``{(type_, id_): node}``, shared by all nodes of the tree (it
+            defaults to the registry of the parent node).
+
+    """
+
+    def __init__(self, value, parent=None, key=None, depth=None,
+                 registry=None):
+        urwid.ParentNode.__init__(
+            self, value, parent=parent, key=key, depth=depth)
+        # {key: child value}
+        self._child_values = {}
+        # {key: index}
+        self._child_indices = {}
+        if registry is None and parent is not None:
+            registry = parent.registry
+        self.registry = registry
+        if registry is not None:
+            registry[(value['type_'], value['id_'])] = self
 
     def load_widget(self):
         return TuiWidget(self)
 
     def load_child_keys(self):
-        # Note: keys are really indices.
-        data = self.get_value()
-        return range(len(data['children']))
+        self._child_values = {
+            child['id_']: child
+            for child in self.get_value()['children']
+        }
+        keys = list(self._child_values)
+        self._child_indices = {key: index for index, key in enumerate(keys)}
+        return keys
+
+    def get_child_index(self, key):
+        # (urwid searches the list of keys)
+        self.get_child_keys()
+        return self._child_indices.get(key)
 
     def load_child_node(self, key):
         """Return either an TuiNode or TuiParentNode"""
-        childdata = self.get_value()['children'][key]
+        self.get_child_keys()
+        childdata = self._child_values[key]
+        kwargs = {}
         if 'children' in childdata:
             childclass = TuiParentNode
+            kwargs['registry'] = self.registry
         else:
             childclass = TuiNode
         return childclass(
             childdata,
             parent=self,
             key=key,
-            depth=self.get_depth() + 1
+            depth=self.get_depth() + 1,
+            **kwargs
         )
 
+    def reload_children(self):
+        """Update the child keys after the children have changed.
+
+        Drops cached child nodes which have been removed (or replaced).
+        """
+        self.get_child_keys(reload=True)
+        for key, child in list(self._children.items()):
+            if child.get_value() is not self._child_values.get(key):
+                del self._children[key]
+
 
 class TuiApp:
     """An application to display a single Cylc workflow.
@@ -205,6 +255,8 @@ class TuiApp:
 
     UPDATE_INTERVAL = 1
     CLIENT_TIMEOUT = 1
+    # published topics to subscribe to
+    TOPICS = [ALL_DELTAS.encode('utf-8'), b'shutdown']
 
     palette = [
         ('head', FORE, BACK),
@@ -227,14 +279,23 @@ class TuiApp:
     def __init__(self, reg, screen=None):
         self.reg = reg
         self.client = None
+        self.subscriber = None
+        # local mirror of the workflow's data-store
+        self.store = TuiStore()
+        # the tree of nodes built from it
+        self.tree = None
+        # {(type_, id_): TuiParentNode} of the nodes urwid has loaded
+        self.node_registry = {}
         self.loop = None
         self.screen = None
         self.stack = 0
         self.tree_walker = None
 
         # create the template
-        topnode = TuiParentNode(dummy_flow({'id': 'Loading...'}))
-        self.listbox = urwid.TreeListBox(urwid.TreeWalker(topnode))
+        topnode = TuiParentNode(
+            dummy_flow({'id': 'Loading...'}), registry=self.node_registry)
+        self.tree_walker = urwid.TreeWalker(topnode)
+        self.listbox = urwid.TreeListBox(self.tree_walker)
         header = urwid.Text('\n')
         footer = urwid.AttrWrap(
             # urwid.Text(self.FOOTER_TEXT),
@@ -266,7 +327,10 @@ class TuiApp:
         )
         # schedule the first update
         self.loop.set_alarm_in(0, self._update)
-        self.loop.run()
+        try:
+            self.loop.run()
+        finally:
+            self.disconnect()
 
     def unhandled_input(self, key):
         """Catch key presses, uncaught events are passed down the chain."""
@@ -283,13 +347,16 @@ class TuiApp:
                 return
 
     def get_snapshot(self):
-        """Contact the workflow, return a tree structure
+        """Contact the workflow, (re)load the data-store mirror.
+
+        Subscribes to the deltas the workflow publishes before taking the
+        snapshot so that no changes are missed.
 
         In the event of error contacting the suite the
         message is written to this Widget's header.
 
         Returns:
-            dict if successful, else False
+            dict - The top-level workflow node if successful, else False.
 
         """
         try:
@@ -298,47 +365,88 @@ class TuiApp:
                     self.reg,
                     timeout=self.CLIENT_TIMEOUT
                 )
-            data = self.client(
-                'graphql',
-                {
-                    'request_string': QUERY,
-                    'variables': {
-                        # list of task states we want to see
-                        'taskStates': [
-                            state
-                            for state, is_on in self.filter_states.items()
-                            if is_on
-                        ]
-                    }
-                }
-            )
+            if not self.subscriber:
+                self.subscriber = WorkflowSubscriber(
+                    self.reg,
+                    topics=self.TOPICS
+                )
+            self.store.load(self.client('pb_entire_workflow'))
         except SuiteStopped:
-            self.client = None
-            return dummy_flow({
-                'name': self.reg,
-                'id': self.reg,
-                'status': 'stopped',
-                'stateTotals': {}
-            })
+            return self.get_stopped_flow()
         except (ClientError, ClientTimeout) as exc:
             # catch network / client errors
             self.set_header(('suite_error', str(exc)))
             return False
+        return self.build_tree()
 
-        if isinstance(data, list):
-            # catch GraphQL errors
-            try:
-                message = data[0]['error']['message']
-            except (IndexError, KeyError):
-                message = str(data)
-            self.set_header(('suite_error', message))
-            return False
+    def get_changes(self):
+        """Apply the deltas published since last called to the mirror.
 
-        if len(data['workflows']) != 1:
-            # multiple workflows in returned data - shouldn't happen
-            raise ValueError()
+        Returns:
+            dict - The ids of the data-store elements which have changed,
+            as ``{key: {id, ...}}``, or None if the mirror needs reloading
+            (see ``TuiStore.apply``) or the workflow has stopped.
 
-        return compute_tree(data['workflows'][0])
+        """
+        changes = {}
+        for topic, msg in self.subscriber.get_pending():
+            if topic == b'shutdown':
+                self.disconnect()
+                return None
+            delta = AllDeltas()
+            delta.ParseFromString(msg)
+            delta_changes = self.store.apply(delta)
+            if delta_changes is None:
+                return None
+            for key, ids in delta_changes.items():
+                changes.setdefault(key, set()).update(ids)
+        return changes
+
+    def get_stopped_flow(self):
+        """Disconnect from the workflow, return a tree for a stopped one."""
+        self.disconnect()
+        return dummy_flow({
+            'name': self.reg,
+            'id': self.reg,
+            'status': 'stopped',
+            'stateTotals': {}
+        })
+
+    def disconnect(self):
+        """Stop listening to the workflow and forget its data-store."""
+        if self.subscriber:
+            self.subscriber.stop()
+        self.client = None
+        self.subscriber = None
+        self.store = TuiStore()
+        self.tree = None
+
+    def get_filtered_states(self):
+        """Return the task states to display."""
+        return {
+            state
+            for state, is_on in self.filter_states.items()
+            if is_on
+        }
+
+    def build_tree(self):
+        """Build a tree from the data-store mirror, return the top node."""
+        self.tree = TuiTree(self.store.data, self.get_filtered_states())
+        return self.tree.build()
+
+    @staticmethod
+    def get_node_key(node):
+        """Return the (type_, id_) of a node.
+
+        Arguments:
+            node (TuiNode): The node.
+
+        Returns:
+            tuple
+
+        """
+        value = node.get_value()
+        return (value['type_'], value['id_'])
 
     @staticmethod
     def get_node_id(node):
@@ -376,35 +484,56 @@ class TuiApp:
             self.update()
         except Exception as exc:
             sys.exit(exc)
+        # schedule the next run of this update method
+        if self.loop:
+            self.loop.set_alarm_in(self.UPDATE_INTERVAL, self._update)
 
     def update(self):
         """Refresh the data and redraw this widget.
 
-        Preserves the current focus and collapse/expand state.
+        Once the data-store mirror has been loaded only the deltas the
+        workflow publishes are applied, and only the tree nodes they
+        affect are redrawn. The tree is rebuilt (preserving the current
+        focus and collapse/expand state) when the mirror is (re)loaded
+        or the task state filters change.
 
         """
-        # update the data store
-        # TODO: this can be done incrementally using deltas
-        #       once this interface is available
-        snapshot = self.get_snapshot()
-        if snapshot is False:
-            return False
-        data = snapshot['data']
+        if self.store.loaded and self.tree:
+            changes = self.get_changes()
+        else:
+            changes = None
+        if changes is None:
+            topnode = self.get_snapshot()
+            if topnode is False:
+                return False
+            self.set_tree(topnode)
+        elif self.tree.task_states != self.get_filtered_states():
+            self.set_tree(self.build_tree())
+        elif changes:
+            self.tree.update(changes)
+            self.patch_tree()
 
         # update the suite status message
+        data = self.tree_walker.get_focus()[1].get_root().get_value()['data']
         header = [get_workflow_status_str(data)]
-        status_summary = get_task_status_summary(snapshot['data'])
+        status_summary = get_task_status_summary(data)
         if status_summary:
             header.extend([' ('] + status_summary + [' )'])
         if not all(self.filter_states.values()):
             header.extend([' ', '*filtered* "R" to reset', ' '])
         self.set_header(header)
+        return True
+
+    def set_tree(self, topnode):
+        """Replace the tree.
 
-        # global update - the nuclear option - slow but simple
-        # TODO: this can be done incrementally by adding and
-        #       removing nodes from the existing tree
-        topnode = TuiParentNode(snapshot)
+        Preserves the current focus and collapse/expand state.
 
+        Arguments:
+            topnode (dict):
+                The top-level workflow node of the new tree.
+
+        """
         # NOTE: because we are nuking the tree we need to manually
         # preserve the focus and collapse status of tree nodes
 
@@ -412,7 +541,9 @@ class TuiApp:
         _, old_node = self.listbox._body.get_focus()
 
         # nuke the tree
-        self.tree_walker = urwid.TreeWalker(topnode)
+        self.node_registry = {}
+        self.tree_walker = urwid.TreeWalker(
+            TuiParentNode(topnode, registry=self.node_registry))
         self.listbox._set_body(self.tree_walker)
 
         # get the new focus
@@ -425,11 +556,42 @@ class TuiApp:
         #  preserve the collapse/expand status of all nodes
         translate_collapsing(self, old_node, new_node)
 
-        # schedule the next run of this update method
-        if self.loop:
-            self.loop.set_alarm_in(self.UPDATE_INTERVAL, self._update)
+    def patch_tree(self):
+        """Redraw the tree nodes which have changed.
 
-        return True
+        Only nodes which urwid has loaded need redrawing, the rest are
+        loaded from the patched tree as and when they are displayed.
+
+        """
+        tree = self.tree
+        registry = self.node_registry
+        for key in tree.removed:
+            registry.pop(key, None)
+        for key in tree.restructured:
+            node = registry.get(key)
+            if node is not None:
+                node.reload_children()
+        for key in tree.changed | tree.restructured:
+            node = registry.get(key)
+            if node is not None and node._widget is not None:
+                expanded = node._widget.expanded
+                widget = node.get_widget(reload=True)
+                if widget.expanded != expanded:
+                    widget.expanded = expanded
+                    widget.update_expanded_icon()
+        tree.clear_changes()
+
+        # if the focused node has gone, move to its closest ancestor
+        _, focus = self.tree_walker.get_focus()
+        node = focus
+        while (
+            node._parent is not None
+            and registry.get(self.get_node_key(node)) is not node
+        ):
+            node = node._parent
+        if node is not focus:
+            self.tree_walker.set_focus(node)
+        self.tree_walker._modified()
 
     def filter_by_task_state(self, filtered_state=None):
         """Filter tasks.
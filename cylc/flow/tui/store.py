@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""A local mirror of a workflow's data-store for Tui.
+
+The mirror is loaded from a snapshot of the whole data-store
+(``pb_entire_workflow``) then kept up to date by applying the deltas the
+scheduler publishes, so Tui only needs to look at what has changed.
+"""
+
+from copy import deepcopy
+
+from cylc.flow.data_messages_pb2 import PbEntireWorkflow
+from cylc.flow.data_store_mgr import (
+    DATA_TEMPLATE,
+    EDGES,
+    FAMILIES,
+    FAMILY_PROXIES,
+    JOBS,
+    TASKS,
+    TASK_PROXIES,
+    WORKFLOW,
+    apply_delta,
+    verify_checksum,
+)
+
+
+class TuiStore:
+    """A local mirror of a workflow's data-store.
+
+    Attributes:
+        data (dict):
+            The mirrored data-store, as ``{key: {id: element}}``, except
+            for ``data[WORKFLOW]`` which is the ``PbWorkflow`` itself.
+        loaded (bool):
+            True once a snapshot has been loaded.
+
+    """
+
+    # element types in an entire workflow message
+    KEYS = (EDGES, FAMILIES, FAMILY_PROXIES, JOBS, TASKS, TASK_PROXIES)
+
+    def __init__(self):
+        self.data = deepcopy(DATA_TEMPLATE)
+        self.loaded = False
+        # deltas older than the snapshot are already in it (deltas
+        # published while the snapshot was being taken may be applied
+        # twice, which is harmless)
+        self.snapshot_time = 0.0
+
+    def load(self, entire_workflow):
+        """Replace the mirror with a snapshot of the whole data-store.
+
+        Args:
+            entire_workflow (bytes):
+                Serialised ``PbEntireWorkflow`` message.
+
+        """
+        msg = PbEntireWorkflow()
+        msg.ParseFromString(entire_workflow)
+        self.data = deepcopy(DATA_TEMPLATE)
+        self.data[WORKFLOW].CopyFrom(msg.workflow)
+        for key in self.KEYS:
+            self.data[key] = {
+                element.id: element
+                for element in getattr(msg, key)
+            }
+        self.snapshot_time = msg.workflow.last_updated
+        self.loaded = True
+
+    def apply(self, all_deltas):
+        """Apply published deltas to the mirror.
+
+        Args:
+            all_deltas (cylc.flow.data_messages_pb2.AllDeltas):
+                The deltas published on the "all" topic.
+
+        Returns:
+            dict - ``{key: {id, ...}}`` of the elements added, updated
+            or pruned, or None if the whole mirror has changed (the
+            workflow was reloaded) or no longer matches the scheduler's
+            data-store (in which case it needs to be reloaded from a new
+            snapshot).
+
+        """
+        changes = {}
+        reloaded = False
+        for field, delta in all_deltas.ListFields():
+            key = field.name
+            if delta.time < self.snapshot_time:
+                # the snapshot was taken after these deltas
+                continue
+            if delta.reloaded:
+                # the scheduler has rebuilt its data-store
+                self.data[key] = deepcopy(DATA_TEMPLATE[key])
+                reloaded = True
+            apply_delta(key, delta, self.data)
+            if key == WORKFLOW:
+                changes[key] = {self.data[WORKFLOW].id}
+            else:
+                ids = changes.setdefault(key, set())
+                ids.update(element.id for element in delta.added)
+                ids.update(element.id for element in delta.updated)
+                ids.update(delta.pruned)
+            if not verify_checksum(key, delta, self.data):
+                self.loaded = False
+                return None
+        if reloaded:
+            return None
+        return changes
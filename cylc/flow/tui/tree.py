@@ -16,6 +16,22 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Tree utilities for Tui."""
 
+from bisect import bisect
+
+from cylc.flow import ID_DELIM
+from cylc.flow.data_store_mgr import (
+    FAMILY_PROXIES,
+    JOBS,
+    TASKS,
+    TASK_PROXIES,
+    WORKFLOW,
+)
+from cylc.flow.task_state import TASK_STATUS_WAITING
+from cylc.flow.tui.util import (
+    add_node,
+    idpop,
+)
+
 
 def find_closest_focus(app, old_node, new_node):
     """Return the position of the old node in the new tree.
@@ -107,3 +123,403 @@ def walk_tree(node):
             node.get_child_node(index)
             for index in node.get_child_keys()
         ])
+
+
+def get_workflow_data(workflow):
+    """Return the node data of a workflow data-store element.
+
+    Arguments:
+        workflow (PbWorkflow): The workflow.
+
+    Returns:
+        dict - In the same format as the GraphQL query (see ``QUERY``).
+
+    """
+    return {
+        'id': workflow.id,
+        'name': workflow.name,
+        'status': workflow.status,
+        'stateTotals': dict(workflow.state_totals),
+    }
+
+
+def get_family_data(family_proxy, first_parent):
+    """Return the node data of a family or cycle data-store element.
+
+    Arguments:
+        family_proxy (PbFamilyProxy): The family proxy.
+        first_parent (PbFamilyProxy): Its first parent (or None).
+
+    Returns:
+        dict - In the same format as the GraphQL query (see ``QUERY``).
+
+    """
+    return {
+        'id': family_proxy.id,
+        'name': family_proxy.name,
+        'cyclePoint': family_proxy.cycle_point,
+        'state': family_proxy.state,
+        'isHeld': family_proxy.is_held,
+        'firstParent': _get_first_parent_data(first_parent),
+    }
+
+
+def get_task_data(task_proxy, first_parent, task):
+    """Return the node data of a task data-store element.
+
+    Arguments:
+        task_proxy (PbTaskProxy): The task proxy.
+        first_parent (PbFamilyProxy): Its first parent (or None).
+        task (PbTask): Its task definition (or None).
+
+    Returns:
+        dict - In the same format as the GraphQL query (see ``QUERY``).
+
+    """
+    return {
+        'id': task_proxy.id,
+        'name': task_proxy.name,
+        'cyclePoint': task_proxy.cycle_point,
+        'state': task_proxy.state,
+        'isHeld': task_proxy.is_held,
+        'firstParent': _get_first_parent_data(first_parent),
+        'task': {
+            'meanElapsedTime': (
+                task.mean_elapsed_time if task is not None else None)
+        },
+    }
+
+
+def get_job_data(job):
+    """Return the node data of a job data-store element.
+
+    Arguments:
+        job (PbJob): The job.
+
+    Returns:
+        dict - In the same format as the GraphQL query (see ``QUERY``).
+
+    """
+    return {
+        'id': job.id,
+        'submitNum': job.submit_num,
+        'state': job.state,
+        'host': job.host,
+        'jobRunnerName': job.job_runner_name,
+        'jobId': job.job_id,
+        'startedTime': job.started_time,
+    }
+
+
+def _get_first_parent_data(first_parent):
+    if first_parent is None:
+        return None
+    return {'id': first_parent.id, 'name': first_parent.name}
+
+
+class TuiTree:
+    """The Tui tree, built from a data-store mirror and patched as it changes.
+
+    Produces the same tree of nodes as
+    :py:func:`cylc.flow.tui.util.compute_tree` does from the GraphQL
+    query, but rather than being rebuilt from scratch on each update it
+    is patched in place from the ids of the data-store elements which have
+    changed, and reports which nodes it has touched so that only these
+    need redrawing.
+
+    Arguments:
+        data (dict):
+            The data-store mirror (see
+            :py:class:`cylc.flow.tui.store.TuiStore`).
+        task_states (iterable):
+            The task states to display.
+
+    Attributes:
+        root (dict):
+            The workflow node.
+        nodes (dict):
+            All nodes as ``{(type_, id_): node}``.
+        changed (set):
+            The ``(type_, id_)`` of nodes whose data has changed.
+        restructured (set):
+            The ``(type_, id_)`` of nodes whose children have changed.
+        removed (set):
+            The ``(type_, id_)`` of nodes which have been removed.
+
+    """
+
+    def __init__(self, data, task_states):
+        self.data = data
+        self.task_states = set(task_states)
+        self.nodes = {}
+        # {(type_, id_): parent (type_, id_)}
+        self.parents = {}
+        self.root = None
+        self.changed = set()
+        self.restructured = set()
+        self.removed = set()
+        self._building = False
+
+    def build(self):
+        """(Re)build the whole tree, return the workflow node."""
+        self.nodes.clear()
+        self.parents.clear()
+        self.clear_changes()
+        workflow = self.data[WORKFLOW]
+        self.root = add_node(
+            'workflow', workflow.id, self.nodes,
+            data=get_workflow_data(workflow))
+        self._building = True
+        try:
+            for id_ in self.data[FAMILY_PROXIES]:
+                self._update_family(id_)
+            for id_ in self.data[TASK_PROXIES]:
+                self._update_task(id_)
+        finally:
+            self._building = False
+        # sort (tasks' children, i.e. jobs, are sorted as they are added)
+        for (type_, _), node in self.nodes.items():
+            if type_ != 'task':
+                node['children'].sort(key=lambda x: x['id_'])
+        self.clear_changes()
+        return self.root
+
+    def clear_changes(self):
+        """Forget which nodes have changed."""
+        self.changed.clear()
+        self.restructured.clear()
+        self.removed.clear()
+
+    def update(self, changes):
+        """Patch the tree with changes to the data-store mirror.
+
+        Arguments:
+            changes (dict):
+                The ids of the data-store elements which have been added,
+                updated or pruned, as ``{key: {id, ...}}``.
+
+        """
+        if changes.get(WORKFLOW):
+            workflow_data = get_workflow_data(self.data[WORKFLOW])
+            if workflow_data != self.root['data']:
+                self.root['data'] = workflow_data
+                self.changed.add(('workflow', self.root['id_']))
+        # families first so that tasks find their parents in place
+        for id_ in changes.get(FAMILY_PROXIES, ()):
+            self._update_family(id_)
+        task_ids = set(changes.get(TASK_PROXIES, ()))
+        for id_ in changes.get(JOBS, ()):
+            job = self.data[JOBS].get(id_)
+            task_ids.add(job.task_proxy if job is not None else idpop(id_))
+        for id_ in changes.get(TASKS, ()):
+            # the mean elapsed time of the task may have changed
+            task = self.data[TASKS].get(id_)
+            if task is not None:
+                task_ids.update(task.proxies)
+        for id_ in task_ids:
+            self._update_task(id_)
+
+    def _get_parent_key(self, id_, first_parent_id):
+        """Return the key of the parent node of a family or task."""
+        if (
+            first_parent_id
+            and first_parent_id.rsplit(ID_DELIM, 1)[-1] != 'root'
+            and first_parent_id in self.data[FAMILY_PROXIES]
+        ):
+            return self._ensure_family(first_parent_id)
+        return self._ensure_cycle(idpop(id_))
+
+    def _ensure_cycle(self, cycle_id):
+        """Return the key of a cycle node, adding it if need be."""
+        key = ('cycle', cycle_id)
+        if key not in self.nodes:
+            self._update_cycle(f'{cycle_id}{ID_DELIM}root', force=True)
+        return key
+
+    def _ensure_family(self, id_):
+        """Return the key of a family node, adding it if need be."""
+        key = ('family', id_)
+        if key not in self.nodes:
+            self._update_family(id_, force=True)
+        return key
+
+    def _update_cycle(self, root_id, force=False):
+        """Add, update or remove a cycle node from its root family proxy.
+
+        Cycles are displayed if their state is displayed or if they have
+        anything to display in them (``force``).
+        """
+        cycle_id = idpop(root_id)
+        key = ('cycle', cycle_id)
+        family_proxy = self.data[FAMILY_PROXIES].get(root_id)
+        if family_proxy is None and not force:
+            self._remove(key)
+            return
+        if (
+            key not in self.nodes
+            and not force
+            and family_proxy.state not in self.task_states
+        ):
+            return
+        if family_proxy is None:
+            data = {
+                'id': cycle_id,
+                'cyclePoint': cycle_id.rsplit(ID_DELIM, 1)[-1],
+                'state': TASK_STATUS_WAITING,
+                'isHeld': False,
+            }
+        else:
+            data = {
+                'id': cycle_id,
+                'cyclePoint': family_proxy.cycle_point,
+                'state': family_proxy.state,
+                'isHeld': family_proxy.is_held,
+            }
+        self._set_data(key, data)
+        self._attach(key, ('workflow', self.root['id_']))
+
+    def _update_family(self, id_, force=False):
+        """Add, update or remove a family node."""
+        if id_.rsplit(ID_DELIM, 1)[-1] == 'root':
+            self._update_cycle(id_, force=force)
+            return
+        key = ('family', id_)
+        family_proxy = self.data[FAMILY_PROXIES].get(id_)
+        if family_proxy is None:
+            # the family has been pruned (or never existed)
+            self._remove(key)
+            return
+        if (
+            key not in self.nodes
+            and not force
+            and family_proxy.state not in self.task_states
+        ):
+            return
+        first_parent = self.data[FAMILY_PROXIES].get(
+            family_proxy.first_parent)
+        self._set_data(key, get_family_data(family_proxy, first_parent))
+        self._attach(key, self._get_parent_key(id_, family_proxy.first_parent))
+
+    def _update_task(self, id_):
+        """Add, update or remove a task node and its jobs."""
+        key = ('task', id_)
+        task_proxy = self.data[TASK_PROXIES].get(id_)
+        if (
+            task_proxy is None
+            or not task_proxy.first_parent
+            or task_proxy.state not in self.task_states
+        ):
+            self._remove(key)
+            return
+        first_parent = self.data[FAMILY_PROXIES].get(task_proxy.first_parent)
+        self._set_data(
+            key,
+            get_task_data(
+                task_proxy,
+                first_parent,
+                self.data[TASKS].get(task_proxy.task)
+            )
+        )
+        self._attach(key, self._get_parent_key(id_, task_proxy.first_parent))
+
+        # jobs, most recent first
+        node = self.nodes[key]
+        jobs = sorted(
+            (
+                self.data[JOBS][job_id]
+                for job_id in set(task_proxy.jobs)
+                if job_id in self.data[JOBS]
+            ),
+            key=lambda job: job.submit_num,
+            reverse=True
+        )
+        old_children = {child['id_']: child for child in node['children']}
+        children = []
+        for job in jobs:
+            job_node = old_children.pop(job.id, None)
+            job_data = get_job_data(job)
+            if job_node is None:
+                job_node = add_node('job', job.id, self.nodes, data=job_data)
+                job_node['children'] = [
+                    add_node(
+                        'job_info', job.id + '_info', self.nodes,
+                        data=job_data)
+                ]
+                self.parents[('job', job.id)] = key
+                self.parents[('job_info', job.id + '_info')] = (
+                    'job', job.id)
+            elif job_node['data'] != job_data:
+                job_node['data'] = job_data
+                job_node['children'][0]['data'] = job_data
+                self.changed.add(('job', job.id))
+                self.changed.add(('job_info', job.id + '_info'))
+                # the task displays the state of its latest job
+                self.changed.add(key)
+            children.append(job_node)
+        if [child['id_'] for child in children] != [
+            child['id_'] for child in node['children']
+        ]:
+            node['children'] = children
+            self.restructured.add(key)
+        for job_node in old_children.values():
+            self._forget(('job', job_node['id_']))
+
+    def _set_data(self, key, data):
+        """Set the data of a node, adding the node if need be."""
+        node = self.nodes.get(key)
+        if node is None:
+            add_node(key[0], key[1], self.nodes, data=data)
+        elif node['data'] != data:
+            node['data'] = data
+            self.changed.add(key)
+
+    def _attach(self, key, parent_key):
+        """Make a node a child of another (if it isn't already)."""
+        if self.parents.get(key) == parent_key:
+            return
+        self._detach(key)
+        node = self.nodes[key]
+        children = self.nodes[parent_key]['children']
+        if self._building:
+            # sorted at the end
+            children.append(node)
+        else:
+            children.insert(
+                bisect([child['id_'] for child in children], node['id_']),
+                node
+            )
+        self.parents[key] = parent_key
+        self.restructured.add(parent_key)
+
+    def _detach(self, key):
+        """Remove a node from its parent's children."""
+        parent_key = self.parents.pop(key, None)
+        if parent_key is None:
+            return
+        node = self.nodes[key]
+        children = self.nodes[parent_key]['children']
+        for index, child in enumerate(children):
+            if child is node:
+                del children[index]
+                break
+        self.restructured.add(parent_key)
+
+    def _remove(self, key):
+        """Remove a node and everything beneath it from the tree."""
+        if key not in self.nodes:
+            return
+        self._detach(key)
+        self._forget(key)
+
+    def _forget(self, key):
+        """Drop a (detached) node and everything beneath it."""
+        stack = [self.nodes.pop(key)]
+        self.parents.pop(key, None)
+        self.removed.add(key)
+        while stack:
+            for child in stack.pop()['children']:
+                child_key = (child['type_'], child['id_'])
+                self.nodes.pop(child_key, None)
+                self.parents.pop(child_key, None)
+                self.removed.add(child_key)
+                stack.append(child)
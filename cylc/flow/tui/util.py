@@ -292,7 +292,7 @@ def render_node(node, data, type_):
         mean_time = None
         try:
             # due to sorting this is the most recent job
-            first_child = node.get_child_node(0)
+            first_child = node.get_child_node(node.get_child_keys()[0])
         except IndexError:
             first_child = None
 
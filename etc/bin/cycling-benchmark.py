@@ -0,0 +1,107 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# This is a standalone micro-benchmark of the cycling module. It times the
+# point and sequence operations the scheduler uses most (comparison, sorting,
+# min/max, offset arithmetic, next point on a sequence) for ISO8601 and
+# integer cycling, with cold (first use of each point) and warm caches.
+
+from random import Random
+from time import perf_counter
+
+from cylc.flow.cycling import iso8601
+from cylc.flow.cycling.integer import (
+    IntegerInterval, IntegerPoint, IntegerSequence)
+from cylc.flow.cycling.iso8601 import (
+    ISO8601Interval, ISO8601Point, ISO8601Sequence)
+
+# Number of points.
+N_POINTS = 2000
+
+
+def bench(func, targets):
+    """Return the mean time per call of func over targets (microseconds)."""
+    start = perf_counter()
+    for target in targets:
+        func(target)
+    return (perf_counter() - start) / len(targets) * 1e6
+
+
+def make_iso8601(ind):
+    """Return the ind'th ISO8601 point string (hourly)."""
+    return str(ISO8601Point('20000101T0000Z') + ISO8601Interval(f'PT{ind}H'))
+
+
+def run(label, point_cls, values, interval, sequence):
+    """Time point and sequence operations over values."""
+    pairs = list(zip(values, reversed(values)))
+    cases = [
+        (
+            'compare',
+            lambda pair: point_cls(pair[0]) < point_cls(pair[1]),
+            pairs),
+        (
+            'sort',
+            lambda _: sorted(point_cls(value) for value in values),
+            [None]),
+        (
+            'min/max',
+            lambda _: (
+                min(point_cls(value) for value in values),
+                max(point_cls(value) for value in values)),
+            [None]),
+        ('add', lambda value: point_cls(value) + interval, values),
+        ('subtract', lambda value: point_cls(value) - interval, values),
+        (
+            'next point',
+            lambda value: sequence.get_next_point(point_cls(value)),
+            values),
+    ]
+    for name, func, targets in cases:
+        cold = bench(func, targets)
+        warm = bench(func, targets)
+        print('%-8s  %-12s  %12.2fus  %12.2fus' % (
+            label, name, cold, warm))
+
+
+def main():
+    iso8601.init(time_zone='Z')
+    rand = Random(0)
+    iso_values = [make_iso8601(ind) for ind in range(N_POINTS)]
+    rand.shuffle(iso_values)
+    int_values = [str(ind) for ind in range(N_POINTS)]
+    rand.shuffle(int_values)
+    print('%-8s  %-12s  %14s  %14s' % ('cycling', 'operation', 'cold', 'warm'))
+    # Clear the caches filled by make_iso8601.
+    iso8601.init(time_zone='Z')
+    ISO8601Point._iso_point_add.cache_clear()
+    ISO8601Point._iso_point_sub_interval.cache_clear()
+    run(
+        'iso8601',
+        ISO8601Point,
+        iso_values,
+        ISO8601Interval('PT6H'),
+        ISO8601Sequence('PT6H', '20000101T0000Z', '20500101T0000Z'))
+    run(
+        'integer',
+        IntegerPoint,
+        int_values,
+        IntegerInterval('P3'),
+        IntegerSequence('P3', '1', str(N_POINTS * 2)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# This is a standalone performance test of the task pool indexes, used to
+# route task messages and absolute outputs to tasks. It compares the per
+# message cost of an index lookup with a scan of the pool (the approach
+# used before the indexes were added) as the pool grows.
+
+from time import perf_counter
+from types import SimpleNamespace
+
+from cylc.flow.task_pool import TaskPool
+
+# Pool sizes.
+SIZES = [1000, 10000, 100000]
+# Number of messages to route at each size.
+N_MESSAGES = 1000
+
+
+def make_task(ind):
+    """Return a stand-in task proxy, foo<ind> depends on bar<ind>."""
+    prereq = SimpleNamespace(satisfied={(f'bar{ind}', '1', 'succeeded'): 0})
+    return SimpleNamespace(
+        identity=f'foo{ind}.1',
+        point='1',
+        tdef=SimpleNamespace(name=f'foo{ind}'),
+        state=SimpleNamespace(
+            prerequisites=[prereq], suicide_prerequisites=[]),
+    )
+
+
+def make_pool(size):
+    """Return a task pool with just the indexes populated."""
+    pool = TaskPool.__new__(TaskPool)
+    pool.tasks_by_id = {}
+    pool.tasks_by_name = {}
+    pool.tasks_by_prereq = {}
+    pool.pool = {'1': {}}
+    itasks = []
+    for ind in range(size):
+        itask = make_task(ind)
+        pool._add_to_indexes(itask)
+        pool.pool['1'][itask.identity] = itask
+        itasks.append(itask)
+    return pool, itasks
+
+
+def bench(func, targets):
+    """Return the mean time per call of func over targets (microseconds)."""
+    start = perf_counter()
+    for target in targets:
+        func(target)
+    return (perf_counter() - start) / len(targets) * 1e6
+
+
+def main():
+    print('%8s  %14s  %14s  %14s  %14s' % (
+        'size', 'scan by id', 'index by id', 'scan by prereq',
+        'index by prereq'))
+    for size in SIZES:
+        pool, itasks = make_pool(size)
+        step = max(size // N_MESSAGES, 1)
+        ids = [f'foo{ind}.1' for ind in range(0, size, step)]
+        names = [f'bar{ind}' for ind in range(0, size, step)]
+        # Scans are slow, time fewer of them.
+        scan_ids = ids[::10]
+        scan_names = names[::10]
+        results = [
+            bench(
+                lambda id_: [t for t in itasks if t.identity == id_],
+                scan_ids),
+            bench(pool.get_pool_task_by_id, ids),
+            bench(
+                lambda name: [
+                    t for t in itasks
+                    if (name, '1', 'succeeded') in
+                    t.state.prerequisites[0].satisfied
+                ],
+                scan_names),
+            bench(
+                lambda name: pool.get_tasks_by_prereq(name, '1', 'succeeded'),
+                names),
+        ]
+        print('%8d  %12.2fus  %12.2fus  %12.2fus  %12.2fus' % (
+            size, *results))
+
+
+if __name__ == '__main__':
+    main()
@@ -15,10 +15,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """Test cylc.flow.client.SuiteRuntimeClient."""
+import asyncio
+from threading import Thread
+from time import sleep, time
+
 import pytest
 
 from cylc.flow.network.client import SuiteRuntimeClient
 from cylc.flow.network.server import PB_METHOD_MAP
+from cylc.flow.task_message import MUTATION
 
 
 @pytest.mark.asyncio
@@ -53,3 +58,65 @@ async def test_protobuf(harness):
     pb_data = PB_METHOD_MAP['pb_entire_workflow']()
     pb_data.ParseFromString(ret)
     assert schd.suite in pb_data.workflow.id
+
+
+@pytest.mark.asyncio
+async def test_main_loop_profile(harness):
+    """It should return main loop stage timings."""
+    schd, client = harness
+    while not schd.main_loop_timings.n_loops:
+        await asyncio.sleep(0.1)
+    ret = await client.async_request('get_main_loop_profile')
+    assert ret['busy']['count'] >= 1
+    assert set(ret['busy']) == {
+        'count', 'total', 'max', 'window', 'mean', 'p50', 'p99', 'histogram'}
+
+
+@pytest.mark.asyncio
+async def test_priority_lane(harness, monkeypatch):
+    """Task messages should not be held up behind slow requests."""
+    schd, client = harness
+
+    def slow_endpoint(**_):
+        sleep(2)
+        return b''
+
+    def slow_request():
+        SuiteRuntimeClient(schd.suite)('pb_entire_workflow')
+
+    monkeypatch.setattr(schd.server, 'pb_entire_workflow', slow_endpoint)
+    # occupy all of the main worker threads
+    threads = [
+        Thread(target=slow_request)
+        for _ in range(schd.server.N_WORKERS)
+    ]
+    for thread in threads:
+        thread.start()
+    while schd.server.get_stats()['lanes']['main']['wait']['count'] < len(
+        threads
+    ):
+        await asyncio.sleep(0.05)
+
+    start = time()
+    ret = await client.async_request(
+        'graphql',
+        {
+            'request_string': MUTATION,
+            'variables': {
+                'wFlows': [schd.suite],
+                'taskJob': '1/one/01',
+                'eventTime': None,
+                'messages': [['INFO', 'hello']],
+            }
+        }
+    )
+    assert ret['message']['result']
+    assert time() - start < 1
+
+    for thread in threads:
+        thread.join()
+    ret = await client.async_request('get_request_profile')
+    assert ret['requests']['graphql:message']['count'] == 1
+    assert ret['requests']['pb_entire_workflow']['count'] >= len(threads)
+    assert ret['requests']['pb_entire_workflow']['max'] >= 2
+    assert ret['lanes']['priority']['queued'] == 0
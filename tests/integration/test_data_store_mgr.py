@@ -19,7 +19,9 @@ from cylc.flow.data_store_mgr import (
     FAMILY_PROXIES,
     TASKS,
     TASK_PROXIES,
-    WORKFLOW
+    WORKFLOW,
+    generate_elements_checksum,
+    verify_checksum,
 )
 
 
@@ -155,6 +157,30 @@ def test_update_task_proxies(harness):
     assert len(update_tasks) == len(collect_states(data, TASK_PROXIES))
 
 
+def test_checksums(harness):
+    """Test the checksums kept as deltas are applied match the data."""
+    schd, _ = harness
+    data_store_mgr = schd.data_store_mgr
+    data = data_store_mgr.data[data_store_mgr.workflow_id]
+
+    def check():
+        for key, checksum in data_store_mgr.checksums.items():
+            assert checksum == generate_elements_checksum(
+                key, data[key].values())
+            assert verify_checksum(key, data_store_mgr.deltas[key], data)
+
+    data_store_mgr.clear_deltas()
+    data_store_mgr.update_task_proxies(schd.pool.get_all_tasks())
+    data_store_mgr.apply_deltas()
+    assert any(data_store_mgr.checksums.values())
+    check()
+    data_store_mgr.clear_deltas()
+    data_store_mgr.prune_flagged_nodes.update(set(data[TASK_PROXIES]))
+    data_store_mgr.prune_data_store()
+    data_store_mgr.apply_deltas()
+    check()
+
+
 @pytest.mark.skip('TODO: fix this test')
 def test_update_workflow(harness):
     """Test method that updates the dynamic fields of the workflow msg."""
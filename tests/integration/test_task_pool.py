@@ -0,0 +1,134 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from cylc.flow.cycling.integer import IntegerPoint
+from cylc.flow.task_state import (
+    TASK_OUTPUT_SUCCEEDED,
+    TASK_STATUS_SUCCEEDED,
+)
+
+
+@pytest.fixture
+async def schd(flow, scheduler):
+    """A scheduler with an absolute trigger, taken as far as the pool."""
+    reg = flow({
+        'scheduling': {
+            'cycling mode': 'integer',
+            'initial cycle point': '1',
+            'final cycle point': '3',
+            'runahead limit': 'P3',
+            'graph': {
+                'R1': 'prep',
+                'P1': 'prep[^] => foo',
+            }
+        }
+    })
+    schd = scheduler(reg)
+    await schd.install()
+    await schd.initialise()
+    await schd.configure()
+    return schd
+
+
+@pytest.mark.asyncio
+async def test_indexes(schd):
+    """The pool indexes must track tasks being added and removed."""
+    pool = schd.pool
+    prep = pool.get_task('prep', IntegerPoint(1))
+    assert prep is not None
+    assert pool.get_task_by_id('prep.1') is prep
+    assert pool.get_pool_task_by_id('prep.1') is None  # runahead
+    assert list(pool.tasks_by_name) == ['prep']
+
+    pool.release_runahead_tasks()
+    assert pool.get_pool_task_by_id('prep.1') is prep
+
+    foo1 = pool.spawn_task('foo', IntegerPoint(1), flow_label='a')
+    foo2 = pool.spawn_task('foo', IntegerPoint(2), flow_label='a')
+    assert set(pool.tasks_by_name['foo'].values()) == {foo1, foo2}
+    assert set(
+        pool.get_tasks_by_prereq('prep', IntegerPoint(1), 'succeeded')
+    ) == {foo1, foo2}
+
+    pool.remove(foo2)
+    assert pool.get_task_by_id('foo.2') is None
+    assert pool.get_tasks_by_prereq(
+        'prep', IntegerPoint(1), 'succeeded') == [foo1]
+
+    # filter_task_proxies uses the name index for task names
+    itasks, bad_items = pool.filter_task_proxies(['foo', 'bar'])
+    assert itasks == [foo1]
+    assert bad_items == ['bar']
+
+
+@pytest.mark.asyncio
+async def test_spawn_on_abs_output(schd):
+    """An absolute output must satisfy every instance of the child."""
+    pool = schd.pool
+    prep = pool.get_task('prep', IntegerPoint(1))
+    foo2 = pool.spawn_task('foo', IntegerPoint(2), flow_label=prep.flow_label)
+    assert not foo2.state.prerequisites_all_satisfied()
+    pool.spawn_on_output(prep, TASK_OUTPUT_SUCCEEDED)
+    foo1 = pool.get_task_by_id('foo.1')
+    assert foo1 is not None
+    assert foo1.state.prerequisites_all_satisfied()
+    assert foo2.state.prerequisites_all_satisfied()
+    # prep has finished
+    assert 'prep' not in pool.tasks_by_name
+
+
+@pytest.mark.asyncio
+async def test_runahead(flow, scheduler):
+    """Runahead release must follow tasks finishing and being removed."""
+    reg = flow({
+        'scheduling': {
+            'cycling mode': 'integer',
+            'initial cycle point': '1',
+            'final cycle point': '10',
+            'runahead limit': 'P2',
+            'graph': {
+                'P1': 'foo',
+            }
+        }
+    })
+    schd = scheduler(reg)
+    await schd.install()
+    await schd.initialise()
+    await schd.configure()
+    pool = schd.pool
+    while pool.release_runahead_tasks():
+        pass
+    # two active points, the next is held back in the runahead pool
+    assert pool.get_min_point() == IntegerPoint(1)
+    assert pool.get_max_point() == IntegerPoint(2)
+    assert pool.get_max_point_runahead() == IntegerPoint(3)
+    # nothing has changed
+    assert not pool.release_runahead_tasks()
+
+    foo1 = pool.get_task('foo', IntegerPoint(1))
+    foo1.state.reset(TASK_STATUS_SUCCEEDED)
+    assert pool.release_runahead_tasks()
+    while pool.release_runahead_tasks():
+        pass
+    assert pool.get_min_point() == IntegerPoint(1)
+    assert pool.get_max_point() == IntegerPoint(3)
+    assert pool.get_max_point_runahead() == IntegerPoint(4)
+
+    pool.remove(foo1)
+    assert pool.get_min_point() == IntegerPoint(2)
+    assert not pool.release_runahead_tasks()
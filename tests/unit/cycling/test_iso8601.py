@@ -528,6 +528,62 @@ class TestISO8601Sequence(unittest.TestCase):
             sequence.is_on_sequence(ISO8601Point('20100809T0005')))
 
 
+class TestISO8601Point(unittest.TestCase):
+    """Contains unit tests for the ISO8601Point class."""
+
+    def setUp(self):
+        init(time_zone='Z')
+
+    def test_compare(self):
+        """Test ordering and equality of points."""
+        point = ISO8601Point('20100101T0000Z')
+        later = ISO8601Point('20100101T0001Z')
+        self.assertTrue(point < later)
+        self.assertTrue(point <= later)
+        self.assertTrue(later > point)
+        self.assertTrue(later >= point)
+        self.assertFalse(point == later)
+        self.assertTrue(point != later)
+        self.assertTrue(point == ISO8601Point('20100101T0000Z'))
+        self.assertEqual(point.__cmp__(later), -1)
+        self.assertEqual(later.__cmp__(point), 1)
+        self.assertEqual(point.__cmp__(None), -1)
+
+    def test_compare_time_zones(self):
+        """Test points in different time zones compare by absolute time."""
+        point = ISO8601Point('20100101T0000Z')
+        same = ISO8601Point('20100101T1200+12')
+        later = ISO8601Point('20091231T2300-02')
+        self.assertTrue(point == same)
+        self.assertTrue(point <= same)
+        self.assertTrue(point < later)
+        self.assertEqual(max([later, point, same]), later)
+
+    def test_sort(self):
+        """Test sorting points across day, month and year boundaries."""
+        values = [
+            '20101231T2300Z', '20100101T0000Z', '20110101T0000Z',
+            '20100228T0000Z', '20100301T0000Z', '20091231T2359Z',
+            '+0100400101T0000Z']
+        init(time_zone='Z', num_expanded_year_digits=2)
+        points = sorted(ISO8601Point(value) for value in values)
+        self.assertEqual(
+            [str(point) for point in points],
+            [str(ISO8601Point(value)) for value in [
+                '20091231T2359Z', '20100101T0000Z', '20100228T0000Z',
+                '20100301T0000Z', '20101231T2300Z', '20110101T0000Z',
+                '+0100400101T0000Z']])
+
+    def test_arithmetic(self):
+        """Test points before and after arithmetic order correctly."""
+        point = ISO8601Point('20101231T1800Z')
+        later = point + ISO8601Interval('PT6H')
+        self.assertEqual(str(later), '20110101T0000Z')
+        self.assertTrue(point < later)
+        self.assertEqual(later - ISO8601Interval('PT6H'), point)
+        self.assertEqual(later - point, ISO8601Interval('PT6H'))
+
+
 class TestRelativeCyclePoint(unittest.TestCase):
     """Contains unit tests for cycle point relative to current time."""
 
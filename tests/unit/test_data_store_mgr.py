@@ -14,7 +14,21 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from cylc.flow.data_store_mgr import task_mean_elapsed_time
+from cylc.flow.data_messages_pb2 import (
+    AllDeltas, PbEdge, PbTaskProxy, PbWorkflow, TPDeltas, WDeltas)
+from cylc.flow.data_store_mgr import (
+    ALL_DELTAS,
+    DELTAS_MAP,
+    EDGES,
+    TASK_PROXIES,
+    WORKFLOW,
+    DataStoreMgr,
+    encode_varint,
+    generate_checksum,
+    generate_elements_checksum,
+    task_mean_elapsed_time,
+    verify_checksum,
+)
 
 
 class FakeTDef:
@@ -25,3 +39,66 @@ def test_task_mean_elapsed_time():
     tdef = FakeTDef()
     result = task_mean_elapsed_time(tdef)
     assert result == 5.0
+
+
+def test_generate_checksum():
+    """The checksum must not depend on order, and be reproducible."""
+    assert generate_checksum([]) == 0
+    assert generate_checksum(['a', 'b', 'c']) == generate_checksum(
+        ['c', 'a', 'b'])
+    assert generate_checksum(['a', 'b']) != generate_checksum(['a', 'c'])
+    # CRC-32 of "a" (same on all platforms and python invocations)
+    assert generate_checksum(['a']) == 0xe8b7be43
+
+
+def test_verify_checksum():
+    """Subscribers can verify their data against a delta."""
+    data = {
+        TASK_PROXIES: {
+            'a': PbTaskProxy(id='a', stamp='a@1'),
+            'b': PbTaskProxy(id='b', stamp='b@1'),
+        },
+        EDGES: {'e': PbEdge(id='e', stamp='e@1')},
+    }
+    assert generate_elements_checksum(
+        EDGES, data[EDGES].values()) == generate_checksum(['e'])
+    delta = TPDeltas(checksum=generate_checksum(['b@1', 'a@1']))
+    assert verify_checksum(TASK_PROXIES, delta, data)
+    data[TASK_PROXIES]['b'].stamp = 'b@2'
+    assert not verify_checksum(TASK_PROXIES, delta, data)
+    # workflow deltas have no checksum
+    assert verify_checksum(WORKFLOW, WDeltas(), data)
+
+
+def test_encode_varint():
+    assert encode_varint(0) == b'\x00'
+    assert encode_varint(127) == b'\x7f'
+    assert encode_varint(300) == b'\xac\x02'
+
+
+def test_get_publish_deltas():
+    """Deltas are serialised once, and reused for the all-deltas topic."""
+    mgr = DataStoreMgr.__new__(DataStoreMgr)
+    mgr.publish_stats = {}
+    mgr.deltas = {
+        key: delta_type()
+        for key, delta_type in DELTAS_MAP.items()
+        if key != ALL_DELTAS
+    }
+    mgr.deltas[TASK_PROXIES].added.extend(
+        PbTaskProxy(id=f'foo{ind}', stamp='x' * 200) for ind in range(3))
+    mgr.deltas[TASK_PROXIES].checksum = 12345
+    mgr.deltas[WORKFLOW].updated.CopyFrom(PbWorkflow(id='bar'))
+    expected = AllDeltas()
+    expected.task_proxies.CopyFrom(mgr.deltas[TASK_PROXIES])
+    expected.workflow.CopyFrom(mgr.deltas[WORKFLOW])
+
+    result = mgr.get_publish_deltas()
+    assert [topic for topic, _, _ in result] == [
+        b'task_proxies', b'workflow', b'all']
+    topics = {topic: data for topic, data, _ in result}
+    assert TPDeltas.FromString(topics[b'task_proxies']) == (
+        mgr.deltas[TASK_PROXIES])
+    assert AllDeltas.FromString(topics[b'all']) == expected
+    assert mgr.publish_stats['all']['bytes'] == len(topics[b'all'])
+    assert mgr.publish_stats['task_proxies']['deltas'] == 1
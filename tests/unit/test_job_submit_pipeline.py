@@ -0,0 +1,154 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from cylc.flow.job_submit_pipeline import JobSubmitPipeline
+
+
+class FakeProcPool:
+    """Record commands, exit them on request."""
+
+    def __init__(self):
+        self.closed = False
+        self.stopping = False
+        self.commands = []
+
+    def _is_stopping(self):
+        return self.stopping
+
+    def put_command(self, ctx, callback, callback_args):
+        if self.stopping:
+            ctx.ret_code = 999
+            callback(ctx, *callback_args)
+        else:
+            self.commands.append((ctx, callback, callback_args))
+
+    def exit_command(self, duration=1.0, ret_code=0):
+        ctx, callback, callback_args = self.commands.pop(0)
+        ctx.ret_code = ret_code
+        ctx.time_start = 1000.0 - duration
+        callback(ctx, *callback_args)
+
+
+class FakeWriter:
+    def __init__(self):
+        self.written = []
+
+    def write(self, path, job_conf, check_syntax=True):
+        if job_conf == 'bad':
+            raise ValueError(path)
+        self.written.append(path)
+
+
+def make_platform(concurrency=0, rate=0.0):
+    return {
+        'name': 'foo',
+        'job submission concurrency limit': concurrency,
+        'job submission rate limit': rate,
+    }
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(
+        'cylc.flow.job_submit_pipeline.time', lambda: 1000.0)
+    pipeline = JobSubmitPipeline(FakeProcPool(), FakeWriter(), n_writers=4)
+    pipeline.MAX_BATCH_SIZE = 10
+    pipeline.MIN_BATCH_SIZE = 2
+    yield pipeline
+    pipeline.close()
+
+
+def put(pipeline, platform, n_jobs, results):
+    pipeline.put(
+        platform,
+        ['cylc', 'jobs-submit'],
+        [(f'1/foo{ind}/01', None, ind) for ind in range(n_jobs)],
+        lambda ctx, arg, items: results.append((arg, items)),
+        ['arg'])
+
+
+def test_write_job_files(pipeline):
+    """Job files are written concurrently, errors returned in order."""
+    results = pipeline.write_job_files(
+        [('a', 'good'), ('b', 'bad'), ('c', 'good')])
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError)
+    assert sorted(pipeline.job_file_writer.written) == ['a', 'c']
+    assert pipeline.write_stats['failed job files'] == 1
+
+
+def test_concurrency_limit(pipeline):
+    """Only "concurrency" commands may run at once per platform."""
+    proc_pool = pipeline.proc_pool
+    results = []
+    put(pipeline, make_platform(concurrency=1), 25, results)
+    assert len(proc_pool.commands) == 1
+    ctx = proc_pool.commands[0][0]
+    assert ctx.cmd == ['cylc', 'jobs-submit'] + [
+        f'1/foo{ind}/01' for ind in range(10)]
+    proc_pool.exit_command()
+    assert results == [('arg', list(range(10)))]
+    assert len(proc_pool.commands) == 1
+    proc_pool.exit_command()
+    proc_pool.exit_command()
+    assert [len(items) for _, items in results] == [10, 10, 5]
+    assert not pipeline.is_not_done()
+    stats = pipeline.get_stats()['platforms']['foo']
+    assert stats['jobs'] == 25
+    assert stats['commands'] == 3
+    assert stats['max queued'] == 25
+
+
+def test_rate_limit(pipeline, monkeypatch):
+    """Jobs are held back to keep within the rate limit."""
+    proc_pool = pipeline.proc_pool
+    put(pipeline, make_platform(rate=5.0), 20, [])
+    # 10 jobs dispatched, the next batch is due in 2 seconds
+    assert len(proc_pool.commands) == 1
+    pipeline.process()
+    assert len(proc_pool.commands) == 1
+    monkeypatch.setattr(
+        'cylc.flow.job_submit_pipeline.time', lambda: 1002.0)
+    pipeline.process()
+    assert len(proc_pool.commands) == 2
+
+
+def test_adaptive_batch_size(pipeline):
+    """Batch sizes adapt to the per-job submission time."""
+    proc_pool = pipeline.proc_pool
+    put(pipeline, make_platform(), 10, [])
+    # 10 jobs in 20s, target 10s per command
+    proc_pool.exit_command(duration=20.0)
+    assert pipeline.queues['foo'].batch_size == 5
+    put(pipeline, make_platform(), 10, [])
+    assert [len(ctx.cmd) - 2 for ctx, _, _ in proc_pool.commands] == [5, 5]
+    # failed commands do not count
+    proc_pool.exit_command(duration=1000.0, ret_code=1)
+    assert pipeline.queues['foo'].batch_size == 5
+    proc_pool.exit_command(duration=0.5)
+    assert pipeline.queues['foo'].batch_size == 6
+
+
+def test_stopping(pipeline):
+    """Everything is dispatched when the process pool is stopping."""
+    results = []
+    put(pipeline, make_platform(concurrency=1), 25, results)
+    pipeline.proc_pool.stopping = True
+    pipeline.process()
+    assert [len(items) for _, items in results] == [10, 5]
+    assert not pipeline.is_not_done()
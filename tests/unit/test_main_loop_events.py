@@ -0,0 +1,79 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+from threading import Timer
+from time import time
+from types import SimpleNamespace
+
+import pytest
+
+from cylc.flow.main_loop_events import MainLoopEvents, WakeQueue
+
+
+def idle_proc_pool():
+    return SimpleNamespace(runnings=[], is_ready=lambda: False)
+
+
+def test_take():
+    """Pending stages are returned once, with timers on each tick."""
+    events = MainLoopEvents(interval=60)
+    assert events.take() == {MainLoopEvents.TIMERS}
+    assert events.take() == set()
+    queue = WakeQueue(events, MainLoopEvents.MESSAGES)
+    queue.put('a')
+    queue.put('b')
+    assert events.take() == {MainLoopEvents.MESSAGES}
+    stats = events.get_stats()
+    assert stats[MainLoopEvents.MESSAGES]['wakes'] == 1
+    assert stats[MainLoopEvents.MESSAGES]['latency_max'] >= 0
+    assert stats[MainLoopEvents.COMMANDS]['wakes'] == 0
+    assert stats[MainLoopEvents.COMMANDS]['latency_mean'] is None
+
+
+@pytest.mark.asyncio
+async def test_wait_woken_from_thread():
+    """A put from another thread must end the wait straight away."""
+    events = MainLoopEvents(event_driven=True, interval=60)
+    events.start()
+    events.take()
+    queue = WakeQueue(events, MainLoopEvents.COMMANDS)
+    Timer(0.1, queue.put, args=('stop',)).start()
+    start = time()
+    await asyncio.wait_for(events.wait(idle_proc_pool()), timeout=5)
+    assert time() - start < 5
+    assert events.take() == {MainLoopEvents.COMMANDS}
+
+
+@pytest.mark.asyncio
+async def test_wait_timer_tick():
+    """With nothing to do the wait ends on the next timer tick."""
+    events = MainLoopEvents(event_driven=True, interval=0.2)
+    events.take()
+    await asyncio.wait_for(events.wait(idle_proc_pool()), timeout=5)
+    assert events.take() == {MainLoopEvents.TIMERS}
+
+
+@pytest.mark.asyncio
+async def test_wait_proc_pool():
+    """The wait ends when the process pool has work to do."""
+    events = MainLoopEvents(event_driven=True, interval=60)
+    events.take()
+    ready = []
+    proc_pool = SimpleNamespace(runnings=[None], is_ready=lambda: ready)
+    asyncio.get_event_loop().call_later(0.2, ready.append, True)
+    await asyncio.wait_for(events.wait(proc_pool), timeout=5)
+    assert events.take() == {MainLoopEvents.PROC_POOL}
@@ -0,0 +1,63 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from cylc.flow.main_loop_timings import MainLoopTimings, RollingHistogram
+
+
+def test_rolling_histogram():
+    """Summaries must cover the window, totals all time."""
+    hist = RollingHistogram(size=100)
+    for ind in range(200):
+        hist.add(ind / 1000)
+    summary = hist.get_summary()
+    assert summary['count'] == 200
+    assert summary['max'] == 0.199
+    assert summary['window'] == 100
+    assert summary['p50'] == 0.15
+    assert summary['p99'] == 0.199
+    # the window is 0.1 - 0.199 seconds
+    assert summary['histogram'] == [[0.1, 1], [0.3, 99]]
+    assert sum(hist.counts) == 100
+
+
+def test_rolling_histogram_empty():
+    summary = RollingHistogram().get_summary()
+    assert summary['count'] == 0
+    assert summary['p50'] is summary['p99'] is summary['mean'] is None
+    assert summary['histogram'] == []
+
+
+def test_main_loop_timings(monkeypatch):
+    """Stage times must accumulate over an iteration."""
+    clock = iter([0.0, 1.0, 1.5, 3.0, 10.0])
+    monkeypatch.setattr(
+        'cylc.flow.main_loop_timings.time', lambda: next(clock))
+    timings = MainLoopTimings()
+    tick = timings.start()  # 0
+    tick = timings.record(timings.COMMANDS, tick)  # 1
+    tick = timings.record(timings.TASK_POOL, tick)  # 1.5
+    tick = timings.record(timings.COMMANDS, tick)  # 3
+    timings.end(tick)  # 10
+    stats = timings.get_stats()
+    assert {
+        stage: summary['total'] for stage, summary in stats.items()
+    } == {
+        timings.COMMANDS: 2.5,
+        timings.TASK_POOL: 0.5,
+        timings.SLEEP: 7.0,
+        timings.BUSY: 3.0,
+    }
+    assert timings.n_loops == 1
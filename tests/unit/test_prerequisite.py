@@ -0,0 +1,115 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+import pytest
+
+from cylc.flow.cycling.integer import IntegerPoint
+from cylc.flow.exceptions import TriggerExpressionError
+from cylc.flow.prerequisite import ConditionalExpression, Prerequisite
+
+
+def make_prereq(point, expr, messages):
+    prereq = Prerequisite(IntegerPoint(point))
+    for name, output in messages:
+        prereq.add(name, point, output)
+    prereq.set_condition(expr % {'point': point})
+    return prereq
+
+
+@pytest.mark.parametrize(
+    'expr, satisfied, expected',
+    [
+        ('a | b', set(), False),
+        ('a | b', {'a'}, True),
+        ('a | b', {'b'}, True),
+        ('a & b | c', {'a'}, False),
+        ('a & b | c', {'a', 'b'}, True),
+        ('a & b | c', {'c'}, True),
+        ('a & (b | c)', {'c'}, False),
+        ('a & (b | c)', {'a', 'c'}, True),
+        ('(a | b) & (c | d)', {'a', 'b'}, False),
+        ('(a | b) & (c | d)', {'b', 'd'}, True),
+        ('((a | b)) & c', {'a', 'c'}, True),
+    ]
+)
+def test_conditional(expr, satisfied, expected):
+    """Compiled expressions must evaluate like the graph logic."""
+    names = sorted({char for char in expr if char.isalpha()})
+    graph_expr = re.sub(r'(\w)', r'\1.1 succeeded', expr)
+    prereq = make_prereq(
+        1, graph_expr, [(name, 'succeeded') for name in names])
+    assert prereq.is_satisfied() is False
+    prereq.satisfy_me({(name, '1', 'succeeded') for name in satisfied})
+    assert prereq.is_satisfied() is expected
+    assert prereq.get_raw_conditional_expression() == graph_expr.replace(
+        ' ', '').replace('.1succeeded', '.1 succeeded')
+
+
+def test_shared_between_points():
+    """Prerequisites of the same shape must share the compiled expression."""
+    messages = [('foo', 'succeeded'), ('bar', 'failed')]
+    expr = 'foo.%(point)s succeeded|bar.%(point)s failed'
+    prereq1 = make_prereq(1, expr, messages)
+    prereq2 = make_prereq(2, expr, messages)
+    assert prereq1.conditional_expression is prereq2.conditional_expression
+    assert prereq1.conditional_expression.tokens == (0, '|', 1)
+    prereq2.satisfy_me({('bar', '2', 'failed')})
+    assert prereq2.is_satisfied()
+    assert not prereq1.is_satisfied()
+
+
+def test_message_name_prefix():
+    """A message must not be matched inside a longer message."""
+    prereq = make_prereq(
+        1,
+        'ba.1 succeeded|a.1 succeeded',
+        [('a', 'succeeded'), ('ba', 'succeeded')])
+    assert prereq.conditional_expression.tokens == (1, '|', 0)
+    prereq.satisfy_me({('a', '1', 'succeeded')})
+    assert prereq.is_satisfied()
+
+
+def test_set_satisfied():
+    prereq = make_prereq(
+        1, 'a.1 succeeded|b.1 succeeded',
+        [('a', 'succeeded'), ('b', 'succeeded')])
+    prereq.set_satisfied()
+    assert prereq.is_satisfied()
+    prereq.set_not_satisfied()
+    assert not prereq.is_satisfied()
+
+
+@pytest.mark.parametrize(
+    'tokens, err',
+    [
+        ((0, '|'), 'unexpected EOF'),
+        (('(', 0, '|', 1), 'unexpected EOF'),
+        ((0, '|', 1, ')'), re.escape("unexpected ')'")),
+        ((0, 1), 'unexpected 1'),
+    ]
+)
+def test_compile_error(tokens, err):
+    with pytest.raises(ValueError, match=err):
+        ConditionalExpression(tokens)
+
+
+def test_unmatched_parentheses():
+    with pytest.raises(TriggerExpressionError, match='unmatched parentheses'):
+        make_prereq(
+            1, '(a.1 succeeded|b.1 succeeded',
+            [('a', 'succeeded'), ('b', 'succeeded')])
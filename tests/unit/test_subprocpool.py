@@ -137,6 +137,19 @@ class TestSubProcPool(unittest.TestCase):
         for handle in handles:
             handle.close()
 
+    def test_is_ready(self):
+        """Test SubProcPool.is_ready."""
+        pool = SubProcPool()
+        self.assertFalse(pool.is_ready())
+        pool.put_command(SubProcContext('truth', ['true']))
+        self.assertTrue(pool.is_ready())
+        pool.process()
+        self.assertEqual(len(pool.runnings), 1)
+        pool.runnings[0][0].wait()
+        self.assertTrue(pool.is_ready())
+        pool.process()
+        self.assertFalse(pool.is_ready())
+
     def test_xfunction(self):
         """Test xtrigger function import."""
         with TemporaryDirectory() as temp_dir:
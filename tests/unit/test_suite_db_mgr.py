@@ -0,0 +1,218 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from types import SimpleNamespace
+
+import pytest
+
+from cylc.flow.rundb import CylcSuiteDAO
+from cylc.flow.suite_db_mgr import PublicDatabaseWriter, SuiteDatabaseManager
+from cylc.flow.task_action_timer import TaskActionTimer
+
+
+TABLES = list(SuiteDatabaseManager.TASK_POOL_KEYS)
+
+
+def make_task(name, point, status='waiting', prereqs=None):
+    """Return a minimal stand-in for a task proxy."""
+    prereqs = prereqs or {}
+    return SimpleNamespace(
+        tdef=SimpleNamespace(name=name),
+        point=point,
+        flow_label='a',
+        submit_num=0,
+        timeout=None,
+        poll_timer=None,
+        try_timers={},
+        state=SimpleNamespace(
+            status=status,
+            is_held=False,
+            time_updated=None,
+            prerequisites=[SimpleNamespace(satisfied=dict(prereqs))],
+        ),
+        get_try_num=lambda: 0,
+    )
+
+
+class FakePool:
+    def __init__(self, itasks):
+        self.itasks = itasks
+
+    def get_all_tasks(self):
+        return list(self.itasks)
+
+
+@pytest.fixture
+def db_mgrs(tmp_path):
+    """Return a (full, incremental) pair of started database managers."""
+    mgrs = []
+    for mode in ('full', 'incremental'):
+        for sub_dir in ('pri', 'pub'):
+            (tmp_path / mode / sub_dir).mkdir(parents=True)
+        mgr = SuiteDatabaseManager(
+            str(tmp_path / mode / 'pri'),
+            str(tmp_path / mode / 'pub'),
+            incremental=(mode == 'incremental'))
+        mgr.on_suite_start(is_restart=False)
+        mgrs.append(mgr)
+    yield mgrs
+    for mgr in mgrs:
+        mgr.on_suite_shutdown()
+
+
+def dump(dao):
+    """Return the content of the task pool tables."""
+    conn = dao.connect()
+    return {
+        table: sorted(conn.execute(f'SELECT * FROM {table}'))
+        for table in TABLES
+    }
+
+
+def put(mgrs, pool):
+    for mgr in mgrs:
+        mgr.put_task_pool(pool)
+        mgr.process_queued_ops()
+
+
+def test_put_task_pool_incremental(db_mgrs):
+    """Incremental writes must leave the same tables as full rewrites."""
+    full, incr = db_mgrs
+    foo = make_task('foo', '1', prereqs={('bar', '1', 'succeeded'): False})
+    baz = make_task('baz', '1')
+    pool = FakePool([foo, baz])
+    put(db_mgrs, pool)
+    assert dump(incr.pri_dao) == dump(full.pri_dao)
+
+    # change a task, a prerequisite and add some timers
+    baz.state.status = 'submitted'
+    baz.timeout = 10.0
+    baz.poll_timer = TaskActionTimer(delays=[1.0, 2.0])
+    baz.try_timers['execution-retry'] = TaskActionTimer(delays=[3.0])
+    foo.state.prerequisites[0].satisfied[('bar', '1', 'succeeded')] = (
+        'satisfied naturally')
+    put(db_mgrs, pool)
+    assert dump(incr.pri_dao) == dump(full.pri_dao)
+    assert dump(incr.pub_dao) == dump(full.pub_dao)
+
+    # only the changed row should be written
+    baz.state.status = 'running'
+    incr.put_task_pool(pool)
+    assert [
+        args['name']
+        for table in TABLES
+        for args in incr.db_inserts_map[table]
+    ] == ['baz']
+    assert not any(incr.db_deletes_map[table] for table in TABLES)
+    full.put_task_pool(pool)
+    for mgr in db_mgrs:
+        mgr.process_queued_ops()
+    assert dump(incr.pri_dao) == dump(full.pri_dao)
+
+    # remove a task and clear its timeout
+    pool.itasks.remove(foo)
+    baz.timeout = None
+    put(db_mgrs, pool)
+    result = dump(incr.pri_dao)
+    assert result == dump(full.pri_dao)
+    assert result[SuiteDatabaseManager.TABLE_TASK_PREREQUISITES] == []
+    assert result[SuiteDatabaseManager.TABLE_TASK_TIMEOUT_TIMERS] == []
+
+
+def test_put_task_pool_insert_then_remove(db_mgrs):
+    """A row inserted then removed before a flush must not be written."""
+    _, incr = db_mgrs
+    pool = FakePool([make_task('foo', '1')])
+    put([incr], pool)
+    bar = make_task('bar', '1')
+    pool.itasks.append(bar)
+    incr.put_task_pool(pool)
+    pool.itasks.remove(bar)
+    incr.put_task_pool(pool)
+    incr.process_queued_ops()
+    assert [
+        row[1] for row in dump(incr.pri_dao)[incr.TABLE_TASK_POOL]
+    ] == ['foo']
+
+
+def test_put_task_event_timers_resets_action_timers(db_mgrs):
+    """Task action timers must be re-written after an event timer wipe."""
+    full, incr = db_mgrs
+    foo = make_task('foo', '1')
+    foo.poll_timer = TaskActionTimer(delays=[1.0])
+    pool = FakePool([foo])
+    put(db_mgrs, pool)
+    task_events_mgr = SimpleNamespace(
+        event_timers_updated=True, _event_timers={})
+    for mgr in db_mgrs:
+        task_events_mgr.event_timers_updated = True
+        mgr.put_task_event_timers(task_events_mgr)
+    put(db_mgrs, pool)
+    result = dump(incr.pri_dao)
+    assert result == dump(full.pri_dao)
+    assert len(result[SuiteDatabaseManager.TABLE_TASK_ACTION_TIMERS]) == 1
+
+
+@pytest.fixture
+def db_mgr(tmp_path):
+    """Return an unstarted database manager."""
+    for sub_dir in ('pri', 'pub'):
+        (tmp_path / sub_dir).mkdir()
+    return SuiteDatabaseManager(
+        str(tmp_path / 'pri'), str(tmp_path / 'pub'), incremental=True,
+        pub_writer=True)
+
+
+def test_pub_writer(db_mgr):
+    """The public database writer must keep the public database in sync."""
+    db_mgr.on_suite_start(is_restart=False)
+    writer = db_mgr.pub_writer
+    foo = make_task('foo', '1')
+    pool = FakePool([foo])
+    for status in ('waiting', 'submitted', 'running', 'succeeded'):
+        foo.state.status = status
+        put([db_mgr], pool)
+    pri_path, pub_path = db_mgr.pri_path, db_mgr.pub_path
+    db_mgr.on_suite_shutdown()
+    result = dump(CylcSuiteDAO(pub_path))
+    assert result == dump(CylcSuiteDAO(pri_path))
+    assert result[SuiteDatabaseManager.TABLE_TASK_POOL][0][3] == 'succeeded'
+    stats = writer.get_stats()
+    assert stats['batches'] == 4
+    assert 1 <= stats['commits'] <= 4
+    assert stats['recoveries'] == stats['failures'] == 0
+
+
+def test_pub_writer_overflow(db_mgr):
+    """The public database must be recovered if the writer overflows."""
+    db_mgr.pub_writer_enabled = False
+    db_mgr.on_suite_start(is_restart=False)
+    # a writer which is not yet running, with room for one batch
+    writer = PublicDatabaseWriter(db_mgr.pri_dao, db_mgr.pub_path, 1)
+    db_mgr.pub_writer = writer
+    pool = FakePool([make_task('foo', '1')])
+    put([db_mgr], pool)
+    pool.itasks.append(make_task('bar', '1'))
+    put([db_mgr], pool)
+    assert writer.stats['dropped batches'] == 1
+    assert writer.recover_requested
+    writer.start()
+    pri_path, pub_path = db_mgr.pri_path, db_mgr.pub_path
+    db_mgr.on_suite_shutdown()
+    result = dump(CylcSuiteDAO(pub_path))
+    assert result == dump(CylcSuiteDAO(pri_path))
+    assert len(result[SuiteDatabaseManager.TABLE_TASK_POOL]) == 2
+    assert writer.stats['recoveries'] == 1
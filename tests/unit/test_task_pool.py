@@ -0,0 +1,42 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from cylc.flow.cycling.integer import IntegerPoint
+from cylc.flow.task_pool import PointCounter
+
+
+def test_point_counter():
+    """Points are kept in order while they have items."""
+    counter = PointCounter()
+    assert not counter
+    assert counter.get_min() is None
+    assert counter.get_max() is None
+    for value in [3, 1, 2, 3]:
+        counter.add(IntegerPoint(value))
+    assert counter.get_min() == IntegerPoint(1)
+    assert counter.get_max() == IntegerPoint(3)
+    assert list(counter.iter_from(IntegerPoint(2))) == [
+        IntegerPoint(2), IntegerPoint(3)]
+    assert counter.get_points_to(IntegerPoint(2)) == [
+        IntegerPoint(1), IntegerPoint(2)]
+    counter.remove(IntegerPoint(3))
+    assert counter.get_max() == IntegerPoint(3)
+    counter.remove(IntegerPoint(3))
+    assert counter.get_max() == IntegerPoint(2)
+    assert IntegerPoint(3) not in counter
+    counter.remove(IntegerPoint(1))
+    counter.remove(IntegerPoint(2))
+    assert not counter
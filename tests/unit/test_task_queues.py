@@ -0,0 +1,157 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from types import SimpleNamespace
+
+import pytest
+
+from cylc.flow.cycling.integer import IntegerPoint
+from cylc.flow.prerequisite import Prerequisite
+from cylc.flow.task_queues import TaskQueueManager
+from cylc.flow.task_state import (
+    TaskState,
+    TASK_STATUS_PREPARING,
+    TASK_STATUS_QUEUED,
+    TASK_STATUS_SUCCEEDED,
+    TASK_STATUS_WAITING,
+)
+
+
+class FakeTask:
+    """A task proxy with a real TaskState but controllable readiness."""
+
+    def __init__(self, name, ready=True):
+        tdef = SimpleNamespace(
+            name=name, dependencies={}, sequential=False,
+            external_triggers=[], xtrig_labels={}, outputs=set(),
+            start_point=None)
+        self.tdef = tdef
+        self.identity = f'{name}.1'
+        self.state = TaskState(tdef, 1, TASK_STATUS_WAITING, False)
+        self.manual_trigger = False
+        self.try_timers = {}
+        self.ready = ready
+        self.n_checks = 0
+
+    def is_ready(self):
+        self.n_checks += 1
+        return self.manual_trigger or (
+            self.ready and self.state(TASK_STATUS_WAITING, is_held=False))
+
+    def reset_manual_trigger(self):
+        self.manual_trigger = False
+
+
+@pytest.fixture
+def mgr():
+    return TaskQueueManager(
+        {
+            'default': {'limit': 0, 'members': ['a']},
+            'q1': {'limit': 2, 'members': ['b', 'c', 'd']},
+        },
+        'default')
+
+
+def test_release_unlimited(mgr):
+    """Ready tasks in an unlimited queue are released."""
+    foo = FakeTask('a')
+    mgr.add(foo)
+    assert mgr.release_tasks() == [foo]
+    assert foo.state(TASK_STATUS_QUEUED)
+    # until submitted, released tasks are released again
+    assert mgr.release_tasks() == [foo]
+    foo.state.reset(TASK_STATUS_PREPARING)
+    assert mgr.release_tasks() == []
+
+
+def test_release_limited(mgr):
+    """Active members count against the queue limit."""
+    itasks = [FakeTask(name) for name in 'bcd']
+    for itask in itasks:
+        mgr.add(itask)
+    b, c, d = itasks
+    assert mgr.release_tasks() == [b, c]
+    b.state.reset(TASK_STATUS_PREPARING)
+    c.state.reset(TASK_STATUS_PREPARING)
+    assert mgr.n_active['q1'] == 2
+    assert mgr.release_tasks() == []
+    # held active tasks do not count
+    b.state.reset(is_held=True)
+    assert mgr.release_tasks() == [d]
+    b.state.reset(is_held=False)
+    c.state.reset(TASK_STATUS_SUCCEEDED)
+    mgr.remove(c)
+    assert mgr.n_active['q1'] == 1
+    assert mgr.release_tasks() == [d]
+
+
+def test_check_on_change(mgr):
+    """Tasks waiting on other tasks are only re-checked when they change."""
+    foo = FakeTask('a', ready=False)
+    prereq = Prerequisite(IntegerPoint(1))
+    prereq.add('x', 1, 'succeeded')
+    prereq.set_condition('x.1 succeeded')
+    foo.state.prerequisites.append(prereq)
+    mgr.add(foo)
+    assert mgr.release_tasks() == []
+    assert foo.n_checks == 1
+    assert mgr.release_tasks() == []
+    assert foo.n_checks == 1
+    foo.ready = True
+    foo.state.satisfy_me({('y', '1', 'succeeded')})  # no change
+    assert mgr.release_tasks() == []
+    foo.state.satisfy_me({('x', '1', 'succeeded')})
+    assert mgr.release_tasks() == [foo]
+    assert foo.n_checks == 2
+
+
+def test_check_waiting_on_time(mgr):
+    """Tasks waiting on time alone are checked every time."""
+    foo = FakeTask('a', ready=False)
+    mgr.add(foo)
+    assert mgr.release_tasks() == []
+    foo.ready = True
+    assert mgr.release_tasks() == [foo]
+
+
+def test_manual_trigger(mgr):
+    """A manually triggered queued task is released despite the limit."""
+    itasks = [FakeTask(name) for name in 'bcd']
+    for itask in itasks:
+        mgr.add(itask)
+    b, c, d = itasks
+    mgr.release_tasks()
+    b.state.reset(TASK_STATUS_PREPARING)
+    c.state.reset(TASK_STATUS_PREPARING)
+    assert mgr.release_tasks() == []
+    d.manual_trigger = True
+    mgr.set_manual_trigger(d)
+    assert mgr.release_tasks() == [d]
+    assert not d.manual_trigger
+
+
+def test_configure(mgr):
+    """Members are re-assigned on reconfiguration."""
+    itasks = [FakeTask(name) for name in 'abc']
+    for itask in itasks:
+        mgr.add(itask)
+    itasks[1].state.reset(TASK_STATUS_PREPARING)
+    mgr.configure({
+        'default': {'limit': 1, 'members': ['a', 'b', 'c']},
+    })
+    assert mgr.n_active == {'default': 1}
+    assert set(mgr.get_tasks()) == set(itasks)
+    assert mgr.release_tasks() == []
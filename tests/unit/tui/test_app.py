@@ -0,0 +1,87 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from cylc.flow.data_messages_pb2 import (
+    PbFamilyProxy,
+    PbTaskProxy,
+)
+from cylc.flow.data_store_mgr import (
+    FAMILY_PROXIES,
+    TASK_PROXIES,
+    WORKFLOW,
+)
+from cylc.flow.tui import TASK_ICONS
+from cylc.flow.tui.app import TuiApp
+from cylc.flow.tui.tree import walk_tree
+
+
+def get_app():
+    """Return a Tui app displaying a workflow with two tasks."""
+    app = TuiApp('b')
+    data = app.store.data
+    data[WORKFLOW].id = 'a|b'
+    data[WORKFLOW].name = 'b'
+    data[WORKFLOW].status = 'running'
+    data[FAMILY_PROXIES]['a|b|1|root'] = PbFamilyProxy(
+        id='a|b|1|root', name='root', cycle_point='1', state='running')
+    for name in ('foo', 'bar'):
+        data[TASK_PROXIES][f'a|b|1|{name}'] = PbTaskProxy(
+            id=f'a|b|1|{name}', name=name, cycle_point='1',
+            state='waiting', first_parent='a|b|1|root')
+    app.store.loaded = True
+    app.set_tree(app.build_tree())
+    # load the whole tree into urwid
+    for node in walk_tree(app.tree_walker.get_focus()[1].get_root()):
+        node.get_widget()
+    return app
+
+
+def get_text(app, key):
+    return app.node_registry[key].get_widget().get_display_text()
+
+
+def test_patch_tree():
+    """It redraws changed nodes in place."""
+    app = get_app()
+    foo = app.node_registry[('task', 'a|b|1|foo')]
+    assert get_text(app, ('task', 'a|b|1|foo'))[0] == TASK_ICONS['waiting']
+
+    app.store.data[TASK_PROXIES]['a|b|1|foo'].state = 'running'
+    app.tree.update({TASK_PROXIES: {'a|b|1|foo'}})
+    app.patch_tree()
+    assert app.node_registry[('task', 'a|b|1|foo')] is foo
+    assert get_text(app, ('task', 'a|b|1|foo'))[0] == TASK_ICONS['running']
+
+
+def test_patch_tree_add_remove():
+    """It adds and removes children and moves the focus off removed nodes."""
+    app = get_app()
+    cycle = app.node_registry[('cycle', 'a|b|1')]
+    assert cycle.get_child_keys() == ['a|b|1|bar', 'a|b|1|foo']
+    app.tree_walker.set_focus(app.node_registry[('task', 'a|b|1|foo')])
+
+    data = app.store.data
+    del data[TASK_PROXIES]['a|b|1|foo']
+    data[TASK_PROXIES]['a|b|1|baz'] = PbTaskProxy(
+        id='a|b|1|baz', name='baz', cycle_point='1',
+        state='waiting', first_parent='a|b|1|root')
+    app.tree.update({TASK_PROXIES: {'a|b|1|foo', 'a|b|1|baz'}})
+    app.patch_tree()
+    assert cycle.get_child_keys() == ['a|b|1|bar', 'a|b|1|baz']
+    assert ('task', 'a|b|1|foo') not in app.node_registry
+    assert app.tree_walker.get_focus()[1] is cycle
+    assert cycle.get_child_node('a|b|1|baz').get_value()['data'][
+        'name'] == 'baz'
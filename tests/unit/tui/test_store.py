@@ -0,0 +1,95 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from cylc.flow.data_messages_pb2 import (
+    AllDeltas,
+    PbEntireWorkflow,
+    PbTaskProxy,
+)
+from cylc.flow.data_store_mgr import (
+    TASK_PROXIES,
+    WORKFLOW,
+    generate_checksum,
+)
+from cylc.flow.tui.store import TuiStore
+
+
+@pytest.fixture
+def store():
+    msg = PbEntireWorkflow()
+    msg.workflow.id = 'a|b'
+    msg.workflow.last_updated = 10.0
+    msg.task_proxies.add(id='a|b|1|foo', stamp='foo@1', state='waiting')
+    store = TuiStore()
+    store.load(msg.SerializeToString())
+    return store
+
+
+def test_load(store):
+    """It loads a snapshot of the data-store."""
+    assert store.loaded
+    assert store.data[WORKFLOW].id == 'a|b'
+    assert list(store.data[TASK_PROXIES]) == ['a|b|1|foo']
+
+
+def test_apply(store):
+    """It applies deltas and returns the ids of what has changed."""
+    deltas = AllDeltas()
+    deltas.task_proxies.time = 11.0
+    deltas.task_proxies.updated.append(
+        PbTaskProxy(id='a|b|1|foo', stamp='foo@2', state='running'))
+    deltas.task_proxies.added.append(
+        PbTaskProxy(id='a|b|2|foo', stamp='foo@3', state='waiting'))
+    deltas.task_proxies.checksum = generate_checksum(['foo@2', 'foo@3'])
+    deltas.workflow.time = 11.0
+    deltas.workflow.updated.status = 'running'
+    assert store.apply(deltas) == {
+        TASK_PROXIES: {'a|b|1|foo', 'a|b|2|foo'},
+        WORKFLOW: {'a|b'},
+    }
+    assert store.data[TASK_PROXIES]['a|b|1|foo'].state == 'running'
+    assert store.data[WORKFLOW].status == 'running'
+
+    # deltas older than the snapshot are ignored
+    deltas = AllDeltas()
+    deltas.task_proxies.time = 9.0
+    deltas.task_proxies.pruned.append('a|b|1|foo')
+    assert store.apply(deltas) == {}
+    assert 'a|b|1|foo' in store.data[TASK_PROXIES]
+
+
+def test_apply_checksum_mismatch(store):
+    """It returns None if the mirror no longer matches the data-store."""
+    deltas = AllDeltas()
+    deltas.task_proxies.time = 11.0
+    deltas.task_proxies.updated.append(
+        PbTaskProxy(id='a|b|1|foo', stamp='foo@2', state='running'))
+    deltas.task_proxies.checksum = generate_checksum(['foo@1'])
+    assert store.apply(deltas) is None
+    assert not store.loaded
+
+
+def test_apply_reloaded(store):
+    """It returns None if the data-store has been rebuilt."""
+    deltas = AllDeltas()
+    deltas.task_proxies.time = 11.0
+    deltas.task_proxies.reloaded = True
+    deltas.task_proxies.added.append(
+        PbTaskProxy(id='a|b|2|foo', stamp='foo@3', state='waiting'))
+    assert store.apply(deltas) is None
+    assert list(store.data[TASK_PROXIES]) == ['a|b|2|foo']
@@ -0,0 +1,268 @@
+# THIS FILE IS PART OF THE CYLC SUITE ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from copy import deepcopy
+
+import pytest
+
+from cylc.flow.data_messages_pb2 import (
+    PbFamilyProxy,
+    PbJob,
+    PbTask,
+    PbTaskProxy,
+)
+from cylc.flow.data_store_mgr import (
+    DATA_TEMPLATE,
+    FAMILY_PROXIES,
+    JOBS,
+    TASKS,
+    TASK_PROXIES,
+    WORKFLOW,
+)
+from cylc.flow.task_state import TASK_STATUSES_ORDERED
+from cylc.flow.tui.tree import TuiTree
+
+
+def add_family(data, point, name, first_parent=None, state='running'):
+    id_ = f'a|b|{point}|{name}'
+    data[FAMILY_PROXIES][id_] = PbFamilyProxy(
+        id=id_,
+        name=name,
+        cycle_point=point,
+        state=state,
+        first_parent=(
+            f'a|b|{point}|{first_parent}' if first_parent else None),
+    )
+
+
+def add_task(data, point, name, first_parent, state='running', jobs=0):
+    id_ = f'a|b|{point}|{name}'
+    data[TASKS].setdefault(
+        f'a|b|{name}', PbTask(id=f'a|b|{name}', mean_elapsed_time=10.0)
+    ).proxies.append(id_)
+    data[TASK_PROXIES][id_] = PbTaskProxy(
+        id=id_,
+        name=name,
+        task=f'a|b|{name}',
+        cycle_point=point,
+        state=state,
+        first_parent=f'a|b|{point}|{first_parent}',
+    )
+    for submit_num in range(1, jobs + 1):
+        add_job(data, id_, submit_num)
+
+
+def add_job(data, task_id, submit_num, state='running'):
+    id_ = f'{task_id}|{submit_num}'
+    data[JOBS][id_] = PbJob(
+        id=id_, submit_num=submit_num, state=state, task_proxy=task_id)
+    data[TASK_PROXIES][task_id].jobs.append(id_)
+
+
+@pytest.fixture
+def data():
+    """A data-store with:
+
+    1
+      FOO
+        foo1 (2 jobs)
+      bar (1 job)
+    2
+      baz
+    """
+    data = deepcopy(DATA_TEMPLATE)
+    data[WORKFLOW].id = 'a|b'
+    data[WORKFLOW].name = 'b'
+    data[WORKFLOW].status = 'running'
+    add_family(data, '1', 'root')
+    add_family(data, '2', 'root', state='waiting')
+    add_family(data, '1', 'FOO', 'root')
+    add_task(data, '1', 'foo1', 'FOO', jobs=2)
+    add_task(data, '1', 'bar', 'root', state='waiting', jobs=1)
+    add_task(data, '2', 'baz', 'root', state='waiting')
+    return data
+
+
+def get_structure(node):
+    """Return (type_, id_, [children]) for a node and all beneath it."""
+    return (
+        node['type_'],
+        node['id_'],
+        [get_structure(child) for child in node['children']]
+    )
+
+
+def test_build(data):
+    """It builds the same tree as compute_tree."""
+    tree = TuiTree(data, TASK_STATUSES_ORDERED)
+    root = tree.build()
+    assert get_structure(root) == (
+        'workflow', 'a|b', [
+            ('cycle', 'a|b|1', [
+                ('family', 'a|b|1|FOO', [
+                    ('task', 'a|b|1|foo1', [
+                        ('job', 'a|b|1|foo1|2', [
+                            ('job_info', 'a|b|1|foo1|2_info', [])
+                        ]),
+                        ('job', 'a|b|1|foo1|1', [
+                            ('job_info', 'a|b|1|foo1|1_info', [])
+                        ]),
+                    ])
+                ]),
+                ('task', 'a|b|1|bar', [
+                    ('job', 'a|b|1|bar|1', [
+                        ('job_info', 'a|b|1|bar|1_info', [])
+                    ]),
+                ]),
+            ]),
+            ('cycle', 'a|b|2', [
+                ('task', 'a|b|2|baz', []),
+            ]),
+        ]
+    )
+    assert root['data']['name'] == 'b'
+    assert tree.nodes[('task', 'a|b|1|foo1')]['data'] == {
+        'id': 'a|b|1|foo1',
+        'name': 'foo1',
+        'cyclePoint': '1',
+        'state': 'running',
+        'isHeld': False,
+        'firstParent': {'id': 'a|b|1|FOO', 'name': 'FOO'},
+        'task': {'meanElapsedTime': 10.0},
+    }
+    assert tree.nodes[('cycle', 'a|b|1')]['data']['id'] == 'a|b|1'
+    assert tree.nodes[('job', 'a|b|1|bar|1')]['data']['submitNum'] == 1
+
+
+def test_build_filtered(data):
+    """It only displays tasks in the selected states."""
+    tree = TuiTree(data, ['running'])
+    root = tree.build()
+    assert get_structure(root)[2] == [
+        ('cycle', 'a|b|1', [
+            ('family', 'a|b|1|FOO', [
+                ('task', 'a|b|1|foo1', [
+                    ('job', 'a|b|1|foo1|2', [
+                        ('job_info', 'a|b|1|foo1|2_info', [])
+                    ]),
+                    ('job', 'a|b|1|foo1|1', [
+                        ('job_info', 'a|b|1|foo1|1_info', [])
+                    ]),
+                ])
+            ]),
+        ]),
+    ]
+
+
+def test_update_changed(data):
+    """It updates nodes in place and reports which have changed."""
+    tree = TuiTree(data, TASK_STATUSES_ORDERED)
+    tree.build()
+    bar = tree.nodes[('task', 'a|b|1|bar')]
+    data[TASK_PROXIES]['a|b|1|bar'].state = 'running'
+    data[JOBS]['a|b|1|bar|1'].state = 'failed'
+    tree.update({TASK_PROXIES: {'a|b|1|bar'}, JOBS: {'a|b|1|bar|1'}})
+    assert tree.nodes[('task', 'a|b|1|bar')] is bar
+    assert bar['data']['state'] == 'running'
+    assert bar['children'][0]['data']['state'] == 'failed'
+    assert tree.changed == {
+        ('task', 'a|b|1|bar'),
+        ('job', 'a|b|1|bar|1'),
+        ('job_info', 'a|b|1|bar|1_info'),
+    }
+    assert not tree.restructured
+    assert not tree.removed
+
+    # no change, nothing to redraw
+    tree.clear_changes()
+    tree.update({TASK_PROXIES: {'a|b|1|bar'}})
+    assert not tree.changed
+
+
+def test_update_added(data):
+    """It adds nodes in order."""
+    tree = TuiTree(data, TASK_STATUSES_ORDERED)
+    tree.build()
+    add_job(data, 'a|b|2|baz', 1)
+    add_task(data, '2', 'aaa', 'root')
+    add_family(data, '3', 'root')
+    add_task(data, '3', 'qux', 'root')
+    tree.update({
+        TASK_PROXIES: {'a|b|2|aaa', 'a|b|3|qux', 'a|b|2|baz'},
+        FAMILY_PROXIES: {'a|b|3|root'},
+        JOBS: {'a|b|2|baz|1'},
+    })
+    assert get_structure(tree.root)[2][1:] == [
+        ('cycle', 'a|b|2', [
+            ('task', 'a|b|2|aaa', []),
+            ('task', 'a|b|2|baz', [
+                ('job', 'a|b|2|baz|1', [
+                    ('job_info', 'a|b|2|baz|1_info', [])
+                ]),
+            ]),
+        ]),
+        ('cycle', 'a|b|3', [
+            ('task', 'a|b|3|qux', []),
+        ]),
+    ]
+    assert tree.restructured == {
+        ('workflow', 'a|b'),
+        ('cycle', 'a|b|2'),
+        ('cycle', 'a|b|3'),
+        ('task', 'a|b|2|baz'),
+    }
+
+
+def test_update_removed(data):
+    """It removes pruned and filtered out nodes and all beneath them."""
+    tree = TuiTree(data, ['running', 'waiting'])
+    tree.build()
+    # pruned
+    del data[FAMILY_PROXIES]['a|b|1|FOO']
+    del data[TASK_PROXIES]['a|b|1|foo1']
+    # filtered out
+    data[TASK_PROXIES]['a|b|2|baz'].state = 'succeeded'
+    tree.update({
+        FAMILY_PROXIES: {'a|b|1|FOO'},
+        TASK_PROXIES: {'a|b|1|foo1', 'a|b|2|baz'},
+    })
+    assert get_structure(tree.root)[2] == [
+        ('cycle', 'a|b|1', [
+            ('task', 'a|b|1|bar', [
+                ('job', 'a|b|1|bar|1', [
+                    ('job_info', 'a|b|1|bar|1_info', [])
+                ]),
+            ]),
+        ]),
+        ('cycle', 'a|b|2', []),
+    ]
+    assert tree.removed == {
+        ('family', 'a|b|1|FOO'),
+        ('task', 'a|b|1|foo1'),
+        ('job', 'a|b|1|foo1|1'),
+        ('job_info', 'a|b|1|foo1|1_info'),
+        ('job', 'a|b|1|foo1|2'),
+        ('job_info', 'a|b|1|foo1|2_info'),
+        ('task', 'a|b|2|baz'),
+    }
+    assert set(tree.nodes) == {
+        ('workflow', 'a|b'),
+        ('cycle', 'a|b|1'),
+        ('cycle', 'a|b|2'),
+        ('task', 'a|b|1|bar'),
+        ('job', 'a|b|1|bar|1'),
+        ('job_info', 'a|b|1|bar|1_info'),
+    }
@@ -63,7 +63,7 @@ def testrender_node__job():
 def testrender_node__task__succeeded():
     """It renders tasks."""
     node = Mock()
-    node.get_child_node = lambda _: None
+    node.get_child_keys = lambda: []
     assert render_node(
         node,
         {
@@ -87,6 +87,7 @@ def testrender_node__task__running():
         'state': 'running'
     }}
     node = Mock()
+    node.get_child_keys = lambda: ['job']
     node.get_child_node = lambda _: child
     assert render_node(
         node,